@@ -0,0 +1,139 @@
+import json
+import mmap
+import os
+import struct
+import zipfile
+from itertools import chain, islice
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tif', '.tiff', '.webp')
+
+# Size of the fixed part of a zip local file header; name and extra lengths sit at offset 26
+_ZIP_LOCAL_HEADER_SIZE = 30
+
+
+def _decode(buf):
+    return cv2.imdecode(np.frombuffer(buf, np.uint8), cv2.IMREAD_COLOR)
+
+
+def _decode_pages(buf):
+    """Yield the pages of a multi-page buffer, decoding one page per call."""
+    data = np.frombuffer(buf, np.uint8)
+    index = 0
+    while True:
+        ok, pages = cv2.imdecodemulti(data, cv2.IMREAD_COLOR, None, (index, index + 1))
+        if not ok or not pages:
+            return
+        yield pages[0]
+        index += 1
+
+
+def _read_pages(path):
+    """Yield the pages of a multi-page file, reading one page per call."""
+    for index in range(cv2.imcount(path)):
+        ok, pages = cv2.imreadmulti(path, index, 1, flags=cv2.IMREAD_COLOR)
+        yield pages[0] if ok and pages else None
+
+
+def load_blob_index(index_path):
+    """Read a JSON index of [{"name", "offset", "length"}, ...] entries for a blob file."""
+    with open(index_path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    return [(e['name'], int(e['offset']), int(e['length'])) for e in entries]
+
+
+def iter_blob_images(blob_path, index):
+    """Yield (name, image) for each (name, offset, length) entry of a concatenated blob file.
+
+    The blob is memory-mapped and each image is decoded straight from its
+    slice of the mapping, so nothing is copied out to disk.
+    """
+    with open(blob_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        view = memoryview(mm)
+        try:
+            for name, offset, length in index:
+                if offset < 0 or offset + length > len(view):
+                    print(f"Error: Entry {name} lies outside {blob_path}")
+                    yield name, None
+                    continue
+                chunk = view[offset:offset + length]
+                image = _decode(chunk)
+                chunk.release()
+                yield name, image
+        finally:
+            view.release()
+
+
+def _stored_member_offset(mm, info):
+    header = mm[info.header_offset:info.header_offset + _ZIP_LOCAL_HEADER_SIZE]
+    name_len, extra_len = struct.unpack('<HH', header[26:30])
+    return info.header_offset + _ZIP_LOCAL_HEADER_SIZE + name_len + extra_len
+
+
+def iter_zip_images(zip_path):
+    """Yield (name, image) for every image member of a zip archive.
+
+    Uncompressed members are decoded in place from the memory-mapped archive;
+    compressed members are inflated into memory.
+    """
+    with open(zip_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+            zipfile.ZipFile(f) as zf:
+        view = memoryview(mm)
+        try:
+            for info in zf.infolist():
+                if info.is_dir() or not info.filename.lower().endswith(IMAGE_EXTENSIONS):
+                    continue
+                if info.compress_type == zipfile.ZIP_STORED:
+                    start = _stored_member_offset(mm, info)
+                    buf = view[start:start + info.file_size]
+                else:
+                    buf = zf.read(info)
+                if info.filename.lower().endswith(('.tif', '.tiff')):
+                    pages = _decode_pages(buf)
+                else:
+                    pages = iter([_decode(buf)])
+                try:
+                    # Flatten member paths so names stay usable as output file names
+                    for name, image in _name_pages(info.filename.replace('/', '_'), pages):
+                        yield name, image
+                finally:
+                    # The page generator holds a view of buf until it is closed
+                    if hasattr(pages, 'close'):
+                        pages.close()
+                    if isinstance(buf, memoryview):
+                        buf.release()
+        finally:
+            view.release()
+
+
+def iter_tiff_images(tiff_path):
+    """Yield (name, image) for every page of a multi-page TIFF, decoding one page at a time."""
+    for name, image in _name_pages(os.path.basename(tiff_path), _read_pages(tiff_path)):
+        yield name, image
+
+
+def _name_pages(name, pages):
+    # Pages are only numbered when there is more than one, so look one page ahead
+    head = list(islice(pages, 2))
+    if len(head) < 2:
+        yield name, head[0] if head else None
+        return
+    base, ext = os.path.splitext(name)
+    for page_number, image in enumerate(chain(head, pages), start=1):
+        yield f"{base}_page{page_number}{ext}", image
+
+
+def iter_archive_images(path, index=None):
+    """Dispatch on the input type: zip archive, multi-page TIFF, or blob file plus index."""
+    lower = path.lower()
+    if index is not None:
+        if isinstance(index, str):
+            index = load_blob_index(index)
+        return iter_blob_images(path, index)
+    if lower.endswith('.zip'):
+        return iter_zip_images(path)
+    if lower.endswith(('.tif', '.tiff')):
+        return iter_tiff_images(path)
+    raise ValueError(f"Unsupported archive type (blob files need an index): {path}")
@@ -0,0 +1,193 @@
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from driving_test import check_and_preprocess, parse_driver_license_results, recognize_license
+from quality_gate import rejection
+from reader_pool import ReaderPool
+
+# Sentinel passed down the queues once a stage has drained its input
+_DONE = object()
+
+
+def _read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _write_json(json_path, data):
+    os.makedirs(os.path.dirname(json_path) or '.', exist_ok=True)
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+
+
+def _decode_and_preprocess(data, preprocess):
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        return None, None
+    return preprocess(img)
+
+
+async def _run_stage(in_q, out_q, n_workers, handle, on_error):
+    # Each worker re-queues the sentinel so its siblings also stop, then the
+    # stage forwards a single sentinel downstream once every worker is done.
+    async def worker(index):
+        while True:
+            item = await in_q.get()
+            if item is _DONE:
+                await in_q.put(_DONE)
+                return
+            # A failing image is recorded and dropped; the rest of the batch keeps flowing
+            try:
+                result = await handle(index, item)
+            except Exception as e:
+                on_error(item, e)
+                continue
+            if result is not None and out_q is not None:
+                await out_q.put(result)
+
+    await asyncio.gather(*(worker(i) for i in range(n_workers)))
+    if out_q is not None:
+        await out_q.put(_DONE)
+
+
+async def process_images(image_paths, preprocess, recognize, parse, reader_factory,
+                         output_folder="output", ocr_workers=1, preprocess_workers=None,
+                         io_workers=8, queue_size=8, threads_per_reader=None):
+    """Run read -> preprocess -> OCR -> parse/write as overlapping stages.
+
+    Queues between stages are bounded by queue_size, so a slow OCR stage
+    holds back reads instead of buffering the whole input in memory.
+    preprocess(img) returns (processed image or None, quality report or
+    None), like driving_test.check_and_preprocess. The OCR workers borrow
+    readers from a ReaderPool of ocr_workers readers, which caps each at
+    threads_per_reader inference threads (by default the cores split
+    evenly). An image that fails in any stage gets an "Error" entry in the
+    results instead of stopping the batch.
+    """
+    loop = asyncio.get_running_loop()
+    preprocess_workers = preprocess_workers or os.cpu_count() or 1
+    io_pool = ThreadPoolExecutor(max_workers=io_workers)
+    cpu_pool = ThreadPoolExecutor(max_workers=preprocess_workers)
+    ocr_pool = ThreadPoolExecutor(max_workers=ocr_workers)
+
+    path_q = asyncio.Queue(maxsize=queue_size)
+    raw_q = asyncio.Queue(maxsize=queue_size)
+    img_q = asyncio.Queue(maxsize=queue_size)
+    ocr_q = asyncio.Queue(maxsize=queue_size)
+    results = {}
+
+    # Building the readers loads the models, so keep it off the event loop
+    readers = await loop.run_in_executor(
+        ocr_pool, lambda: ReaderPool(ocr_workers, threads_per_reader, reader_factory=reader_factory))
+
+    def recognize_pooled(img):
+        with readers.reader() as reader:
+            return recognize(reader, img)
+
+    async def feed():
+        for image_path in image_paths:
+            await path_q.put(image_path)
+        await path_q.put(_DONE)
+
+    async def read(index, image_path):
+        try:
+            data = await loop.run_in_executor(io_pool, _read_bytes, image_path)
+        except OSError as e:
+            print(f"Error: Could not read image at {image_path}: {e}")
+            data = None
+        return image_path, data
+
+    def json_path_for(image_path):
+        return os.path.join(output_folder, os.path.splitext(os.path.basename(image_path))[0] + ".json")
+
+    def stage_failed(stage):
+        def record(item, error):
+            # Stages pass the image path alone or first in a tuple
+            image_path = item if isinstance(item, str) else item[0]
+            print(f"Error: {stage} failed for {image_path}: {error}")
+            results[os.path.basename(image_path)] = {"Error": f"{stage} failed: {type(error).__name__}: {error}"}
+        return record
+
+    async def prep(index, item):
+        image_path, data = item
+        img = quality = None
+        if data is not None:
+            img, quality = await loop.run_in_executor(cpu_pool, _decode_and_preprocess, data, preprocess)
+        if img is None:
+            if quality is not None and not quality["passed"]:
+                results[os.path.basename(image_path)] = rejection(quality)
+                await loop.run_in_executor(io_pool, _write_json, json_path_for(image_path),
+                                           results[os.path.basename(image_path)])
+            else:
+                results[os.path.basename(image_path)] = {"Error": "Image not processed."}
+            return None
+        return image_path, img, quality
+
+    async def ocr(index, item):
+        image_path, img, quality = item
+        ocr_result = await loop.run_in_executor(ocr_pool, recognize_pooled, img)
+        return image_path, ocr_result, quality
+
+    async def write(index, item):
+        image_path, ocr_result, quality = item
+        data = parse(ocr_result)
+        if quality is not None:
+            data["quality"] = quality
+        await loop.run_in_executor(io_pool, _write_json, json_path_for(image_path), data)
+        results[os.path.basename(image_path)] = data
+        return None
+
+    try:
+        await asyncio.gather(
+            feed(),
+            _run_stage(path_q, raw_q, io_workers, read, stage_failed("Read")),
+            _run_stage(raw_q, img_q, preprocess_workers, prep, stage_failed("Preprocessing")),
+            _run_stage(img_q, ocr_q, ocr_workers, ocr, stage_failed("OCR")),
+            _run_stage(ocr_q, None, io_workers, write, stage_failed("Writing results")),
+        )
+    finally:
+        io_pool.shutdown(wait=False)
+        cpu_pool.shutdown(wait=False)
+        ocr_pool.shutdown(wait=False)
+    return results
+
+
+def _license_reader():
+    from inference_backend import create_reader
+    return create_reader(['en'])
+
+
+def _license_recognize(reader, img):
+    return recognize_license(reader, img)
+
+
+def _license_preprocess(img):
+    # Same quality gate as driving_test; no reader, as readers are only lent to the OCR stage
+    return check_and_preprocess(img)
+
+
+def _license_parse(ocr_results):
+    details, kv_pairs, confidences = parse_driver_license_results(ocr_results)
+    return {"extracted_details": details, "field_confidence": confidences}
+
+
+def run_license_pipeline(image_paths, output_folder="output", ocr_workers=1,
+                         preprocess_workers=None, io_workers=8, queue_size=8, threads_per_reader=None):
+    return asyncio.run(process_images(
+        image_paths,
+        preprocess=_license_preprocess,
+        recognize=_license_recognize,
+        parse=_license_parse,
+        reader_factory=_license_reader,
+        output_folder=output_folder,
+        ocr_workers=ocr_workers,
+        preprocess_workers=preprocess_workers,
+        io_workers=io_workers,
+        queue_size=queue_size,
+        threads_per_reader=threads_per_reader,
+    ))
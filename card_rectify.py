@@ -0,0 +1,127 @@
+import cv2
+import numpy as np
+
+from quality_gate import text_mask
+
+# Card edges are searched on a copy no wider than this
+DETECT_MAX_SIDE = 800
+# The card must cover at least this share of the frame to be trusted
+MIN_CARD_AREA_RATIO = 0.1
+# Measured long/short side ratio may differ this much from the document's nominal ratio.
+# Tight enough that a card whose dark header merges into a dark background is not taken
+# for the card without its header strip (a header of a tenth of the card is already out).
+ASPECT_TOLERANCE = 0.1
+
+# Canonical warp sizes at roughly 300 dpi: ID-1 cards (85.6 x 54 mm) and the ID-3 passport page (125 x 88 mm).
+# Other documents keep their measured aspect ratio at DEFAULT_CARD_WIDTH.
+CARD_SIZES = {
+    'license': (1012, 638),
+    'passport': (1476, 1039),
+}
+DEFAULT_CARD_WIDTH = 1012
+
+
+def order_corners(pts):
+    """Order four points as top-left, top-right, bottom-right, bottom-left."""
+    pts = np.asarray(pts, dtype=np.float32).reshape(4, 2)
+    s = pts.sum(axis=1)
+    d = np.diff(pts, axis=1).ravel()
+    return np.array([pts[np.argmin(s)], pts[np.argmin(d)], pts[np.argmax(s)], pts[np.argmax(d)]],
+                    dtype=np.float32)
+
+
+def _side_lengths(quad):
+    tl, tr, br, bl = quad
+    width = max(np.linalg.norm(tr - tl), np.linalg.norm(br - bl))
+    height = max(np.linalg.norm(bl - tl), np.linalg.norm(br - tr))
+    return width, height
+
+
+def _aspect_ok(quad, doc_type):
+    size = CARD_SIZES.get(doc_type)
+    if size is None:
+        return True
+    width, height = _side_lengths(quad)
+    if min(width, height) == 0:
+        return False
+    measured = max(width, height) / min(width, height)
+    nominal = size[0] / float(size[1])
+    return abs(measured - nominal) <= nominal * ASPECT_TOLERANCE
+
+
+def _holds_text(gray, quad_small, strokes):
+    # A card is denser in text strokes than the background around it. On a scan
+    # that already fills the frame, a quad found around the printed photo fails this.
+    inside = np.zeros_like(strokes)
+    cv2.fillConvexPoly(inside, quad_small.astype(np.int32), 255)
+    inside_area = cv2.countNonZero(inside)
+    outside_area = inside.size - inside_area
+    if outside_area == 0:
+        return True
+    inside_strokes = cv2.countNonZero(cv2.bitwise_and(strokes, inside))
+    outside_strokes = cv2.countNonZero(strokes) - inside_strokes
+    return inside_strokes / float(inside_area) >= outside_strokes / float(outside_area)
+
+
+def find_card_quad(image, doc_type=None, min_area_ratio=MIN_CARD_AREA_RATIO):
+    """Corners of the largest card-shaped quadrilateral in image, ordered, or None.
+
+    Contours are taken from Canny edges on a downscaled copy. A candidate must
+    cover min_area_ratio of the frame, match the aspect ratio of a known
+    doc_type, and hold text at least as densely as the rest of the frame,
+    so the photo printed on a card filling the frame is not taken for the
+    card itself. Of the candidates passing, the one with the largest quad
+    area wins.
+    """
+    h, w = image.shape[:2]
+    scale = min(1.0, DETECT_MAX_SIDE / float(max(h, w)))
+    small = cv2.resize(image, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA) if scale < 1.0 else image
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+    strokes = text_mask(gray)
+    edges = cv2.Canny(cv2.GaussianBlur(gray, (5, 5), 0), 50, 150)
+    edges = cv2.dilate(edges, cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3)))
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    frame_area = float(gray.shape[0] * gray.shape[1])
+    best, best_area = None, 0.0
+    for contour in sorted(contours, key=cv2.contourArea, reverse=True):
+        area = cv2.contourArea(contour)
+        if area < frame_area * min_area_ratio:
+            break
+        approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
+        if len(approx) == 4 and cv2.isContourConvex(approx):
+            quad = approx.reshape(4, 2).astype(np.float32)
+        else:
+            # Rounded corners or a finger over an edge: fall back to the enclosing rectangle
+            rect = cv2.minAreaRect(contour)
+            if area < 0.85 * rect[1][0] * rect[1][1]:
+                continue
+            quad = cv2.boxPoints(rect)
+        quad = order_corners(quad)
+        # A fallback rectangle can enclose more than its contour, so compare the quads themselves
+        quad_area = cv2.contourArea(quad)
+        if quad_area > best_area and _aspect_ok(quad, doc_type) and _holds_text(gray, quad, strokes):
+            best, best_area = quad, quad_area
+    return best / scale if best is not None else None
+
+
+def rectify_card(image, quad, doc_type=None):
+    """Warp the quadrilateral to the document's canonical size, keeping portrait cards portrait."""
+    width, height = _side_lengths(quad)
+    size = CARD_SIZES.get(doc_type)
+    if size is None:
+        out_w = DEFAULT_CARD_WIDTH
+        out_h = int(round(out_w * height / width)) if width else out_w
+    else:
+        out_w, out_h = size if width >= height else size[::-1]
+    target = np.array([[0, 0], [out_w - 1, 0], [out_w - 1, out_h - 1], [0, out_h - 1]], dtype=np.float32)
+    homography = cv2.getPerspectiveTransform(quad, target)
+    return cv2.warpPerspective(image, homography, (out_w, out_h), flags=cv2.INTER_CUBIC,
+                               borderMode=cv2.BORDER_REPLICATE)
+
+
+def detect_and_rectify(image, doc_type=None):
+    """Return (card image, quad) when a card is found, else (image, None) unchanged."""
+    quad = find_card_quad(image, doc_type)
+    if quad is None:
+        return image, None
+    return rectify_card(image, quad, doc_type), quad
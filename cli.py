@@ -0,0 +1,40 @@
+import sys
+
+# GUI and plotting modules are imported inside these helpers only, so the
+# extraction modules stay importable (and fast to import) on headless workers.
+
+
+def select_image_file(title, filetypes, argv=None):
+    """First path given on the command line, or one picked in a Tk file dialog."""
+    args = sys.argv[1:] if argv is None else argv
+    if args:
+        return args[0]
+    from tkinter import Tk, filedialog
+    root = Tk()
+    root.withdraw()
+    try:
+        return filedialog.askopenfilename(title=title, filetypes=filetypes)
+    finally:
+        root.destroy()
+
+
+def select_image_files(title, filetypes, argv=None):
+    """All paths given on the command line, or those picked in a Tk file dialog."""
+    args = sys.argv[1:] if argv is None else argv
+    if args:
+        return list(args)
+    from tkinter import Tk, filedialog
+    root = Tk()
+    root.withdraw()
+    try:
+        return list(filedialog.askopenfilenames(title=title, filetypes=filetypes))
+    finally:
+        root.destroy()
+
+
+def show_image(img, title):
+    from matplotlib import pyplot as plt
+    plt.imshow(img, cmap='gray')
+    plt.title(title)
+    plt.axis('off')
+    plt.show()
@@ -1,121 +1,25 @@
-import cv2
-import easyocr
-import numpy as np
 import os
-import tkinter as tk
-from tkinter import filedialog
 import re
-import difflib
-
-def preprocess_image(image_path):
-    img = cv2.imread(image_path)
-    if img is None:
-        print(f"Error: Could not read image at {image_path}")
-        return None
-    target_width = 800
-    scale_factor = target_width / img.shape[1]
-    width = target_width
-    height = int(img.shape[0] * scale_factor)
-    dim = (width, height)
-    resized_img = cv2.resize(img, dim, interpolation=cv2.INTER_AREA)
-    gray = cv2.cvtColor(resized_img, cv2.COLOR_BGR2GRAY)
-    denoised_gray = cv2.fastNlMeansDenoising(gray, None, h=25, templateWindowSize=7, searchWindowSize=21)
-    blurred = cv2.GaussianBlur(denoised_gray, (3, 3), 0)
-    thresholded = cv2.adaptiveThreshold(blurred, 255,
-                                        cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                                        cv2.THRESH_BINARY,
-                                        blockSize=31, C=10)
-    return thresholded
-
-def parse_key_value_lines(lines):
-    kv_pairs = {}
-    for line in lines:
-        for sep in [':', ';', '-', '=']:
-            if sep in line:
-                parts = line.split(sep, 1)
-                key = parts[0].strip().upper()
-                value = parts[1].strip()
-                if key and value:
-                    kv_pairs[key] = value
-                break
-    return kv_pairs
-
-def detect_state(lines):
-    us_states = [
-        "ALABAMA", "ALASKA", "ARIZONA", "ARKANSAS", "CALIFORNIA", "COLORADO", "CONNECTICUT",
-        "DELAWARE", "FLORIDA", "GEORGIA", "HAWAII", "IDAHO", "ILLINOIS", "INDIANA", "IOWA",
-        "KANSAS", "KENTUCKY", "LOUISIANA", "MAINE", "MARYLAND", "MASSACHUSETTS", "MICHIGAN",
-        "MINNESOTA", "MISSISSIPPI", "MISSOURI", "MONTANA", "NEBRASKA", "NEVADA", "NEW HAMPSHIRE",
-        "NEW JERSEY", "NEW MEXICO", "NEW YORK", "NORTH CAROLINA", "NORTH DAKOTA", "OHIO",
-        "OKLAHOMA", "OREGON", "PENNSYLVANIA", "RHODE ISLAND", "SOUTH CAROLINA", "SOUTH DAKOTA",
-        "TENNESSEE", "TEXAS", "UTAH", "VERMONT", "VIRGINIA", "WASHINGTON", "WEST VIRGINIA",
-        "WISCONSIN", "WYOMING"
-    ]
-    state_abbr = {
-        "AL": "ALABAMA", "AK": "ALASKA", "AZ": "ARIZONA", "AR": "ARKANSAS", "CA": "CALIFORNIA",
-        "CO": "COLORADO", "CT": "CONNECTICUT", "DE": "DELAWARE", "FL": "FLORIDA", "GA": "GEORGIA",
-        "HI": "HAWAII", "ID": "IDAHO", "IL": "ILLINOIS", "IN": "INDIANA", "IA": "IOWA",
-        "KS": "KANSAS", "KY": "KENTUCKY", "LA": "LOUISIANA", "ME": "MAINE", "MD": "MARYLAND",
-        "MA": "MASSACHUSETTS", "MI": "MICHIGAN", "MN": "MINNESOTA", "MS": "MISSISSIPPI",
-        "MO": "MISSOURI", "MT": "MONTANA", "NE": "NEBRASKA", "NV": "NEVADA", "NH": "NEW HAMPSHIRE",
-        "NJ": "NEW JERSEY", "NM": "NEW MEXICO", "NY": "NEW YORK", "NC": "NORTH CAROLINA",
-        "ND": "NORTH DAKOTA", "OH": "OHIO", "OK": "OKLAHOMA", "OR": "OREGON", "PA": "PENNSYLVANIA",
-        "RI": "RHODE ISLAND", "SC": "SOUTH CAROLINA", "SD": "SOUTH DAKOTA", "TN": "TENNESSEE",
-        "TX": "TEXAS", "UT": "UTAH", "VT": "VERMONT", "VA": "VIRGINIA", "WA": "WASHINGTON",
-        "WV": "WEST VIRGINIA", "WI": "WISCONSIN", "WY": "WYOMING"
-    }
-    # Scan all lines for a direct match or abbreviation
-    for line in lines:
-        upper = line.upper()
-        # Direct state name
-        for state in us_states:
-            if state in upper:
-                return state.title()
-        # Abbreviation
-        for abbr, state in state_abbr.items():
-            if re.search(r'\b{}\b'.format(abbr), upper):
-                return state.title()
-        # Fuzzy match
-        matches = difflib.get_close_matches(upper, us_states, n=1, cutoff=0.8)
-        if matches:
-            return matches[0].title()
-    return "Not Found"
+import cv2
+import driving_test
+from driving_test import check_and_preprocess, parse_key_value_lines, detect_state, extract_pa_dl_number
+from quality_gate import rejected_or_error
 
-def extract_pa_dl_number(lines, kv_pairs):
-    # 1. Try key-value pairs first
-    for k in kv_pairs:
-        if 'DLN' in k or 'DL' in k:
-            digits = re.sub(r'\D', '', kv_pairs[k])
-            if len(digits) == 8:
-                return digits
-    # 2. Fallback: scan lines for DLN label and 8-digit numbers
-    for line in lines:
-        if 'DLN' in line.upper():
-            digits = re.sub(r'\D', '', line)
-            if len(digits) == 8:
-                return digits
-        # Match the format "## ### ###"
-        match = re.search(r'(\d{2}\s\d{3}\s\d{3})', line)
-        if match:
-            digits = re.sub(r'\D', '', match.group(1))
-            if len(digits) == 8:
-                return digits
-    # 3. Fallback: any standalone 8-digit number
-    for line in lines:
-        digits = re.sub(r'\D', '', line)
-        if len(digits) == 8:
-            return digits
-    return "Not Found"
+# This script's original field rules, kept because they read some cards differently from driving_test's
+NAME_LABELS = [
+    "DRIVER", "LICENSE", "DLN", "ID", "SEX", "DOB", "CLASS", "RESTR", "EYES",
+    "HEIGHT", "CITY", "ZIP", "BIRTH", "EXP", "ADDR", "ORGANDONOR", "VISITPA", "DD",
+    "END", "SAMPLE"
+]
 
 def extract_general_dl_number(lines, kv_pairs):
-    # Try key-value pairs first
+    # Unlike driving_test, no WDL-prefixed number rule
     for k in kv_pairs:
         if 'DLN' in k or 'DL' in k or 'LIC' in k or 'ID' in k:
             value = kv_pairs[k]
             cleaned = re.sub(r'[^A-Z0-9]', '', value)
             if 6 <= len(cleaned) <= 20 and not cleaned.isalpha():
                 return cleaned
-    # Fallback: look for plausible alphanumeric string in lines
     for line in lines:
         guess = ''.join(re.findall(r'[A-Z0-9]', line))
         if 6 <= len(guess) <= 20 and not guess.isalpha():
@@ -123,16 +27,12 @@ def extract_general_dl_number(lines, kv_pairs):
     return "Not Found"
 
 def extract_name(lines):
-    LABELS = [
-        "DRIVER", "LICENSE", "DLN", "ID", "SEX", "DOB", "CLASS", "RESTR", "EYES",
-        "HEIGHT", "CITY", "ZIP", "BIRTH", "EXP", "ADDR", "ORGANDONOR", "VISITPA", "DD",
-        "END", "SAMPLE"
-    ]
+    # Skips lines with more than 3 digits and words of 2 letters or fewer
     for i, line in enumerate(lines):
         upper = line.upper()
         if sum(c.isdigit() for c in line) > 3:
             continue
-        if any(label in upper for label in LABELS):
+        if any(label in upper for label in NAME_LABELS):
             continue
         words = [w for w in line.split() if w.isalpha() and len(w) > 2]
         if len(words) >= 2:
@@ -147,71 +47,74 @@ def extract_name(lines):
             return "Sample"
     return "Not Found"
 
+def extract_exp_date(lines, kv_pairs):
+    # Slash dates only: an EXP value starting with one, else the first full date on any line
+    for k in kv_pairs:
+        if 'EXP' in k:
+            val = kv_pairs[k]
+            if re.match(r'\d{2}/\d{2}/\d{4}', val) or re.match(r'\d{2}/\d{2}/\d{2}', val):
+                return val
+    for line in lines:
+        m = re.search(r'(\d{2}/\d{2}/\d{4})', line)
+        if m:
+            return m.group(1)
+    return "Not Found"
+
+def extract_sex(lines, kv_pairs):
+    for k in kv_pairs:
+        if 'SEX' in k:
+            val = kv_pairs[k].strip().upper()
+            if val in ['M', 'F']:
+                return val
+    for line in lines:
+        m = re.search(r'SEX[:\s-]*([MF])', line, re.IGNORECASE)
+        if m:
+            return m.group(1).upper()
+    return "Not Found"
+
 def parse_driver_license_details(ocr_result_lines):
+    """This script's original parser; returns (details, kv_pairs) like driving_test's."""
+    kv_pairs = parse_key_value_lines(ocr_result_lines)
     details = {
         "DL No": "Not Found",
         "Exp Date": "Not Found",
         "Sex": "Not Found",
         "Name": "Not Found",
-        "State": "Not Found"
+        "State": detect_state(ocr_result_lines)
     }
-    kv_pairs = parse_key_value_lines(ocr_result_lines)
-    details['State'] = detect_state(ocr_result_lines)
-
-    # DL No extraction
     if details['State'] == "Pennsylvania":
         details['DL No'] = extract_pa_dl_number(ocr_result_lines, kv_pairs)
     else:
         details['DL No'] = extract_general_dl_number(ocr_result_lines, kv_pairs)
-
-    # Expiry Date
-    for k in kv_pairs:
-        if 'EXP' in k:
-            val = kv_pairs[k]
-            if re.match(r'\d{2}/\d{2}/\d{4}', val) or re.match(r'\d{2}/\d{2}/\d{2}', val):
-                details['Exp Date'] = val
-                break
-    if details['Exp Date'] == "Not Found":
-        for line in ocr_result_lines:
-            m = re.search(r'(\d{2}/\d{2}/\d{4})', line)
-            if m:
-                details['Exp Date'] = m.group(1)
-                break
-
-    # Sex
-    for k in kv_pairs:
-        if 'SEX' in k:
-            val = kv_pairs[k].strip().upper()
-            if val in ['M', 'F']:
-                details['Sex'] = val
-                break
-    if details['Sex'] == "Not Found":
-        for line in ocr_result_lines:
-            m = re.search(r'SEX[:\s-]*([MF])', line, re.IGNORECASE)
-            if m:
-                details['Sex'] = m.group(1).upper()
-                break
-
-    # Name
+    details['Exp Date'] = extract_exp_date(ocr_result_lines, kv_pairs)
+    details['Sex'] = extract_sex(ocr_result_lines, kv_pairs)
     details['Name'] = extract_name(ocr_result_lines)
-
     return details, kv_pairs
 
-def extract_text_from_images(image_paths):
+# Both take the OCR lines and return (details, kv_pairs)
+PARSERS = {
+    'driving_easyocr': parse_driver_license_details,
+    'driving_test': driving_test.parse_driver_license_details,
+}
+
+def extract_text_from_images(image_paths, parser='driving_easyocr'):
     if not image_paths:
         print("No images selected for processing.")
         return {}
-    reader = easyocr.Reader(['en'])
+    # Imported here so callers that only parse OCR output do not load easyocr and torch
+    from inference_backend import create_reader
+    reader = create_reader(['en'], gpu=True)
     all_extracted_details = {}
     for image_path in image_paths:
         print(f"\nProcessing: {os.path.basename(image_path)}")
-        processed_img = preprocess_image(image_path)
+        img = cv2.imread(image_path)
+        processed_img, quality = check_and_preprocess(img, resize='fixed_width') if img is not None else (None, None)
         if processed_img is None:
-            all_extracted_details[os.path.basename(image_path)] = {"Error": "Image not processed."}
+            all_extracted_details[os.path.basename(image_path)] = rejected_or_error(quality)
             continue
         ocr_result = reader.readtext(processed_img, detail=0)
         print(f"Raw OCR Result for {os.path.basename(image_path)}:\n{ocr_result}")
-        details, kv_pairs = parse_driver_license_details(ocr_result)
+        details, kv_pairs = PARSERS[parser](ocr_result)
         print(f"Key-Value OCR Result for {os.path.basename(image_path)}:\n{kv_pairs}")
         print(f"Extracted Specific Details for {os.path.basename(image_path)}:")
         for key, value in details.items():
@@ -220,16 +123,13 @@ def extract_text_from_images(image_paths):
     return all_extracted_details
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    root.withdraw()
+    from cli import select_image_files
     print("Please select one or more image files (e.g., Driver's Licenses, Passports) to process for specific details.")
-    image_files = filedialog.askopenfilenames(
+    image_files = select_image_files(
         title="Select Image Files",
         filetypes=[("Image files", "*.jpg *.jpeg *.png *.bmp *.gif"), ("All files", "*.*")]
     )
     if not image_files:
         print("No images selected. Exiting.")
     else:
-        image_files_list = list(image_files)
-        extract_text_from_images(image_files_list)
-    root.destroy()
+        extract_text_from_images(image_files)
@@ -1,31 +1,78 @@
 import cv2
-import easyocr
 import numpy as np
 import os
-import tkinter as tk
-from tkinter import filedialog
 import re
 import difflib
 import json
+from functools import lru_cache, partial
+from resolution_policy import rescale_for_text
+from memory_budget import buffer_pool, default_budget, MemoryBudgetExceeded, LICENSE_BYTES_PER_PIXEL
+from quality_gate import gate, rejection
+from card_rectify import detect_and_rectify
+from orientation import auto_orient
+from pipeline_config import profile
+from tiled_preprocess import run_tiled, license_halo
 
-def preprocess_image(image_path):
+def preprocess_image(image_path, resize='text_height'):
     img = cv2.imread(image_path)
     if img is None:
         print(f"Error: Could not read image at {image_path}")
         return None
-    target_width = 800
+    # Rebinding drops the full-size decode as soon as the resized copy exists
+    img = RESIZE_STRATEGIES[resize](img)
+    return preprocess_resized_image(img)
+
+def resize_for_ocr(img, reader=None):
+    # Crop and flatten the card first so the text-height estimate and OCR only see the card
+    img, card_quad = detect_and_rectify(img, 'license')
+    # Turn it upright once here rather than retrying OCR at every rotation
+    img, orientation = auto_orient(img, 'license', reader)
+    # Fall back to the configured fixed width when no text height can be estimated
+    settings = profile('license')['resize']
+    resized_img, scale_factor = rescale_for_text(img, settings['char_height'], max_upscale=settings['max_upscale'],
+                                                 fallback_scale=settings['target_width'] / img.shape[1])
+    return resized_img
+
+def resize_to_width(img, reader=None):
+    # The original chain: a plain resize to the configured width, no rectification or orientation
+    target_width = profile('license')['resize']['target_width']
     scale_factor = target_width / img.shape[1]
-    width = target_width
-    height = int(img.shape[0] * scale_factor)
-    dim = (width, height)
-    resized_img = cv2.resize(img, dim, interpolation=cv2.INTER_AREA)
-    gray = cv2.cvtColor(resized_img, cv2.COLOR_BGR2GRAY)
-    denoised_gray = cv2.fastNlMeansDenoising(gray, None, h=25, templateWindowSize=7, searchWindowSize=21)
-    blurred = cv2.GaussianBlur(denoised_gray, (3, 3), 0)
-    thresholded = cv2.adaptiveThreshold(blurred, 255,
+    return cv2.resize(img, (target_width, int(img.shape[0] * scale_factor)), interpolation=cv2.INTER_AREA)
+
+# How a license photo is brought to OCR size; every strategy feeds the same denoise/threshold chain
+RESIZE_STRATEGIES = {
+    'text_height': resize_for_ocr,
+    'fixed_width': resize_to_width,
+}
+
+def preprocess_loaded_image(img, reader=None):
+    return preprocess_resized_image(resize_for_ocr(img, reader))
+
+def preprocess_resized_image(resized_img):
+    try:
+        default_budget().check(resized_img.shape, LICENSE_BYTES_PER_PIXEL)
+    except MemoryBudgetExceeded as e:
+        print(f"Error: {e}")
+        return None
+    gray = cv2.cvtColor(resized_img, cv2.COLOR_BGR2GRAY,
+                        dst=buffer_pool().get('gray', resized_img.shape[:2]))
+    # Large scans are split into overlapping tiles on threads; the output is bit-identical
+    settings = profile('license')
+    return run_tiled(partial(denoise_and_threshold, settings=settings), gray, license_halo(settings))
+
+def denoise_and_threshold(gray, settings=None):
+    settings = settings or profile('license')
+    denoise, blur, threshold = settings['denoise'], settings['blur'], settings['threshold']
+    # Intermediates live in this thread's reused scratch buffer; only the result is allocated
+    denoised_gray = buffer_pool().get('denoised', gray.shape)
+    cv2.fastNlMeansDenoising(gray, denoised_gray, h=denoise['h'],
+                             templateWindowSize=denoise['template_window'],
+                             searchWindowSize=denoise['search_window'])
+    cv2.GaussianBlur(denoised_gray, (blur['ksize'], blur['ksize']), 0, dst=denoised_gray)
+    thresholded = cv2.adaptiveThreshold(denoised_gray, 255,
                                         cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
                                         cv2.THRESH_BINARY,
-                                        blockSize=31, C=10)
+                                        blockSize=threshold['block_size'], C=threshold['C'])
     return thresholded
 
 def parse_key_value_lines(lines):
@@ -41,41 +88,53 @@ def parse_key_value_lines(lines):
                 break
     return kv_pairs
 
+US_STATES = [
+    "ALABAMA", "ALASKA", "ARIZONA", "ARKANSAS", "CALIFORNIA", "COLORADO", "CONNECTICUT",
+    "DELAWARE", "FLORIDA", "GEORGIA", "HAWAII", "IDAHO", "ILLINOIS", "INDIANA", "IOWA",
+    "KANSAS", "KENTUCKY", "LOUISIANA", "MAINE", "MARYLAND", "MASSACHUSETTS", "MICHIGAN",
+    "MINNESOTA", "MISSISSIPPI", "MISSOURI", "MONTANA", "NEBRASKA", "NEVADA", "NEW HAMPSHIRE",
+    "NEW JERSEY", "NEW MEXICO", "NEW YORK", "NORTH CAROLINA", "NORTH DAKOTA", "OHIO",
+    "OKLAHOMA", "OREGON", "PENNSYLVANIA", "RHODE ISLAND", "SOUTH CAROLINA", "SOUTH DAKOTA",
+    "TENNESSEE", "TEXAS", "UTAH", "VERMONT", "VIRGINIA", "WASHINGTON", "WEST VIRGINIA",
+    "WISCONSIN", "WYOMING"
+]
+STATE_ABBR = {
+    "AL": "ALABAMA", "AK": "ALASKA", "AZ": "ARIZONA", "AR": "ARKANSAS", "CA": "CALIFORNIA",
+    "CO": "COLORADO", "CT": "CONNECTICUT", "DE": "DELAWARE", "FL": "FLORIDA", "GA": "GEORGIA",
+    "HI": "HAWAII", "ID": "IDAHO", "IL": "ILLINOIS", "IN": "INDIANA", "IA": "IOWA",
+    "KS": "KANSAS", "KY": "KENTUCKY", "LA": "LOUISIANA", "ME": "MAINE", "MD": "MARYLAND",
+    "MA": "MASSACHUSETTS", "MI": "MICHIGAN", "MN": "MINNESOTA", "MS": "MISSISSIPPI",
+    "MO": "MISSOURI", "MT": "MONTANA", "NE": "NEBRASKA", "NV": "NEVADA", "NH": "NEW HAMPSHIRE",
+    "NJ": "NEW JERSEY", "NM": "NEW MEXICO", "NY": "NEW YORK", "NC": "NORTH CAROLINA",
+    "ND": "NORTH DAKOTA", "OH": "OHIO", "OK": "OKLAHOMA", "OR": "OREGON", "PA": "PENNSYLVANIA",
+    "RI": "RHODE ISLAND", "SC": "SOUTH CAROLINA", "SD": "SOUTH DAKOTA", "TN": "TENNESSEE",
+    "TX": "TEXAS", "UT": "UTAH", "VT": "VERMONT", "VA": "VIRGINIA", "WA": "WASHINGTON",
+    "WV": "WEST VIRGINIA", "WI": "WISCONSIN", "WY": "WYOMING"
+}
+
+STATE_ABBR_ORDER = {abbr: i for i, abbr in enumerate(STATE_ABBR)}
+STATE_ABBR_PATTERN = re.compile(r'\b(' + '|'.join(STATE_ABBR) + r')\b')
+
+# Replayed OCR output repeats the same lines, and the fuzzy match is the costly part
+@lru_cache(maxsize=4096)
+def _line_state(upper):
+    for state in US_STATES:
+        if state in upper:
+            return state.title()
+    # One compiled pass instead of a regex per abbreviation; the earliest entry in STATE_ABBR still wins
+    abbrs = STATE_ABBR_PATTERN.findall(upper)
+    if abbrs:
+        return STATE_ABBR[min(abbrs, key=STATE_ABBR_ORDER.get)].title()
+    matches = difflib.get_close_matches(upper, US_STATES, n=1, cutoff=0.8)
+    if matches:
+        return matches[0].title()
+    return None
+
 def detect_state(lines):
-    us_states = [
-        "ALABAMA", "ALASKA", "ARIZONA", "ARKANSAS", "CALIFORNIA", "COLORADO", "CONNECTICUT",
-        "DELAWARE", "FLORIDA", "GEORGIA", "HAWAII", "IDAHO", "ILLINOIS", "INDIANA", "IOWA",
-        "KANSAS", "KENTUCKY", "LOUISIANA", "MAINE", "MARYLAND", "MASSACHUSETTS", "MICHIGAN",
-        "MINNESOTA", "MISSISSIPPI", "MISSOURI", "MONTANA", "NEBRASKA", "NEVADA", "NEW HAMPSHIRE",
-        "NEW JERSEY", "NEW MEXICO", "NEW YORK", "NORTH CAROLINA", "NORTH DAKOTA", "OHIO",
-        "OKLAHOMA", "OREGON", "PENNSYLVANIA", "RHODE ISLAND", "SOUTH CAROLINA", "SOUTH DAKOTA",
-        "TENNESSEE", "TEXAS", "UTAH", "VERMONT", "VIRGINIA", "WASHINGTON", "WEST VIRGINIA",
-        "WISCONSIN", "WYOMING"
-    ]
-    state_abbr = {
-        "AL": "ALABAMA", "AK": "ALASKA", "AZ": "ARIZONA", "AR": "ARKANSAS", "CA": "CALIFORNIA",
-        "CO": "COLORADO", "CT": "CONNECTICUT", "DE": "DELAWARE", "FL": "FLORIDA", "GA": "GEORGIA",
-        "HI": "HAWAII", "ID": "IDAHO", "IL": "ILLINOIS", "IN": "INDIANA", "IA": "IOWA",
-        "KS": "KANSAS", "KY": "KENTUCKY", "LA": "LOUISIANA", "ME": "MAINE", "MD": "MARYLAND",
-        "MA": "MASSACHUSETTS", "MI": "MICHIGAN", "MN": "MINNESOTA", "MS": "MISSISSIPPI",
-        "MO": "MISSOURI", "MT": "MONTANA", "NE": "NEBRASKA", "NV": "NEVADA", "NH": "NEW HAMPSHIRE",
-        "NJ": "NEW JERSEY", "NM": "NEW MEXICO", "NY": "NEW YORK", "NC": "NORTH CAROLINA",
-        "ND": "NORTH DAKOTA", "OH": "OHIO", "OK": "OKLAHOMA", "OR": "OREGON", "PA": "PENNSYLVANIA",
-        "RI": "RHODE ISLAND", "SC": "SOUTH CAROLINA", "SD": "SOUTH DAKOTA", "TN": "TENNESSEE",
-        "TX": "TEXAS", "UT": "UTAH", "VT": "VERMONT", "VA": "VIRGINIA", "WA": "WASHINGTON",
-        "WV": "WEST VIRGINIA", "WI": "WISCONSIN", "WY": "WYOMING"
-    }
     for line in lines:
-        upper = line.upper()
-        for state in us_states:
-            if state in upper:
-                return state.title()
-        for abbr, state in state_abbr.items():
-            if re.search(r'\b{}\b'.format(abbr), upper):
-                return state.title()
-        matches = difflib.get_close_matches(upper, us_states, n=1, cutoff=0.8)
-        if matches:
-            return matches[0].title()
+        state = _line_state(line.upper())
+        if state:
+            return state
     return "Not Found"
 
 def extract_pa_dl_number(lines, kv_pairs):
@@ -100,177 +159,386 @@ def extract_pa_dl_number(lines, kv_pairs):
             return digits
     return "Not Found"
 
-def extract_general_dl_number(lines, kv_pairs):
-    for k in kv_pairs:
-        if any(label in k for label in ['DLN', 'DL', 'LIC', 'ID']):
-            value = kv_pairs[k]
-            cleaned = re.sub(r'[^A-Z0-9]', '', value)
-            if 6 <= len(cleaned) <= 20 and not cleaned.isalpha():
-                return cleaned
-    for line in lines:
-        match = re.search(r'\bWDL[A-Z0-9]{9}\b', line)
-        if match:
-            return match.group(0)
-    for line in lines:
-        guess = ''.join(re.findall(r'[A-Z0-9]', line))
-        if 6 <= len(guess) <= 20 and not guess.isalpha():
-            return guess
-    return "Not Found"
+NAME_LABELS = [
+    "DRIVER", "LICENSE", "DLN", "ID", "SEX", "DOB", "CLASS", "RESTR", "EYES",
+    "HEIGHT", "CITY", "ZIP", "BIRTH", "EXP", "ADDR", "ORGANDONOR", "VISITPA", "DD",
+    "END", "SAMPLE", "ENHANCED"
+]
 
-def extract_name(lines):
-    LABELS = [
-        "DRIVER", "LICENSE", "DLN", "ID", "SEX", "DOB", "CLASS", "RESTR", "EYES",
-        "HEIGHT", "CITY", "ZIP", "BIRTH", "EXP", "ADDR", "ORGANDONOR", "VISITPA", "DD",
-        "END", "SAMPLE", "ENHANCED"
-    ]
-    for i, line in enumerate(lines):
-        upper = line.upper()
-        if any(label in upper for label in LABELS):
-            # Check next 2 lines for likely name
-            for offset in [1, 2]:
-                if i + offset < len(lines):
-                    next_line = lines[i + offset]
-                    words = [w for w in next_line.split() if w.isalpha() and len(w) > 1]
-                    if len(words) >= 2:
-                        return " ".join(word.title() for word in words)
-        # Heuristic: line with two words, both capitalized, not a label
-        words = [w for w in line.split() if w.isalpha() and len(w) > 1]
-        if len(words) >= 2 and not any(label in upper for label in LABELS):
-            return " ".join(word.title() for word in words)
-    # Fallback: first single word not a label
-    for line in lines:
+KV_SEPARATORS = [':', ';', '-', '=']
+NON_DIGIT = re.compile(r'\D')
+NON_ALNUM = re.compile(r'[^A-Z0-9]')
+ALNUM = re.compile(r'[A-Z0-9]')
+PA_DL_SPACED = re.compile(r'(\d{2}\s\d{3}\s\d{3})')
+WDL_NUMBER = re.compile(r'\bWDL[A-Z0-9]{9}\b')
+FULL_DATE = re.compile(r'(\d{2}[/-]\d{2}[/-]\d{4})')
+SHORT_DATE = re.compile(r'(\d{2}[/-]\d{4})')
+SEX_VALUE = re.compile(r'SEX[:\s-]*([MF])', re.IGNORECASE)
+NAME_LABEL_PATTERN = re.compile('|'.join(re.escape(label) for label in NAME_LABELS))
+
+def _line_date(line):
+    m = FULL_DATE.search(line)
+    if m:
+        return m.group(1)
+    m = SHORT_DATE.search(line)
+    return m.group(1) if m else None
+
+def parse_driver_license_details(ocr_result_lines, line_confs=None):
+    # Single pass over the OCR lines: each line is classified once and the
+    # first candidate for every precedence tier of the per-field extract_* rules
+    # (kept in driving_easyocr) is recorded, then the tiers are resolved in the
+    # same order those rules use. With line_confs (one recognizer confidence per
+    # line) every line is classified and, within a tier, a more confident line's
+    # candidate replaces an earlier one; tiers still take precedence over confidence.
+    compete = line_confs is not None
+    confs = line_confs if compete else [0.0] * len(ocr_result_lines)
+    kv_pairs, kv_confs = {}, {}
+    # tier -> (value, conf) of the line it was read from
+    best = {}
+    exp_pending = sex_pending = False
+    labeled_prev = labeled_prev2 = False
+
+    def offer(tier, value, conf):
+        if value and (tier not in best or conf > best[tier][1]):
+            best[tier] = (value, conf)
+
+    def found(tier):
+        return best[tier][0] if tier in best else None
+
+    for line, conf in zip(ocr_result_lines, confs):
         upper = line.upper()
-        if not any(label in upper for label in LABELS):
-            words = [w for w in line.split() if w.isalpha() and len(w) > 1]
-            if len(words) == 1:
-                return words[0].title()
-    return "Not Found"
+        stripped_upper = line.strip().upper()
 
-def extract_exp_date(lines, kv_pairs):
-    # Try key-value pairs first
-    for k in kv_pairs:
-        if 'EXP' in k:
-            val = kv_pairs[k]
-            m = re.search(r'\d{2}[/-]\d{2}[/-]\d{4}', val)
+        for sep in KV_SEPARATORS:
+            if sep in line:
+                key, value = line.split(sep, 1)
+                key, value = key.strip().upper(), value.strip()
+                # A repeated key keeps the later value unless the earlier line was more confident
+                if key and value and (key not in kv_confs or conf >= kv_confs[key]):
+                    kv_pairs[key], kv_confs[key] = value, conf
+                break
+
+        if compete or 'state' not in best:
+            offer('state', _line_state(upper), conf)
+
+        # Each tier stops being evaluated once it (or a higher tier) has a candidate,
+        # and once the state is known only that state's DL number rules run; competing
+        # candidates keep every rule running since the state may still change
+        state = found('state')
+        check_pa = compete or state is None or state == "Pennsylvania"
+        check_general = compete or state != "Pennsylvania"
+        if check_pa and (compete or 'pa_line' not in best):
+            digits = NON_DIGIT.sub('', line)
+            if 'DLN' in upper and len(digits) == 8:
+                offer('pa_line', digits, conf)
+            elif ' ' in line:
+                m = PA_DL_SPACED.search(line)
+                if m:
+                    offer('pa_line', NON_DIGIT.sub('', m.group(1)), conf)
+            if len(digits) == 8:
+                offer('pa_any', digits, conf)
+        if check_general and (compete or 'wdl' not in best) and 'WDL' in line:
+            m = WDL_NUMBER.search(line)
             if m:
-                return m.group(0)
-    # Search all lines for date pattern, prefer after "EXP"
-    for idx, line in enumerate(lines):
-        if "EXP" in line.upper():
-            # Check this and next line for a date
-            for offset in [0, 1]:
-                if idx + offset < len(lines):
-                    m = re.search(r'(\d{2}[/-]\d{2}[/-]\d{4})', lines[idx + offset])
-                    if m:
-                        return m.group(1)
-                    m2 = re.search(r'(\d{2}[/-]\d{4})', lines[idx + offset])
-                    if m2:
-                        return m2.group(1)
-    # Fallback: any date pattern in all lines
-    for line in lines:
-        m = re.search(r'(\d{2}[/-]\d{2}[/-]\d{4})', line)
-        if m:
-            return m.group(1)
-        m2 = re.search(r'(\d{2}[/-]\d{4})', line)
-        if m2:
-            return m2.group(1)
-    return "Not Found"
+                offer('wdl', m.group(0), conf)
+        if check_general and (compete or ('wdl' not in best and 'guess' not in best)):
+            guess = ''.join(ALNUM.findall(line))
+            if 6 <= len(guess) <= 20 and not guess.isalpha():
+                offer('guess', guess, conf)
 
-def extract_sex(lines, kv_pairs):
-    for k in kv_pairs:
-        if 'SEX' in k:
-            val = kv_pairs[k].strip().upper()
-            if val in ['M', 'F']:
-                return val
-    for idx, line in enumerate(lines):
-        m = re.search(r'SEX[:\s-]*([MF])', line, re.IGNORECASE)
-        if m:
-            return m.group(1).upper()
-        if 'SEX' in line.upper() and idx + 1 < len(lines):
-            next_val = lines[idx + 1].strip().upper()
-            if next_val in ['M', 'F']:
-                return next_val
-    # Fallback: isolated M/F
-    for line in lines:
-        if line.strip().upper() in ['M', 'F']:
-            return line.strip().upper()
-    return "Not Found"
+        # A date on an EXP line, or on the line right after one
+        if compete or 'exp_label' not in best:
+            line_date = _line_date(line) if ('/' in line or '-' in line) else None
+            if exp_pending or 'EXP' in upper:
+                offer('exp_label', line_date, conf)
+            exp_pending = 'EXP' in upper
+            offer('exp_any', line_date, conf)
+
+        # "SEX: M" on one line, or a bare M/F on the line after a SEX label
+        if compete or 'sex_label' not in best:
+            if sex_pending and stripped_upper in ['M', 'F']:
+                offer('sex_label', stripped_upper, conf)
+            elif 'SEX' in upper:
+                m = SEX_VALUE.search(line)
+                if m:
+                    offer('sex_label', m.group(1).upper(), conf)
+            sex_pending = 'SEX' in upper
+            if stripped_upper in ['M', 'F']:
+                offer('sex_isolated', stripped_upper, conf)
+
+        # A two-word line that is not a label itself or follows within two lines of one
+        if compete or 'name' not in best:
+            labeled = NAME_LABEL_PATTERN.search(upper) is not None
+            words = [w for w in line.split() if w.isalpha() and len(w) > 1]
+            if len(words) >= 2 and (not labeled or labeled_prev or labeled_prev2):
+                offer('name', " ".join(word.title() for word in words), conf)
+            if not labeled and len(words) == 1:
+                offer('name_single', words[0].title(), conf)
+            labeled_prev2, labeled_prev = labeled_prev, labeled
+
+    def labeled_value(labels, pick):
+        # The most confident matching key; without confidences, the first one
+        value, value_conf = None, None
+        for k in kv_pairs:
+            if any(label in k for label in labels):
+                candidate = pick(kv_pairs[k])
+                if candidate and (value is None or kv_confs[k] > value_conf):
+                    value, value_conf = candidate, kv_confs[k]
+        return value
+
+    def pa_digits(value):
+        digits = NON_DIGIT.sub('', value)
+        return digits if len(digits) == 8 else None
+
+    def general_number(value):
+        cleaned = NON_ALNUM.sub('', value)
+        return cleaned if 6 <= len(cleaned) <= 20 and not cleaned.isalpha() else None
+
+    def exp_value(value):
+        m = FULL_DATE.search(value)
+        return m.group(0) if m else None
+
+    def sex_value(value):
+        value = value.strip().upper()
+        return value if value in ['M', 'F'] else None
 
-def parse_driver_license_details(ocr_result_lines):
+    state = found('state')
     details = {
         "DL No": "Not Found",
         "Exp Date": "Not Found",
         "Sex": "Not Found",
         "Name": "Not Found",
-        "State": "Not Found"
+        "State": state or "Not Found"
     }
-    kv_pairs = parse_key_value_lines(ocr_result_lines)
-    details['State'] = detect_state(ocr_result_lines)
 
     if details['State'] == "Pennsylvania":
-        details['DL No'] = extract_pa_dl_number(ocr_result_lines, kv_pairs)
+        dl_no = labeled_value(['DLN', 'DL'], pa_digits) or found('pa_line') or found('pa_any')
     else:
-        details['DL No'] = extract_general_dl_number(ocr_result_lines, kv_pairs)
-
-    details['Exp Date'] = extract_exp_date(ocr_result_lines, kv_pairs)
-    details['Sex'] = extract_sex(ocr_result_lines, kv_pairs)
-    details['Name'] = extract_name(ocr_result_lines)
+        dl_no = labeled_value(['DLN', 'DL', 'LIC', 'ID'], general_number) or found('wdl') or found('guess')
+    details['DL No'] = dl_no or "Not Found"
+    details['Exp Date'] = (labeled_value(['EXP'], exp_value) or found('exp_label') or found('exp_any')
+                           or "Not Found")
+    details['Sex'] = labeled_value(['SEX'], sex_value) or found('sex_label') or found('sex_isolated') or "Not Found"
+    details['Name'] = found('name') or found('name_single') or "Not Found"
 
     return details, kv_pairs
 
+# Recognized lines below this confidence are dropped as noise before parsing
+MIN_LINE_CONF = 0.3
+
+def reading_order(ocr_results):
+    """Sort (bbox, text, conf) results into rows top-to-bottom, each row left-to-right."""
+    boxes = []
+    for bbox, text, conf in ocr_results:
+        ys = [p[1] for p in bbox]
+        boxes.append(((min(ys) + max(ys)) / 2.0, max(ys) - min(ys), min(p[0] for p in bbox), (bbox, text, conf)))
+    if not boxes:
+        return []
+    boxes.sort(key=lambda b: b[0])
+    heights = sorted(b[1] for b in boxes)
+    row_gap = max(heights[len(heights) // 2], 1) / 2.0
+    rows, row, row_center = [], [], None
+    for center, height, x, item in boxes:
+        if row and center - row_center > row_gap:
+            rows.append(row)
+            row = []
+        if not row:
+            row_center = center
+        row.append((x, item))
+    rows.append(row)
+    return [item for row in rows for x, item in sorted(row, key=lambda r: r[0])]
+
+def _normalize(text):
+    return NON_ALNUM.sub('', text.upper())
+
+def field_lines(value, ocr_results):
+    """Recognized (bbox, text, conf) lines that contain value."""
+    target = _normalize(value)
+    if not target:
+        return []
+    if len(target) <= 2:
+        # Short values such as "M" must stand alone, not sit inside another word
+        token = re.compile(r'(?<![A-Z0-9]){}(?![A-Z0-9])'.format(re.escape(target)))
+        return [r for r in ocr_results if token.search(r[1].upper())]
+    return [r for r in ocr_results if target in _normalize(r[1])]
+
+def field_confidence(value, ocr_results):
+    """Best confidence of a recognized line containing value, or None if it cannot be located."""
+    confs = [conf for (bbox, text, conf) in field_lines(value, ocr_results)]
+    return max(confs) if confs else None
+
+def _state_confidence(state, ocr_results):
+    conf = field_confidence(state, ocr_results)
+    if conf is not None:
+        return conf
+    # The state may have been recognized from its abbreviation only
+    abbrs = [abbr for abbr, name in STATE_ABBR.items() if name == state.upper()]
+    confs = [conf for (bbox, text, conf) in ocr_results
+             if any(abbr in STATE_ABBR_PATTERN.findall(text.upper()) for abbr in abbrs)]
+    return max(confs) if confs else None
+
+def parse_driver_license_results(ocr_results, min_conf=MIN_LINE_CONF):
+    """Confidence-aware variant of parse_driver_license_details for readtext(detail=1) output.
+
+    Lines are put in reading order, so a label box is directly followed by the
+    value box to its right or below it, and low-confidence noise is dropped
+    before the fallback scans can pick it up. Returns (details, kv_pairs,
+    confidences) where confidences maps each field to the confidence of the
+    line it was read from (0.0 if not found).
+    """
+    ordered = [r for r in reading_order(ocr_results) if r[2] >= min_conf]
+    details, kv_pairs = parse_driver_license_details([text for (bbox, text, conf) in ordered],
+                                                     [conf for (bbox, text, conf) in ordered])
+    confidences = {}
+    for field, value in details.items():
+        if value == "Not Found":
+            confidences[field] = 0.0
+            continue
+        if field == "State":
+            conf = _state_confidence(value, ordered)
+        else:
+            conf = field_confidence(value, ordered)
+        confidences[field] = round(float(conf), 4) if conf is not None else 0.0
+    return details, kv_pairs, confidences
+
 def save_json_output(output_folder, filename, data):
     os.makedirs(output_folder, exist_ok=True)
     json_path = os.path.join(output_folder, filename)
     with open(json_path, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=4, ensure_ascii=False)
 
+def preprocess_card(card):
+    """Threshold the resized card: the fixed chain, or with preprocess.planner set the planner's best-ranked variant."""
+    if profile('license')['preprocess']['planner']:
+        from preprocess_planner import default_planner
+        return default_planner().preprocess(card, 'license')
+    return preprocess_resized_image(card)
+
+def check_and_prepare(img, reader=None, resize='text_height'):
+    """Run the quality gate before the expensive stages; returns (card, processed_img, report).
+
+    The one entry to license preprocessing for every pipeline. card is the
+    resized card before thresholding, in the same coordinates as
+    processed_img; both are None when the image is rejected or over the
+    memory budget. reader, when given, settles upright vs upside down by
+    recognizer confidence.
+    """
+    def prepare(image):
+        card = RESIZE_STRATEGIES[resize](image, reader)
+        return card, preprocess_card(card)
+    prepared, report = gate(img, 'license', prepare)
+    card, processed_img = prepared if prepared is not None else (None, None)
+    return card, processed_img, report
+
+def check_and_preprocess(img, reader=None, resize='text_height'):
+    """check_and_prepare for callers that only need the thresholded image; returns (processed_img or None, report)."""
+    card, processed_img, report = check_and_prepare(img, reader, resize)
+    return processed_img, report
+
+def recognize_license(reader, processed_img, card=None):
+    """readtext(detail=1) results for a preprocessed license.
+
+    The profile's recognition flags select the extra steps: early_exit
+    recognizes regions in reading order only until the key fields are read
+    confidently; field_retry re-reads weak fields from crops of card, so it
+    only applies when the caller passes the unthresholded card.
+    """
+    settings = profile('license')['recognition']
+    if settings['early_exit']:
+        from incremental_extraction import recognize_until_complete, license_fields_complete
+        ocr_results, recognized, total = recognize_until_complete(reader, processed_img, license_fields_complete)
+    else:
+        ocr_results = reader.readtext(processed_img, detail=1)
+    # A planner variant may rescale, and the retry crops must match the OCR coordinates
+    if settings['field_retry'] and card is not None and card.shape[:2] == processed_img.shape[:2]:
+        from field_retry import retry_license_fields
+        details, kv_pairs, confidences, ocr_results, retries = retry_license_fields(reader, card, ocr_results)
+    return ocr_results
+
+def process_license_image(reader, image_name, processed_img, output_folder, all_extracted_details,
+                          quality=None, card=None):
+    json_filename = os.path.splitext(image_name)[0] + ".json"
+    if processed_img is None:
+        if quality is not None and not quality["passed"]:
+            all_extracted_details[image_name] = rejection(quality)
+            save_json_output(output_folder, json_filename, all_extracted_details[image_name])
+        else:
+            all_extracted_details[image_name] = {"Error": "Image not processed."}
+        return
+    ocr_results = recognize_license(reader, processed_img, card)
+    ocr_result = [text for (bbox, text, conf) in reading_order(ocr_results)]
+    print(f"Raw OCR Result for {image_name}:\n{ocr_result}")
+    details, kv_pairs, confidences = parse_driver_license_results(ocr_results)
+    print(f"Extracted Specific Details for {image_name}:")
+    for key, value in details.items():
+        print(f"  {key}: {value} (confidence {confidences[key]:.2f})")
+
+    # Save JSON output
+    output = {
+        "extracted_details": details,
+        "field_confidence": confidences
+    }
+    if quality is not None:
+        output["quality"] = quality
+    save_json_output(output_folder, json_filename, output)
+
+    all_extracted_details[image_name] = details
+
+    # Print JSON output for quick view
+    print("JSON output:")
+    print(json.dumps({
+        "raw_ocr": ocr_result,
+        "extracted_details": details,
+        "field_confidence": confidences
+    }, indent=4, ensure_ascii=False))
+
 def extract_text_from_images(image_paths):
     if not image_paths:
         print("No images selected for processing.")
         return {}
-    reader = easyocr.Reader(['en'])
+    # Imported here so callers that only parse OCR output do not load easyocr and torch
+    from inference_backend import create_reader
+    reader = create_reader(['en'], gpu=True)
     all_extracted_details = {}
     output_folder = "output"
     for image_path in image_paths:
         print(f"\nProcessing: {os.path.basename(image_path)}")
-        processed_img = preprocess_image(image_path)
-        if processed_img is None:
-            all_extracted_details[os.path.basename(image_path)] = {"Error": "Image not processed."}
-            continue
-        ocr_result = reader.readtext(processed_img, detail=0)
-        print(f"Raw OCR Result for {os.path.basename(image_path)}:\n{ocr_result}")
-        details, kv_pairs = parse_driver_license_details(ocr_result)
-        print(f"Extracted Specific Details for {os.path.basename(image_path)}:")
-        for key, value in details.items():
-            print(f"  {key}: {value}")
-
-        # Save JSON output
-        json_filename = os.path.splitext(os.path.basename(image_path))[0] + ".json"
-        save_json_output(output_folder, json_filename, {
-            "extracted_details": details
-        })
-
-        all_extracted_details[os.path.basename(image_path)] = details
-
-        # Print JSON output for quick view
-        print("JSON output:")
-        print(json.dumps({
-            "raw_ocr": ocr_result,
-            "extracted_details": details
-        }, indent=4, ensure_ascii=False))
+        img = cv2.imread(image_path)
+        if img is None:
+            print(f"Error: Could not read image at {image_path}")
+            card, processed_img, quality = None, None, None
+        else:
+            card, processed_img, quality = check_and_prepare(img, reader)
+            del img
+        process_license_image(reader, os.path.basename(image_path), processed_img,
+                              output_folder, all_extracted_details, quality, card)
+    return all_extracted_details
+
+def extract_text_from_loaded_images(named_images):
+    # named_images yields (name, decoded image) pairs, e.g. from archive_ingest
+    from inference_backend import create_reader
+    reader = create_reader(['en'], gpu=True)
+    all_extracted_details = {}
+    output_folder = "output"
+    for image_name, img in named_images:
+        print(f"\nProcessing: {image_name}")
+        if img is None:
+            print(f"Error: Could not decode image {image_name}")
+            card, processed_img, quality = None, None, None
+        else:
+            card, processed_img, quality = check_and_prepare(img, reader)
+        process_license_image(reader, image_name, processed_img, output_folder, all_extracted_details,
+                              quality, card)
     return all_extracted_details
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    root.withdraw()
+    from cli import select_image_files
     print("Please select one or more image files (e.g., Driver's Licenses, Passports) to process for specific details.")
-    image_files = filedialog.askopenfilenames(
+    image_files = select_image_files(
         title="Select Image Files",
         filetypes=[("Image files", "*.jpg *.jpeg *.png *.bmp *.gif"), ("All files", "*.*")]
     )
     if not image_files:
         print("No images selected. Exiting.")
     else:
-        image_files_list = list(image_files)
-        extract_text_from_images(image_files_list)
-    root.destroy()
+        extract_text_from_images(image_files)
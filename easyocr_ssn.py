@@ -1,24 +1,84 @@
 import cv2
 import numpy as np
-import easyocr
-from tkinter import Tk, filedialog
 import re
-from matplotlib import pyplot as plt
+import os
+import json
+import time
+from functools import partial
+from card_rectify import detect_and_rectify
+from orientation import auto_orient
+from pipeline_config import profile
+from quality_gate import gate
+from tiled_preprocess import run_tiled, ssn_halo
+
+def preprocess_card(card):
+    """Threshold the upright card: the fixed chain, or with preprocess.planner set the planner's best-ranked variant."""
+    if profile('ssn')['preprocess']['planner']:
+        from preprocess_planner import default_planner
+        return default_planner().preprocess(card, 'ssn')
+    return preprocess_image(card)
+
+def check_and_prepare(img, reader=None):
+    """Quality-gate an SSN card, then rectify, orient and preprocess it; returns (card, processed_img, report).
+
+    card is the upright card before thresholding, in the same coordinates as
+    processed_img; both are None when the image is rejected.
+    """
+    def prepare(image):
+        card, card_quad = detect_and_rectify(image)
+        card, orientation = auto_orient(card, reader=reader)
+        return card, preprocess_card(card)
+    prepared, report = gate(img, 'ssn', prepare)
+    card, processed_img = prepared if prepared is not None else (None, None)
+    return card, processed_img, report
+
+def check_and_preprocess(img, reader=None):
+    """check_and_prepare without the card; returns (processed_img or None, report)."""
+    card, processed_img, report = check_and_prepare(img, reader)
+    return processed_img, report
 
 def preprocess_image(img):
     gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    denoised = cv2.fastNlMeansDenoising(gray, None, h=30, templateWindowSize=7, searchWindowSize=21)
+    # Large scans are split into overlapping tiles on threads; the output is bit-identical
+    settings = profile('ssn')
+    return run_tiled(partial(denoise_sharpen_threshold, settings=settings), gray, ssn_halo(settings))
+
+def recognize_ssn(reader, processed_img, card=None):
+    """readtext results for a preprocessed SSN card.
+
+    recognition.early_exit stops once the fields are read; recognition.field_retry
+    re-reads weak fields from crops of card, when the caller passes it.
+    """
+    settings = profile('ssn')['recognition']
+    if settings['early_exit']:
+        from incremental_extraction import recognize_until_complete, ssn_fields_complete
+        result, recognized, total = recognize_until_complete(reader, processed_img, ssn_fields_complete)
+    else:
+        result = reader.readtext(processed_img)
+    # A planner variant may rescale, and the retry crops must match the OCR coordinates
+    if settings['field_retry'] and card is not None and card.shape[:2] == processed_img.shape[:2]:
+        from field_retry import retry_ssn_fields
+        ssn, name, signature, result, retries = retry_ssn_fields(reader, card, result)
+    return result
+
+def denoise_sharpen_threshold(gray, settings=None):
+    settings = settings or profile('ssn')
+    denoise, threshold = settings['denoise'], settings['threshold']
+    denoised = cv2.fastNlMeansDenoising(gray, None, h=denoise['h'],
+                                        templateWindowSize=denoise['template_window'],
+                                        searchWindowSize=denoise['search_window'])
     kernel_sharpen = np.array([[0, -1, 0],
                                [-1, 5, -1],
                                [0, -1, 0]])
     sharpened = cv2.filter2D(denoised, -1, kernel_sharpen)
     thresh = cv2.adaptiveThreshold(sharpened, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                                   cv2.THRESH_BINARY, 31, 10)
+                                   cv2.THRESH_BINARY, threshold['block_size'], threshold['C'])
     return thresh
 
 import re
 
 def extract_fields_easyocr(result):
+    name_min_conf = profile('ssn')['fields']['name_min_conf']
     # Sort lines by vertical position (top to bottom)
     lines = sorted(result, key=lambda x: x[0][0][1])
     texts = [text.strip() for (bbox, text, conf) in lines]
@@ -40,7 +100,7 @@ def extract_fields_easyocr(result):
     for i in range(len(texts) - 1):
         if (texts[i].isalpha() and texts[i].isupper() and
             texts[i+1].isalpha() and texts[i+1].isupper() and
-            confs[i] > 0.7 and confs[i+1] > 0.7):
+            confs[i] > name_min_conf and confs[i+1] > name_min_conf):
             name = texts[i] + " " + texts[i+1]
             name_idx = i+1
             break
@@ -55,69 +115,68 @@ def extract_fields_easyocr(result):
     return ssn, name, signature
 
 
-# --- Manual file selection dialog ---
-root = Tk()
-root.withdraw()
-image_path = filedialog.askopenfilename(
-    title="Select SSN Image",
-    filetypes=[("Image Files", "*.png;*.jpg;*.jpeg;*.webp;*.tiff")]
-)
-if not image_path:
-    print("No file selected.")
-    exit()
+def main():
+    from cli import select_image_file, show_image
+    from inference_backend import create_reader
 
-img = cv2.imread(image_path)
-if img is None:
-    print("Could not open image! Check the file path and format.")
-    exit()
+    # --- Manual file selection dialog ---
+    image_path = select_image_file(
+        title="Select SSN Image",
+        filetypes=[("Image Files", "*.png;*.jpg;*.jpeg;*.webp;*.tiff")]
+    )
+    if not image_path:
+        print("No file selected.")
+        return
 
-proc_img = preprocess_image(img)
+    img = cv2.imread(image_path)
+    if img is None:
+        print("Could not open image! Check the file path and format.")
+        return
 
-reader = easyocr.Reader(['en'], gpu=False)
-result = reader.readtext(proc_img)
+    reader = create_reader(['en'])
 
-print("----- EasyOCR Raw Output -----")
-for bbox, text, conf in result:
-    print(f"Text: '{text}' | Confidence: {conf:.2f}")
-print("------------------------------")
+    card, proc_img, quality = check_and_prepare(img, reader)
+    if proc_img is None:
+        return
 
-ssn, name, signature = extract_fields_easyocr(result)
+    result = recognize_ssn(reader, proc_img, card)
 
-print("----- Extracted Fields -----")
-print(f"SSN Number: {ssn}")
-print(f"Printed Name: {name}")
-print(f"Signature: {signature}")
+    print("----- EasyOCR Raw Output -----")
+    for bbox, text, conf in result:
+        print(f"Text: '{text}' | Confidence: {conf:.2f}")
+    print("------------------------------")
 
-import os
-import json
-import time
+    ssn, name, signature = extract_fields_easyocr(result)
 
-# Prepare output data
-output_data = {
-    "SSN_Number": ssn,
-    "Printed_Name": name,
-    "Signature": signature
-}
+    print("----- Extracted Fields -----")
+    print(f"SSN Number: {ssn}")
+    print(f"Printed Name: {name}")
+    print(f"Signature: {signature}")
 
-# Create output folder if it doesn't exist
-output_folder = "ssn_output"
-os.makedirs(output_folder, exist_ok=True)
+    # Prepare output data
+    output_data = {
+        "SSN_Number": ssn,
+        "Printed_Name": name,
+        "Signature": signature
+    }
 
-# Use image filename and timestamp for uniqueness
-base_name = os.path.splitext(os.path.basename(image_path))[0]
-json_filename = f"{base_name}_{int(time.time())}.json"
-json_path = os.path.join(output_folder, json_filename)
+    # Create output folder if it doesn't exist
+    output_folder = "ssn_output"
+    os.makedirs(output_folder, exist_ok=True)
 
-# Save as JSON
-with open(json_path, "w") as f:
-    json.dump(output_data, f, indent=4)
+    # Use image filename and timestamp for uniqueness
+    base_name = os.path.splitext(os.path.basename(image_path))[0]
+    json_filename = f"{base_name}_{int(time.time())}.json"
+    json_path = os.path.join(output_folder, json_filename)
 
-print(f"\nJSON output saved to: {json_path}")
+    # Save as JSON
+    with open(json_path, "w") as f:
+        json.dump(output_data, f, indent=4)
 
+    print(f"\nJSON output saved to: {json_path}")
 
+    # Optional: Show the preprocessed image
+    show_image(proc_img, 'Preprocessed for OCR')
 
-# Optional: Show the preprocessed image
-plt.imshow(proc_img, cmap='gray')
-plt.title('Preprocessed for OCR')
-plt.axis('off')
-plt.show()
+if __name__ == "__main__":
+    main()
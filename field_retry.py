@@ -0,0 +1,253 @@
+import cv2
+
+from driving_test import check_and_prepare, parse_driver_license_results, field_lines, MIN_LINE_CONF
+from easyocr_ssn import check_and_prepare as check_and_prepare_ssn, extract_fields_easyocr
+from incremental_extraction import SSN_PATTERN, DL_NO_PATTERN, EXP_DATE_PATTERN
+from pipeline_config import profile
+from recognition_only import recognize_boxes
+
+# Fields read below this confidence (or not at all) are re-recognized from a crop
+RETRY_MIN_CONF = 0.5
+# Recognizer calls allowed per image across all fields and variants
+MAX_RETRY_ATTEMPTS = 6
+RETRY_VARIANTS = ("gray", "clahe", "upscale")
+CROP_PAD = 6
+UPSCALE_FACTOR = 2.0
+
+# Labels that sit next to a license value when the value itself was not read
+LICENSE_VALUE_LABELS = {
+    'DL No': ('DLN', 'DL', 'LIC'),
+    'Exp Date': ('EXP',),
+    'Sex': ('SEX',),
+}
+
+
+def _gray(crop):
+    return cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+
+
+def _clahe(crop):
+    return cv2.createCLAHE(clipLimit=2.0, tileGridSize=(4, 4)).apply(_gray(crop))
+
+
+def _upscale(crop):
+    return cv2.resize(_clahe(crop), None, fx=UPSCALE_FACTOR, fy=UPSCALE_FACTOR,
+                      interpolation=cv2.INTER_CUBIC)
+
+
+VARIANT_FUNCS = {
+    "gray": (_gray, 1.0),
+    "clahe": (_clahe, 1.0),
+    "upscale": (_upscale, UPSCALE_FACTOR),
+}
+
+
+def _bounds(bboxes):
+    xs = [p[0] for bbox in bboxes for p in bbox]
+    ys = [p[1] for bbox in bboxes for p in bbox]
+    return [min(xs), max(xs), min(ys), max(ys)]
+
+
+def _center_inside(bbox, region):
+    x_min, x_max, y_min, y_max = region
+    cx = sum(p[0] for p in bbox) / len(bbox)
+    cy = sum(p[1] for p in bbox) / len(bbox)
+    return x_min <= cx <= x_max and y_min <= cy <= y_max
+
+
+def _crop(image, region, pad=CROP_PAD):
+    h, w = image.shape[:2]
+    x_min, x_max, y_min, y_max = region
+    x0, x1 = max(0, int(x_min) - pad), min(w, int(x_max) + pad)
+    y0, y1 = max(0, int(y_min) - pad), min(h, int(y_max) + pad)
+    return image[y0:y1, x0:x1], x0, y0
+
+
+def reocr_region(reader, image, region, variant, single_line=True):
+    """Re-recognize one [x_min, x_max, y_min, y_max] region of image with a preprocessing variant.
+
+    A region known to hold a single line goes straight to the recognizer;
+    otherwise the detector runs on the crop only. Returned boxes are mapped
+    back to image coordinates.
+    """
+    crop, x0, y0 = _crop(image, region)
+    if crop.size == 0:
+        return []
+    func, scale = VARIANT_FUNCS[variant]
+    prepared = func(crop)
+    if single_line:
+        h, w = prepared.shape[:2]
+        results = recognize_boxes(reader, prepared, [[0, w, 0, h]], detail=1)
+    else:
+        results = reader.readtext(prepared, detail=1)
+    return [([[x0 + p[0] / scale, y0 + p[1] / scale] for p in bbox], text, conf)
+            for (bbox, text, conf) in results]
+
+
+def _replace_region(ocr_results, region, retried):
+    kept = [r for r in ocr_results if not _center_inside(r[0], region)]
+    return kept + retried
+
+
+def _retry_regions(reader, image, ocr_results, regions, score, min_conf, max_attempts, variants):
+    """Try variants on each suspect region until its field scores higher, within max_attempts calls.
+
+    regions holds (field, region, single_line) tuples. score(results) maps each
+    field to its confidence, 0.0 when missing or invalid. A retry is kept only
+    if it raises its field's score without losing any other field.
+    """
+    scores = score(ocr_results)
+    attempts = 0
+    retries = []
+    for field, region, single_line in regions:
+        if scores[field] >= min_conf:
+            continue
+        for variant in variants:
+            if attempts >= max_attempts:
+                return ocr_results, retries
+            attempts += 1
+            retried = reocr_region(reader, image, region, variant, single_line)
+            candidate = _replace_region(ocr_results, region, retried)
+            candidate_scores = score(candidate)
+            if candidate_scores[field] <= scores[field]:
+                continue
+            if any(candidate_scores[f] == 0.0 for f in scores if scores[f] > 0.0):
+                continue
+            retries.append({
+                "field": field,
+                "variant": variant,
+                "region": [round(float(v), 1) for v in region],
+                "confidence_before": round(float(scores[field]), 4),
+                "confidence_after": round(float(candidate_scores[field]), 4),
+            })
+            ocr_results, scores = candidate, candidate_scores
+            break
+    return ocr_results, retries
+
+
+def _license_value_valid(field, value):
+    if value == "Not Found":
+        return False
+    if field == 'DL No':
+        return bool(DL_NO_PATTERN.fullmatch(value)) and not value.isalpha()
+    if field == 'Exp Date':
+        return bool(EXP_DATE_PATTERN.fullmatch(value))
+    if field == 'Sex':
+        return value in ('M', 'F')
+    if field == 'Name':
+        return len(value.split()) >= 2
+    return True
+
+
+def _license_scores(ocr_results):
+    details, kv_pairs, confidences = parse_driver_license_results(ocr_results)
+    return {field: confidences[field] if _license_value_valid(field, value) else 0.0
+            for field, value in details.items()}
+
+
+def _license_regions(image, ocr_results, details, scores, min_conf):
+    width = image.shape[1]
+    regions = []
+    for field, value in details.items():
+        if scores[field] >= min_conf:
+            continue
+        if value != "Not Found":
+            lines = field_lines(value, ocr_results)
+            if not lines:
+                # A value joined from several boxes (e.g. a name) is found part by part
+                lines = [r for part in value.split() for r in field_lines(part, ocr_results)]
+            if lines:
+                single = len(lines) == 1
+                regions.append((field, _bounds([r[0] for r in lines]), single))
+            continue
+        labels = LICENSE_VALUE_LABELS.get(field)
+        if not labels:
+            continue
+        for bbox, text, conf in ocr_results:
+            if any(label in text.upper() for label in labels):
+                # The value sits right of the label or on the line just below it
+                x_min, x_max, y_min, y_max = _bounds([bbox])
+                regions.append((field, [x_min, width, y_min, y_max + (y_max - y_min) * 1.5], False))
+                break
+    return regions
+
+
+def retry_license_fields(reader, image, ocr_results, min_conf=RETRY_MIN_CONF,
+                         max_attempts=MAX_RETRY_ATTEMPTS, variants=RETRY_VARIANTS):
+    """Re-OCR crops of license fields that are missing or below min_conf.
+
+    image must be in the same coordinates as ocr_results but without the
+    threshold step (the card from driving_test.check_and_prepare). Returns (details, kv_pairs,
+    confidences, ocr_results, retries) where retries lists each accepted retry.
+    """
+    details, kv_pairs, confidences = parse_driver_license_results(ocr_results)
+    scores = _license_scores(ocr_results)
+    regions = _license_regions(image, ocr_results, details, scores, min_conf)
+    ocr_results, retries = _retry_regions(reader, image, ocr_results, regions, _license_scores,
+                                          min_conf, max_attempts, variants)
+    if retries:
+        details, kv_pairs, confidences = parse_driver_license_results(ocr_results)
+    return details, kv_pairs, confidences, ocr_results, retries
+
+
+def extract_license_with_retry(reader, img, min_conf=RETRY_MIN_CONF, max_attempts=MAX_RETRY_ATTEMPTS):
+    card, processed_img, quality = check_and_prepare(img, reader)
+    if processed_img is None:
+        return None
+    ocr_results = reader.readtext(processed_img, detail=1)
+    return retry_license_fields(reader, card, ocr_results, min_conf, max_attempts)
+
+
+def _ssn_scores(ocr_results):
+    ssn, name, signature = extract_fields_easyocr(ocr_results)
+    scores = {'SSN': 0.0, 'Name': 0.0}
+    if SSN_PATTERN.fullmatch(ssn):
+        confs = [conf for (bbox, text, conf) in field_lines(ssn, ocr_results)]
+        scores['SSN'] = max(confs) if confs else 0.0
+    if name != "Not found":
+        confs = [conf for part in name.split() for (bbox, text, conf) in field_lines(part, ocr_results)]
+        scores['Name'] = min(confs) if confs else 0.0
+    return scores
+
+
+def _ssn_regions(ocr_results, ssn, scores, min_conf):
+    regions = []
+    if scores['SSN'] < min_conf:
+        if ssn != "Not found":
+            lines = field_lines(ssn, ocr_results)
+        else:
+            # The number was misread: retry the lines holding the most digits
+            lines = sorted((r for r in ocr_results if sum(c.isdigit() for c in r[1]) >= 5),
+                           key=lambda r: -sum(c.isdigit() for c in r[1]))[:2]
+        regions.extend(('SSN', _bounds([r[0]]), True) for r in lines)
+    if scores['Name'] < min_conf:
+        # Uppercase lines that missed extract_fields_easyocr's name confidence cut are the likely name lines
+        name_min_conf = profile('ssn')['fields']['name_min_conf']
+        regions.extend(('Name', _bounds([r[0]]), True) for r in ocr_results
+                       if r[1].strip().isalpha() and r[1].strip().isupper()
+                       and MIN_LINE_CONF <= r[2] <= name_min_conf)
+    return regions
+
+
+def retry_ssn_fields(reader, image, ocr_results, min_conf=RETRY_MIN_CONF,
+                     max_attempts=MAX_RETRY_ATTEMPTS, variants=RETRY_VARIANTS):
+    """Re-OCR crops of the SSN number and name lines when they are missing or below min_conf.
+
+    image is the unthresholded card in the same coordinates as ocr_results.
+    Returns (ssn, name, signature, ocr_results, retries).
+    """
+    ssn, name, signature = extract_fields_easyocr(ocr_results)
+    regions = _ssn_regions(ocr_results, ssn, _ssn_scores(ocr_results), min_conf)
+    ocr_results, retries = _retry_regions(reader, image, ocr_results, regions, _ssn_scores,
+                                          min_conf, max_attempts, variants)
+    if retries:
+        ssn, name, signature = extract_fields_easyocr(ocr_results)
+    return ssn, name, signature, ocr_results, retries
+
+
+def extract_ssn_with_retry(reader, img, min_conf=RETRY_MIN_CONF, max_attempts=MAX_RETRY_ATTEMPTS):
+    card, processed_img, quality = check_and_prepare_ssn(img, reader)
+    if processed_img is None:
+        return None
+    ocr_results = reader.readtext(processed_img, detail=1)
+    return retry_ssn_fields(reader, card, ocr_results, min_conf, max_attempts)
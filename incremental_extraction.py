@@ -0,0 +1,105 @@
+import re
+
+from driving_test import parse_driver_license_details, field_confidence, reading_order
+from easyocr_ssn import extract_fields_easyocr
+
+SSN_PATTERN = re.compile(r'\d{3}-\d{2}-\d{4}')
+DL_NO_PATTERN = re.compile(r'[A-Z0-9]{6,20}')
+EXP_DATE_PATTERN = re.compile(r'\d{2}[/-](\d{2}[/-])?\d{4}')
+DL_LABELS = ('DLN', 'DL', 'LIC', 'ID')
+
+
+def _corners(box, horizontal):
+    if horizontal:
+        x_min, x_max, y_min, y_max = box
+        return [[x_min, y_min], [x_max, y_min], [x_max, y_max], [x_min, y_max]]
+    return box
+
+
+def detect_in_reading_order(reader, img):
+    """Run only the detector and return (horizontal, box) pairs in driving_test.reading_order order."""
+    horizontal_list, free_list = reader.detect(img)
+    boxes = [(True, b) for b in horizontal_list[0]] + [(False, b) for b in free_list[0]]
+    # reading_order sorts (bbox, text, conf) results; the detection rides along in the text slot
+    ordered = reading_order([(_corners(box, horizontal), (horizontal, box), None) for horizontal, box in boxes])
+    return [item for (bbox, item, conf) in ordered]
+
+
+def recognize_until_complete(reader, img, is_complete, batch_size=4):
+    """Recognize detected regions in reading order until is_complete(results) is true.
+
+    Returns (results, recognized, total) where results are (bbox, text, conf)
+    tuples in the same format as reader.readtext(img).
+    """
+    boxes = detect_in_reading_order(reader, img)
+    results = []
+    recognized = 0
+    for start in range(0, len(boxes), batch_size):
+        chunk = boxes[start:start + batch_size]
+        horizontal = [b for is_h, b in chunk if is_h]
+        free = [b for is_h, b in chunk if not is_h]
+        results.extend(reader.recognize(img, horizontal_list=horizontal, free_list=free))
+        recognized += len(chunk)
+        if is_complete(results):
+            break
+    return results, recognized, len(boxes)
+
+
+def _confident(value, results, min_conf):
+    conf = field_confidence(value, results)
+    return conf is not None and conf >= min_conf
+
+
+def _label_seen(results, labels):
+    for (bbox, text, conf) in results:
+        upper = text.upper()
+        if any(label in upper for label in labels):
+            return True
+    return False
+
+
+def ssn_fields_complete(results, min_conf=0.5):
+    ssn, name, signature = extract_fields_easyocr(results)
+    if not SSN_PATTERN.fullmatch(ssn) or not _confident(ssn, results, min_conf):
+        return False
+    if name == "Not found" or len(name.split()) < 2:
+        return False
+    if not all(_confident(part, results, min_conf) for part in name.split()):
+        return False
+    return signature != "Not found" and _confident(signature, results, min_conf)
+
+
+def license_fields_complete(results, min_conf=0.5):
+    lines = [text for (bbox, text, conf) in results]
+    details, kv_pairs = parse_driver_license_details(lines)
+    if any(value == "Not Found" for value in details.values()):
+        return False
+    # The extractors fall back to any plausible token; only trust a value once its label was read
+    if not (DL_NO_PATTERN.fullmatch(details['DL No']) and not details['DL No'].isalpha()
+            and _label_seen(results, DL_LABELS)):
+        return False
+    if not (EXP_DATE_PATTERN.fullmatch(details['Exp Date']) and _label_seen(results, ('EXP',))):
+        return False
+    if details['Sex'] not in ('M', 'F') or not _label_seen(results, ('SEX',)):
+        return False
+    if len(details['Name'].split()) < 2:
+        return False
+    return all(_confident(details[field], results, min_conf)
+               for field in ('DL No', 'Exp Date', 'Name', 'State'))
+
+
+def extract_ssn_early_exit(reader, img, min_conf=0.5, batch_size=4):
+    results, recognized, total = recognize_until_complete(
+        reader, img, lambda r: ssn_fields_complete(r, min_conf), batch_size=batch_size)
+    ssn, name, signature = extract_fields_easyocr(results)
+    print(f"Recognized {recognized}/{total} text regions")
+    return ssn, name, signature, results
+
+
+def extract_license_early_exit(reader, img, min_conf=0.5, batch_size=4):
+    results, recognized, total = recognize_until_complete(
+        reader, img, lambda r: license_fields_complete(r, min_conf), batch_size=batch_size)
+    lines = [text for (bbox, text, conf) in results]
+    details, kv_pairs = parse_driver_license_details(lines)
+    print(f"Recognized {recognized}/{total} text regions")
+    return details, lines
@@ -0,0 +1,119 @@
+import difflib
+import os
+import time
+
+import easyocr
+import numpy as np
+import torch
+
+# "torch" is easyocr's own default reader, which quantizes both networks to int8
+# on the CPU; "fp32" skips that quantization and is the accuracy reference;
+# "onnx" exports the fp32 networks once and runs them in ONNX Runtime.
+BACKENDS = ("torch", "fp32", "onnx")
+DEFAULT_BACKEND = os.environ.get("EASYOCR_BACKEND", "torch")
+DEFAULT_ONNX_DIR = "onnx_models"
+
+
+class _OnnxDetector(torch.nn.Module):
+    # Stands in for the CRAFT module: easyocr calls net(x) and unpacks (y, feature)
+    def __init__(self, session):
+        super().__init__()
+        self.session = session
+
+    def forward(self, x):
+        y, feature = self.session.run(None, {self.session.get_inputs()[0].name: x.cpu().numpy()})
+        return torch.from_numpy(y), torch.from_numpy(feature)
+
+
+class _OnnxRecognizer(torch.nn.Module):
+    # Stands in for the CRNN module: easyocr calls model(image, text) and softmaxes the output
+    def __init__(self, session):
+        super().__init__()
+        self.session = session
+        self.input_names = [i.name for i in session.get_inputs()]
+
+    def forward(self, image, text):
+        feeds = {self.input_names[0]: image.cpu().numpy()}
+        # The text argument is unused by CTC models and usually pruned from the graph
+        if len(self.input_names) > 1:
+            feeds[self.input_names[1]] = text.cpu().numpy()
+        preds, = self.session.run(None, feeds)
+        return torch.from_numpy(preds)
+
+
+def _export_onnx(reader, onnx_dir):
+    os.makedirs(onnx_dir, exist_ok=True)
+    detector_path = os.path.join(onnx_dir, "detector.onnx")
+    recognizer_path = os.path.join(onnx_dir, "recognizer.onnx")
+    if not os.path.exists(detector_path):
+        dummy = torch.randn(1, 3, 640, 640)
+        torch.onnx.export(reader.detector, dummy, detector_path,
+                          input_names=["image"], output_names=["y", "feature"],
+                          dynamic_axes={"image": {0: "batch", 2: "height", 3: "width"},
+                                        "y": {0: "batch", 1: "out_h", 2: "out_w"},
+                                        "feature": {0: "batch", 2: "feat_h", 3: "feat_w"}},
+                          opset_version=17)
+    if not os.path.exists(recognizer_path):
+        dummy_image = torch.randn(1, 1, 64, 256)
+        dummy_text = torch.zeros(1, 26, dtype=torch.long)
+        torch.onnx.export(reader.recognizer, (dummy_image, dummy_text), recognizer_path,
+                          input_names=["image", "text"], output_names=["preds"],
+                          dynamic_axes={"image": {0: "batch", 3: "width"},
+                                        "text": {0: "batch"},
+                                        "preds": {0: "batch", 1: "steps"}},
+                          opset_version=17)
+    return detector_path, recognizer_path
+
+
+def create_reader(lang_list=None, backend=DEFAULT_BACKEND, onnx_dir=DEFAULT_ONNX_DIR, gpu=False):
+    """Build an easyocr.Reader whose networks run on the requested backend.
+
+    gpu only applies to "torch"; "fp32" and "onnx" always build on the CPU.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}; expected one of {BACKENDS}")
+    if backend == "torch":
+        return easyocr.Reader(lang_list or ['en'], gpu=gpu)
+    # A quantized graph does not export, so ONNX starts from the fp32 networks too
+    reader = easyocr.Reader(lang_list or ['en'], gpu=False, quantize=False)
+    reader.detector.eval()
+    reader.recognizer.eval()
+    if backend == "onnx":
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError("The onnx backend requires onnxruntime (pip install onnxruntime)")
+        detector_path, recognizer_path = _export_onnx(reader, onnx_dir)
+        providers = ["CPUExecutionProvider"]
+        reader.detector = _OnnxDetector(ort.InferenceSession(detector_path, providers=providers))
+        reader.recognizer = _OnnxRecognizer(ort.InferenceSession(recognizer_path, providers=providers))
+    return reader
+
+
+def compare_backends(images, backends=("torch", "onnx"), lang_list=None, onnx_dir=DEFAULT_ONNX_DIR):
+    """Run each backend next to the fp32 reference and report agreement and speed.
+
+    images is a list of preprocessed arrays. For every backend the report has
+    the mean text similarity to fp32 (difflib ratio over the joined lines),
+    the share of images with identical text, and the mean seconds per image.
+    """
+    def run(reader):
+        texts, elapsed = [], 0.0
+        for img in images:
+            start = time.perf_counter()
+            texts.append("\n".join(reader.readtext(img, detail=0)))
+            elapsed += time.perf_counter() - start
+        return texts, elapsed / max(len(images), 1)
+
+    reference, reference_time = run(create_reader(lang_list, "fp32"))
+    report = {"fp32": {"similarity": 1.0, "exact_match": 1.0, "seconds_per_image": reference_time}}
+    for backend in backends:
+        texts, seconds = run(create_reader(lang_list, backend, onnx_dir=onnx_dir))
+        ratios = [difflib.SequenceMatcher(None, a, b).ratio() for a, b in zip(reference, texts)]
+        exact = [a == b for a, b in zip(reference, texts)]
+        report[backend] = {
+            "similarity": float(np.mean(ratios)) if ratios else 1.0,
+            "exact_match": float(np.mean(exact)) if exact else 1.0,
+            "seconds_per_image": seconds,
+        }
+    return report
@@ -0,0 +1,83 @@
+import os
+import threading
+
+import numpy as np
+
+# Per-worker cap in MB; unset or 0 means no cap
+MEMORY_CAP_ENV = "OCR_WORKER_MEMORY_MB"
+
+# Peak bytes held per pixel of the working image, including OpenCV scratch space
+LICENSE_BYTES_PER_PIXEL = 8     # resized BGR + gray + denoised + thresholded + NLM scratch
+MRZ_SEARCH_BYTES_PER_PIXEL = 10  # BGR + gray + blackhat + float32 gradient
+
+
+class MemoryBudgetExceeded(MemoryError):
+    pass
+
+
+class BufferPool:
+    """Named scratch arrays reused across images of the same size.
+
+    A buffer is only valid until the next call that asks for the same name,
+    so only intermediates may live in it, never a returned result.
+    """
+
+    def __init__(self):
+        self._buffers = {}
+
+    def get(self, name, shape, dtype=np.uint8):
+        shape = tuple(shape)
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = np.empty(shape, dtype=dtype)
+            self._buffers[name] = buf
+        return buf
+
+    def clear(self):
+        self._buffers.clear()
+
+    def nbytes(self):
+        return sum(buf.nbytes for buf in self._buffers.values())
+
+
+_local = threading.local()
+
+
+def buffer_pool():
+    """The calling thread's BufferPool, so concurrent workers never share scratch space."""
+    pool = getattr(_local, 'pool', None)
+    if pool is None:
+        pool = _local.pool = BufferPool()
+    return pool
+
+
+class MemoryBudget:
+    """Reject images whose estimated working set would exceed a per-worker cap."""
+
+    def __init__(self, cap_bytes=None):
+        self.cap_bytes = cap_bytes
+
+    @classmethod
+    def from_env(cls):
+        cap_mb = float(os.environ.get(MEMORY_CAP_ENV, 0) or 0)
+        return cls(int(cap_mb * 1024 * 1024) if cap_mb > 0 else None)
+
+    def check(self, shape, bytes_per_pixel, what="image"):
+        """Raise MemoryBudgetExceeded when an image of shape needs more than the cap."""
+        if self.cap_bytes is None:
+            return
+        needed = shape[0] * shape[1] * bytes_per_pixel
+        if needed > self.cap_bytes:
+            raise MemoryBudgetExceeded(
+                f"{what} of {shape[1]}x{shape[0]} needs about {needed / 2**20:.0f} MB, "
+                f"over the {self.cap_bytes / 2**20:.0f} MB worker budget")
+
+
+_default_budget = None
+
+
+def default_budget():
+    global _default_budget
+    if _default_budget is None:
+        _default_budget = MemoryBudget.from_env()
+    return _default_budget
@@ -0,0 +1,130 @@
+from datetime import date
+
+import numpy as np
+
+from mrz_dates import EXPIRY_MAX_YEARS_AHEAD
+
+MRZ_LENGTH = 44
+FILLER = ord('<')
+
+# Character values for ICAO 9303 check digits: 0-9 -> 0-9, A-Z -> 10-35, '<' -> 0
+_CHAR_VALUE = np.zeros(256, dtype=np.int64)
+_CHAR_VALUE[ord('0'):ord('9') + 1] = np.arange(10)
+_CHAR_VALUE[ord('A'):ord('Z') + 1] = np.arange(10, 36)
+
+_VALID_CHAR = np.zeros(256, dtype=bool)
+_VALID_CHAR[ord('0'):ord('9') + 1] = True
+_VALID_CHAR[ord('A'):ord('Z') + 1] = True
+_VALID_CHAR[FILLER] = True
+
+_SEX_LABEL = np.full(256, 'Unspecified', dtype=object)
+_SEX_LABEL[ord('M')] = 'Male'
+_SEX_LABEL[ord('F')] = 'Female'
+
+
+def _to_bytes(lines):
+    """Uppercase, strip spaces and pack lines into an (N, 44) uint8 array padded with '<'."""
+    lines = np.char.replace(np.char.upper(np.asarray(lines, dtype=str)), ' ', '')
+    packed = np.char.encode(lines, 'ascii', errors='replace').astype(f'S{MRZ_LENGTH}')
+    arr = np.frombuffer(packed.tobytes(), dtype=np.uint8).reshape(len(packed), MRZ_LENGTH).copy()
+    arr[arr == 0] = FILLER
+    arr[~_VALID_CHAR[arr]] = FILLER
+    return arr
+
+
+def _to_str(arr):
+    return np.char.decode(np.frombuffer(np.ascontiguousarray(arr).tobytes(),
+                                        dtype=f'S{arr.shape[1]}'), 'ascii')
+
+
+def _check_digit_ok(field, digit):
+    weights = np.resize(np.array([7, 3, 1]), field.shape[1])
+    expected = (_CHAR_VALUE[field] * weights).sum(axis=1) % 10
+    return (digit >= ord('0')) & (digit <= ord('9')) & (expected == digit.astype(np.int64) - ord('0'))
+
+
+def _dates(field, reference_date, kind):
+    digits = field.astype(np.int64) - ord('0')
+    all_digits = ((digits >= 0) & (digits <= 9)).all(axis=1)
+    digits = np.where(all_digits[:, None], digits, 0)
+    yy = digits[:, 0] * 10 + digits[:, 1]
+    mm = digits[:, 2] * 10 + digits[:, 3]
+    dd = digits[:, 4] * 10 + digits[:, 5]
+    # Same century rules as mrz_dates.birth_year / expiry_year
+    year = 2000 + yy
+    if kind == "birth":
+        ref_key = reference_date.year * 10000 + reference_date.month * 100 + reference_date.day
+        year = np.where(year * 10000 + mm * 100 + dd > ref_key, year - 100, year)
+    else:
+        year = np.where(year - reference_date.year > EXPIRY_MAX_YEARS_AHEAD, year - 100, year)
+    month_ok = (mm >= 1) & (mm <= 12)
+    months = (year - 1970) * 12 + np.clip(mm, 1, 12) - 1
+    start = months.astype('datetime64[M]')
+    dates = start.astype('datetime64[D]') + (dd - 1).astype('timedelta64[D]')
+    # An out-of-range day rolls into the next month, which the round trip catches
+    valid = all_digits & month_ok & (dd >= 1) & (dates.astype('datetime64[M]') == start)
+    dates = np.where(valid, dates, np.datetime64('NaT'))
+    ymd = np.where(valid, np.datetime_as_string(dates, unit='D'), '')
+    dmy = np.where(valid, np.char.add(np.char.add(np.char.add(np.char.add(
+        np.char.zfill(dd.astype(str), 2), '-'), np.char.zfill(mm.astype(str), 2)), '-'),
+        year.astype(str)), '')
+    return dates, ymd, dmy
+
+
+def _name_parts(name_field):
+    n, width = name_field.shape
+    filler = name_field == FILLER
+    double = filler[:, :-1] & filler[:, 1:]
+    has_split = double.any(axis=1)
+    split_at = np.where(has_split, double.argmax(axis=1), width)
+    positions = np.arange(width)
+    surname = np.where(positions < split_at[:, None], name_field, FILLER).astype(np.uint8)
+    given = np.where(positions >= split_at[:, None] + 2, name_field, FILLER).astype(np.uint8)
+    surname = np.char.strip(np.char.replace(_to_str(surname), '<', ' '))
+    given = np.char.strip(np.char.replace(_to_str(given), '<', ' '))
+    given = np.where(np.char.str_len(given) > 0, given, 'Not found')
+    return surname, given
+
+
+def parse_mrz_batch(line1s, line2s, reference_date=None):
+    """Parse many two-line TD3 MRZs at once and return a dict of column arrays.
+
+    Columns match the keys of parse_mrz_data, plus *_check_ok booleans for the
+    passport number, birth date, expiry date, personal number and composite
+    check digits, and date_of_birth_value/expiry_date_value as datetime64[D]
+    (NaT when invalid).
+    """
+    if reference_date is None:
+        reference_date = date.today()
+    if len(line1s) == 0:
+        # Zero rows of every column, with the same dtypes a non-empty batch gets
+        columns = parse_mrz_batch([''], [''], reference_date)
+        return {key: column[:0] for key, column in columns.items()}
+    line1 = _to_bytes(line1s)
+    line2 = _to_bytes(line2s)
+    surname, given_names = _name_parts(line1[:, 5:44])
+    birth, birth_ymd, birth_dmy = _dates(line2[:, 13:19], reference_date, "birth")
+    expiry, expiry_ymd, expiry_dmy = _dates(line2[:, 21:27], reference_date, "expiry")
+    composite = np.concatenate([line2[:, 0:10], line2[:, 13:20], line2[:, 21:43]], axis=1)
+    return {
+        'document_type': _to_str(line1[:, 0:1]),
+        'issuing_country': _to_str(line1[:, 2:5]),
+        'surname': surname,
+        'given_names': given_names,
+        'passport_number': np.char.replace(_to_str(line2[:, 0:9]), '<', ''),
+        'nationality': _to_str(line2[:, 10:13]),
+        'date_of_birth': _to_str(line2[:, 13:19]),
+        'date_of_birth_yyyy_mm_dd': birth_ymd,
+        'date_of_birth_dd_mm_yyyy': birth_dmy,
+        'sex': _SEX_LABEL[line2[:, 20]],
+        'expiry_date': _to_str(line2[:, 21:27]),
+        'expiry_date_yyyy_mm_dd': expiry_ymd,
+        'expiry_date_dd_mm_yyyy': expiry_dmy,
+        'date_of_birth_value': birth,
+        'expiry_date_value': expiry,
+        'passport_number_check_ok': _check_digit_ok(line2[:, 0:9], line2[:, 9]),
+        'date_of_birth_check_ok': _check_digit_ok(line2[:, 13:19], line2[:, 19]),
+        'expiry_date_check_ok': _check_digit_ok(line2[:, 21:27], line2[:, 27]),
+        'personal_number_check_ok': _check_digit_ok(line2[:, 28:42], line2[:, 42]),
+        'composite_check_ok': _check_digit_ok(composite, line2[:, 43]),
+    }
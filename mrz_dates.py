@@ -0,0 +1,72 @@
+from datetime import date
+from functools import lru_cache
+
+DEFAULT_FORMATS = ("%Y-%m-%d", "%d-%m-%Y")
+# Expiry years up to this far past the reference year stay in the 2000s
+EXPIRY_MAX_YEARS_AHEAD = 50
+
+
+def birth_year(yy, mm, dd, reference_date):
+    """Births cannot be in the future: use 20yy unless that lands after the reference date."""
+    year = 2000 + yy
+    if (year, mm, dd) > (reference_date.year, reference_date.month, reference_date.day):
+        year -= 100
+    return year
+
+
+def expiry_year(yy, reference_date):
+    """Expiry dates may lie in the future; only years far beyond the reference year are 19yy."""
+    year = 2000 + yy
+    if year - reference_date.year > EXPIRY_MAX_YEARS_AHEAD:
+        year -= 100
+    return year
+
+
+class MrzDateConverter:
+    """Memoized YYMMDD conversion for one reference date and one set of output formats.
+
+    Each date is converted once, on first use, and served from a dict after
+    that, so repeated dates skip datetime construction and strftime without
+    paying for a table of every possible date up front.
+    """
+
+    def __init__(self, reference_date=None, formats=DEFAULT_FORMATS):
+        self.reference_date = reference_date or date.today()
+        self.formats = tuple(formats)
+        self._empty = ("",) * len(self.formats)
+        self._cache = {"birth": {}, "expiry": {}}
+
+    def _format(self, mrz_date, kind):
+        yy, mm, dd = int(mrz_date[0:2]), int(mrz_date[2:4]), int(mrz_date[4:6])
+        if kind == "birth":
+            year = birth_year(yy, mm, dd, self.reference_date)
+        else:
+            year = expiry_year(yy, self.reference_date)
+        try:
+            dt = date(year, mm, dd)
+        except ValueError:
+            return self._empty
+        return tuple(dt.strftime(f) for f in self.formats)
+
+    def convert(self, mrz_date, kind="birth"):
+        """Return one formatted string per output format, or empty strings for invalid input."""
+        cache = self._cache.get(kind)
+        if cache is None:
+            raise ValueError(f"Unknown MRZ date kind {kind!r}; expected 'birth' or 'expiry'")
+        result = cache.get(mrz_date)
+        if result is None:
+            # Only six ASCII digits are cached, so OCR garbage cannot grow the cache without bound
+            if not (mrz_date and len(mrz_date) == 6 and mrz_date.isascii() and mrz_date.isdigit()):
+                return self._empty
+            result = cache[mrz_date] = self._format(mrz_date, kind)
+        return result
+
+
+@lru_cache(maxsize=4)
+def _converter_for(reference_date, formats):
+    return MrzDateConverter(reference_date, formats)
+
+
+def get_converter(formats=DEFAULT_FORMATS):
+    """Shared converter for today; its memoized dates are dropped when the date changes."""
+    return _converter_for(date.today(), tuple(formats))
@@ -0,0 +1,227 @@
+import re
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from quality_gate import rejected_or_error
+
+HASH_SIZE = 8
+# pHash bits that may differ for two photos of the same document. Cards of
+# different people on one template fall within this too, so a hash match
+# only nominates candidates for key-field confirmation.
+DEFAULT_MAX_DISTANCE = 8
+DEFAULT_CAPACITY = 10000
+# Hash candidates checked by re-reading the key field before one is reused
+MAX_CONFIRMATIONS = 3
+KEY_FIELD_PAD = 8
+NON_ALNUM = re.compile(r'[^A-Z0-9]')
+
+
+def phash(image, hash_size=HASH_SIZE):
+    """64-bit DCT perceptual hash of an image, as an int."""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    small = cv2.resize(gray, (hash_size * 4, hash_size * 4), interpolation=cv2.INTER_AREA)
+    dct = cv2.dct(np.float32(small))[:hash_size, :hash_size]
+    # The DC term only encodes overall brightness
+    bits = (dct > np.median(dct.ravel()[1:])).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+class BKTree:
+    """Burkhard-Keller tree over int hashes with Hamming distance.
+
+    Each node keeps its children keyed by their distance to it, so a radius
+    search only descends into children whose key is within the radius of
+    the query's distance to the node.
+    """
+
+    def __init__(self):
+        self._root = None
+
+    def add(self, key, value):
+        node = [key, value, {}]
+        if self._root is None:
+            self._root = node
+            return
+        current = self._root
+        while True:
+            d = hamming(key, current[0])
+            child = current[2].get(d)
+            if child is None:
+                current[2][d] = node
+                return
+            current = child
+
+    def search(self, key, max_distance):
+        """(distance, value) pairs within max_distance of key, closest first."""
+        if self._root is None:
+            return []
+        found = []
+        stack = [self._root]
+        while stack:
+            node_key, value, children = stack.pop()
+            d = hamming(key, node_key)
+            if d <= max_distance:
+                found.append((d, value))
+            for child_d, child in children.items():
+                if d - max_distance <= child_d <= d + max_distance:
+                    stack.append(child)
+        return sorted(found, key=lambda f: f[0])
+
+
+class DuplicateIndex:
+    """Recent documents' hashes and extractions, searchable by near-duplicate hash.
+
+    Each entry also keeps the evidence needed to confirm a match (the key
+    field's value and where it was read). Only the most recent capacity
+    documents are kept. BK-trees cannot delete, so evicted entries are
+    skipped at query time and the tree is rebuilt once they outnumber the
+    live ones.
+    """
+
+    def __init__(self, max_distance=DEFAULT_MAX_DISTANCE, capacity=DEFAULT_CAPACITY):
+        self.max_distance = max_distance
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self._tree = BKTree()
+        self._next_id = 0
+        self._stale = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def candidates(self, key, limit=MAX_CONFIRMATIONS):
+        """Up to limit (distance, name, extraction, evidence) live matches, closest first."""
+        found = []
+        for d, entry_id in self._tree.search(key, self.max_distance):
+            entry = self._entries.get(entry_id)
+            if entry is not None:
+                found.append((d,) + entry[1:])
+                if len(found) >= limit:
+                    break
+        return found
+
+    def add(self, key, name, extraction, evidence=None):
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = (key, name, extraction, evidence)
+        self._tree.add(key, entry_id)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self._stale += 1
+        if self._stale > len(self._entries):
+            self._rebuild()
+
+    def _rebuild(self):
+        self._tree = BKTree()
+        for entry_id, entry in self._entries.items():
+            self._tree.add(entry[0], entry_id)
+        self._stale = 0
+
+
+def extract_deduplicated(named_images, preprocess, extract, index=None, confirm=None):
+    """Run extract on the preprocessed image per (name, image) pair, reusing confirmed duplicates.
+
+    preprocess(image) returns (processed image or None, quality report or
+    None), like driving_test.check_and_preprocess.
+
+    A pHash match alone is never enough: cards of different people on one
+    template hash within a few bits of each other. extract(processed_img)
+    returns (result, evidence), where evidence locates the document's key
+    field (e.g. (value, region)) or is None. A hash candidate is reused only
+    if confirm(processed_img, evidence) re-reads the same key field from the
+    new image. Reused results are marked with "duplicate_of" and
+    "hash_distance". Without confirm, or when no candidate is confirmed,
+    the image is OCRed as usual and hash candidates are only reported as
+    "possible_duplicate_of". Returns {name: result}.
+    """
+    index = index if index is not None else DuplicateIndex()
+    results = {}
+    for image_name, img in named_images:
+        if img is None:
+            results[image_name] = {"Error": "Image not processed."}
+            continue
+        processed_img, quality = preprocess(img)
+        if processed_img is None:
+            results[image_name] = rejected_or_error(quality)
+            continue
+        key = phash(processed_img)
+        candidates = index.candidates(key)
+        confirmed = None
+        if confirm is not None:
+            confirmed = next((c for c in candidates if c[3] is not None and confirm(processed_img, c[3])), None)
+        if confirmed is not None:
+            distance, original_name, extraction, evidence = confirmed
+            results[image_name] = dict(extraction, duplicate_of=original_name, hash_distance=distance)
+            continue
+        extraction, evidence = extract(processed_img)
+        index.add(key, image_name, extraction, evidence)
+        if candidates:
+            extraction = dict(extraction, possible_duplicate_of=[c[1] for c in candidates])
+        results[image_name] = extraction
+    return results
+
+
+def _alnum(text):
+    return NON_ALNUM.sub('', text.upper())
+
+
+def _key_field_evidence(value, ocr_results):
+    # The key field's value and the box it was read from, padded for small shifts between photos
+    from driving_test import field_lines
+    lines = field_lines(value, ocr_results)
+    if not lines:
+        return None
+    xs = [p[0] for p in lines[0][0]]
+    ys = [p[1] for p in lines[0][0]]
+    return value, [min(xs) - KEY_FIELD_PAD, max(xs) + KEY_FIELD_PAD,
+                   min(ys) - KEY_FIELD_PAD, max(ys) + KEY_FIELD_PAD]
+
+
+def key_field_confirmer(reader):
+    """confirm(processed_img, (value, region)) that re-recognizes only the key field's box."""
+    from recognition_only import recognize_boxes
+
+    def confirm(processed_img, evidence):
+        value, region = evidence
+        h, w = processed_img.shape[:2]
+        x_min, x_max, y_min, y_max = region
+        box = [max(0, int(x_min)), min(w, int(x_max)), max(0, int(y_min)), min(h, int(y_max))]
+        if box[0] >= box[1] or box[2] >= box[3]:
+            return False
+        text = "".join(recognize_boxes(reader, processed_img, [box]))
+        return _alnum(value) in _alnum(text)
+
+    return confirm
+
+
+def extract_licenses_deduplicated(named_images, reader, index=None):
+    from driving_test import check_and_preprocess, parse_driver_license_results, recognize_license
+
+    def extract(processed_img):
+        ocr_results = recognize_license(reader, processed_img)
+        details, kv_pairs, confidences = parse_driver_license_results(ocr_results)
+        dl_no = details['DL No']
+        evidence = _key_field_evidence(dl_no, ocr_results) if dl_no != "Not Found" else None
+        return {"extracted_details": details, "field_confidence": confidences}, evidence
+
+    return extract_deduplicated(named_images, check_and_preprocess, extract, index,
+                                key_field_confirmer(reader))
+
+
+def extract_ssns_deduplicated(named_images, reader, index=None):
+    from easyocr_ssn import check_and_preprocess, extract_fields_easyocr, recognize_ssn
+
+    def extract(processed_img):
+        ocr_results = recognize_ssn(reader, processed_img)
+        ssn, name, signature = extract_fields_easyocr(ocr_results)
+        evidence = _key_field_evidence(ssn, ocr_results) if ssn != "Not found" else None
+        return {"SSN_Number": ssn, "Printed_Name": name, "Signature": signature}, evidence
+
+    return extract_deduplicated(named_images, check_and_preprocess, extract, index,
+                                key_field_confirmer(reader))
@@ -0,0 +1,218 @@
+import cv2
+import numpy as np
+
+from recognition_only import recognize_boxes
+
+# Orientation is estimated on a copy no larger than this
+ORIENT_MAX_SIDE = 800
+# Text runs vertically when columns show this many times the blank gaps that rows do
+AXIS_MARGIN = 1.15
+# Text lines compared by recognizer confidence when deciding upright vs upside down
+SAMPLE_LINES = 3
+MIN_LINE_HEIGHT = 6
+# Without a reader, flip only on clear evidence: ink above/below the line cores must be at least
+# this share of all line ink (all-caps and digit lines have almost none) and lean this far downward
+MIN_EXCURSION_SHARE = 0.03
+ASCENDER_MARGIN = 0.3
+# Lines share a left margin and end raggedly: flip when the ragged edge is on the left. Decided only
+# from this many lines, with the ragged edge spread over this share of the width and the other
+# edge at most this share as spread
+MIN_ALIGNED_LINES = 3
+MIN_RAGGED_SPREAD = 0.02
+ALIGNED_SPREAD_RATIO = 0.25
+
+_ROTATE_CODES = {
+    90: cv2.ROTATE_90_CLOCKWISE,
+    180: cv2.ROTATE_180,
+    270: cv2.ROTATE_90_COUNTERCLOCKWISE,
+}
+
+
+def rotate(image, rotation):
+    """Rotate image clockwise by 0, 90, 180 or 270 degrees."""
+    rotation %= 360
+    if rotation == 0:
+        return image
+    return cv2.rotate(image, _ROTATE_CODES[rotation])
+
+
+def _small_gray(image):
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    h, w = gray.shape[:2]
+    scale = ORIENT_MAX_SIDE / float(max(h, w))
+    if scale < 1.0:
+        gray = cv2.resize(gray, (max(1, int(w * scale)), max(1, int(h * scale))),
+                          interpolation=cv2.INTER_AREA)
+    return gray
+
+
+def _strokes(gray):
+    # A square kernel keeps the mask free of any horizontal or vertical bias
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (9, 9))
+    blackhat = cv2.morphologyEx(gray, cv2.MORPH_BLACKHAT, kernel)
+    _, mask = cv2.threshold(blackhat, 0, 1, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    return mask
+
+
+def _gap_share(profile):
+    # Share of blank positions between the first and last inked one
+    inked = np.flatnonzero(profile > profile.max() * 0.02)
+    if inked.size < 2:
+        return 0.0
+    span = profile[inked[0]:inked[-1] + 1]
+    return float((span <= span.max() * 0.02).mean())
+
+
+def text_axis_rotation(gray):
+    """(0 or 90, ratio): 90 when text lines run vertically and a quarter turn is needed.
+
+    Gaps between text lines leave blank rows across the whole text block,
+    while gaps between letters rarely line up into blank columns.
+    """
+    mask = _strokes(gray)
+    rows = _gap_share(mask.sum(axis=1)) + 1e-3
+    cols = _gap_share(mask.sum(axis=0)) + 1e-3
+    if cols > rows * AXIS_MARGIN:
+        return 90, cols / rows
+    return 0, rows / cols
+
+
+def _line_bands(gray):
+    mask = _strokes(gray)
+    rows = mask.sum(axis=1)
+    if rows.max() == 0:
+        return []
+    on = np.concatenate(([False], rows > rows.max() * 0.15, [False])).astype(np.int8)
+    edges = np.flatnonzero(np.diff(on))
+    bands = [(int(s), int(e)) for s, e in zip(edges[::2], edges[1::2]) if e - s >= MIN_LINE_HEIGHT]
+    # The inkiest lines make the most reliable samples
+    return sorted(bands, key=lambda b: -int(rows[b[0]:b[1]].sum()))
+
+
+def _ascender_balance(gray):
+    """(balance, excursion share) of ink sticking out above vs below each line's core.
+
+    balance is positive when more ink sits above, as in upright mixed-case
+    Latin text. excursion share is that ink relative to all line ink; it is
+    near zero for uppercase letters and digits, whose balance means nothing.
+    """
+    mask = _strokes(gray)
+    above = below = line_ink = 0
+    for start, end in _line_bands(gray):
+        band = mask[start:end].sum(axis=1)
+        core = np.flatnonzero(band >= band.max() * 0.5)
+        above += int(band[:core[0]].sum())
+        below += int(band[core[-1] + 1:].sum())
+        line_ink += int(band.sum())
+    total = above + below
+    if not total:
+        return 0.0, 0.0
+    return (above - below) / float(total), total / float(line_ink)
+
+
+def _ragged_left(gray):
+    """True/False when the line ends are clearly ragged on the left/right side, None when unclear.
+
+    Card fields are left-aligned, so upright lines start at a shared margin
+    and end wherever their text does. Unlike the ascender balance this
+    works for all-caps and digit lines; centred or justified text is left
+    undecided.
+    """
+    mask = _strokes(gray)
+    starts, ends = [], []
+    for start, end in _line_bands(gray):
+        cols = np.flatnonzero(mask[start:end].sum(axis=0))
+        if cols.size:
+            starts.append(cols[0])
+            ends.append(cols[-1])
+    if len(starts) < MIN_ALIGNED_LINES:
+        return None
+    left, right = float(np.std(starts)), float(np.std(ends))
+    ragged, aligned = max(left, right), min(left, right)
+    if ragged < MIN_RAGGED_SPREAD * gray.shape[1] or aligned > ragged * ALIGNED_SPREAD_RATIO:
+        return None
+    return left > right
+
+
+def _recognition_confidence(reader, gray, bands):
+    w = gray.shape[1]
+    boxes = [[0, w, start, end] for start, end in bands]
+    results = recognize_boxes(reader, gray, boxes, detail=1)
+    return float(np.mean([conf for (bbox, text, conf) in results])) if results else 0.0
+
+
+def _upside_down_by_reader(reader, gray):
+    bands = _line_bands(gray)[:SAMPLE_LINES]
+    if not bands:
+        return None
+    h = gray.shape[0]
+    flipped = rotate(gray, 180)
+    flipped_bands = [(h - end, h - start) for start, end in bands]
+    upright = _recognition_confidence(reader, gray, bands)
+    upside_down = _recognition_confidence(reader, flipped, flipped_bands)
+    return upside_down > upright, upright, upside_down
+
+
+def _upside_down_by_mrz(image_small):
+    # passport_mrz runs orientation itself, so it is imported here rather than at the top
+    from passport_mrz import find_mrz_region
+    box = find_mrz_region(image_small)
+    if box is None:
+        return None
+    x, y, w, h = box
+    # The MRZ is printed along the bottom of the data page
+    return y + h / 2.0 < image_small.shape[0] / 2.0
+
+
+def detect_orientation(image, doc_type=None, reader=None):
+    """Estimate the clockwise rotation (0, 90, 180, 270) that makes image upright.
+
+    Projection profiles decide whether text runs horizontally. Upright vs
+    upside down is then decided by MRZ position for passports, otherwise by
+    the ascender/descender balance of the text, then by which side the line
+    ends are ragged on. Only when those are undecided is the reader, if
+    given, asked to compare its confidence on a few sampled lines both ways
+    up; failing that the image is left unflipped.
+    Returns {"rotation": degrees, "method": ..., "axis_ratio": ...}.
+    """
+    gray = _small_gray(image)
+    quarter, axis_ratio = text_axis_rotation(gray)
+    gray = rotate(gray, quarter)
+    info = {"axis_ratio": round(axis_ratio, 3)}
+
+    flip = None
+    if doc_type == 'passport':
+        small = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+        flip = _upside_down_by_mrz(small)
+        info["method"] = "mrz"
+    if flip is None:
+        balance, excursion = _ascender_balance(gray)
+        info.update(ascender_balance=round(balance, 4), excursion_share=round(excursion, 4))
+        # All-caps and digit lines show too little of either to count
+        if excursion >= MIN_EXCURSION_SHARE and abs(balance) >= ASCENDER_MARGIN:
+            flip = balance < 0
+            info["method"] = "ascenders"
+    if flip is None:
+        flip = _ragged_left(gray)
+        if flip is not None:
+            info["method"] = "alignment"
+    # Recognizing both ways up costs more than everything above, so the reader only breaks ties
+    if flip is None and reader is not None:
+        decision = _upside_down_by_reader(reader, gray)
+        if decision is not None:
+            flip, upright, upside_down = decision
+            info.update(method="recognizer", upright_confidence=round(upright, 4),
+                        upside_down_confidence=round(upside_down, 4))
+    if flip is None:
+        # Undecided text is left as it is rather than flipped on noise
+        flip = False
+        info["method"] = "undecided"
+
+    info["rotation"] = (quarter + (180 if flip else 0)) % 360
+    return info
+
+
+def auto_orient(image, doc_type=None, reader=None):
+    """Rotate image upright once, up front; returns (image, orientation info)."""
+    info = detect_orientation(image, doc_type, reader)
+    return rotate(image, info["rotation"]), info
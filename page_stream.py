@@ -0,0 +1,100 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from reader_pool import ReaderPool
+
+DEFAULT_DPI = 200
+
+
+def iter_tiff_pages(tiff_path):
+    """Yield (page_number, image) decoding one TIFF page at a time."""
+    page_count = cv2.imcount(tiff_path)
+    for index in range(page_count):
+        ok, mats = cv2.imreadmulti(tiff_path, index, 1, flags=cv2.IMREAD_COLOR)
+        yield index + 1, mats[0] if ok and mats else None
+
+
+def iter_pdf_pages(pdf_path, dpi=DEFAULT_DPI):
+    """Yield (page_number, image) rasterizing one PDF page at a time at the given DPI."""
+    try:
+        import fitz
+    except ImportError:
+        raise ImportError("PDF input requires PyMuPDF (pip install pymupdf)")
+    with fitz.open(pdf_path) as doc:
+        for index, page in enumerate(doc):
+            pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csRGB, alpha=False)
+            rgb = np.frombuffer(pix.samples, np.uint8).reshape(pix.height, pix.width, 3)
+            yield index + 1, cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+
+
+def iter_pages(path, dpi=DEFAULT_DPI):
+    lower = path.lower()
+    if lower.endswith('.pdf'):
+        return iter_pdf_pages(path, dpi=dpi)
+    if lower.endswith(('.tif', '.tiff')):
+        return iter_tiff_pages(path)
+    return iter([(1, cv2.imread(path))])
+
+
+def process_pages(path, handler, dpi=DEFAULT_DPI, max_workers=4):
+    """Run handler(image) on every page of path concurrently.
+
+    Pages are decoded only as workers free up, so at most about 2 * max_workers
+    decoded pages are held in memory. Returns a list of
+    {"page": n, "result": ...} dicts in page order; a page whose handler
+    raised gets {"page": n, "Error": ...} and the other pages still finish.
+    """
+    results = []
+    pending = []
+
+    def collect(page_number, future):
+        try:
+            results.append({"page": page_number, "result": future.result()})
+        except Exception as e:
+            print(f"Error processing page {page_number}: {e}")
+            results.append({"page": page_number, "Error": str(e)})
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for page_number, image in iter_pages(path, dpi=dpi):
+            if image is None:
+                results.append({"page": page_number, "result": None, "Error": "Page not decoded."})
+                continue
+            pending.append((page_number, pool.submit(handler, image)))
+            if len(pending) >= max_workers * 2:
+                collect(*pending.pop(0))
+        for page_number, future in pending:
+            collect(page_number, future)
+    return sorted(results, key=lambda r: r["page"])
+
+
+def extract_passport_pages(path, passport_reader, dpi=DEFAULT_DPI, max_workers=4):
+    return process_pages(path, passport_reader.extract_passport_details_from_image,
+                         dpi=dpi, max_workers=max_workers)
+
+
+def extract_license_pages(path, reader_factory=None, dpi=DEFAULT_DPI, max_workers=4,
+                          threads_per_reader=None):
+    """License fields for every page of path.
+
+    An easyocr reader is not safe to share between threads, so the page
+    workers borrow one of max_workers readers from a ReaderPool built with
+    reader_factory (inference_backend.create_reader by default).
+    """
+    # Imported here so passport-only callers do not pull in easyocr
+    from driving_test import check_and_prepare, parse_driver_license_results, recognize_license
+    from quality_gate import rejected_or_error
+    readers = ReaderPool(max_workers, threads_per_reader, reader_factory=reader_factory)
+
+    def handle(image):
+        card, processed_img, quality = check_and_prepare(image)
+        if processed_img is None:
+            return rejected_or_error(quality)
+        with readers.reader() as reader:
+            ocr_results = recognize_license(reader, processed_img, card)
+        details, kv_pairs, confidences = parse_driver_license_results(ocr_results)
+        return {"extracted_details": details, "field_confidence": confidences}
+
+    return process_pages(path, handle, dpi=dpi, max_workers=max_workers)
+
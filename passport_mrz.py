@@ -0,0 +1,279 @@
+import json
+import os
+import re
+
+import cv2
+import numpy as np
+
+from card_rectify import detect_and_rectify
+from memory_budget import buffer_pool, default_budget, MemoryBudgetExceeded, MRZ_SEARCH_BYTES_PER_PIXEL
+from mrz_dates import get_converter
+from orientation import auto_orient
+from pipeline_config import profile
+from quality_gate import check_quality, rejection
+from recognition_only import projection_line_boxes, recognize_boxes
+from resolution_policy import rescale_for_text
+
+MRZ_ALLOWLIST = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789<"
+MRZ_LENGTH = 44
+# Share of the box's far corner coordinates added as padding before reading the MRZ
+MRZ_PAD_RATIO = 0.03
+SEX_LABELS = {'M': 'Male', 'F': 'Female', 'X': 'Unspecified', '<': 'Unspecified'}
+
+
+def check_budget(image):
+    """Raise MemoryBudgetExceeded when the MRZ search on image would exceed the worker budget."""
+    default_budget().check(image.shape, MRZ_SEARCH_BYTES_PER_PIXEL, "passport image")
+
+
+def normalize_page(image):
+    """Rectify and turn the data page upright; returns (image, page quad or None, orientation info)."""
+    image, page_quad = detect_and_rectify(image, 'passport')
+    image, orientation = auto_orient(image, 'passport')
+    return image, page_quad, orientation
+
+
+def check_and_normalize(image, normalize=True):
+    """Normalize the page, then run the quality gate; returns (page or None, report).
+
+    The gate's MRZ check needs an upright page, so it runs after
+    normalize_page rather than before it.
+    """
+    if normalize:
+        image, page_quad, orientation = normalize_page(image)
+    report = check_quality(image, 'passport')
+    return (image if report["passed"] else None), report
+
+
+def preprocess_image(image):
+    """Upscaled, contrast-equalized, thresholded copy, e.g. for picking the MRZ by hand."""
+    settings = profile('passport')
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    scale_percent = settings['resize']['scale_percent']
+    gray, scale = rescale_for_text(gray, fallback_scale=scale_percent / 100)
+    clahe = cv2.createCLAHE(clipLimit=settings['clahe']['clip_limit'],
+                            tileGridSize=tuple(settings['clahe']['tile_grid']))
+    gray = clahe.apply(gray)
+    thresh = cv2.adaptiveThreshold(
+        gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY,
+        settings['threshold']['block_size'], settings['threshold']['C']
+    )
+    return thresh
+
+
+def _mrz_mask(image, blackhat_kernel, close_kernel, final_close_kernel, blur_ksize=None):
+    # Every step writes into this thread's reused scratch buffers instead of new arrays
+    buffers = buffer_pool()
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=buffers.get('gray', image.shape[:2]))
+    if blur_ksize:
+        cv2.GaussianBlur(gray, (blur_ksize, blur_ksize), 0, dst=gray)
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, tuple(blackhat_kernel))
+    blackhat = cv2.morphologyEx(gray, cv2.MORPH_BLACKHAT, kernel,
+                                dst=buffers.get('blackhat', gray.shape))
+    gradX = cv2.Sobel(blackhat, ddepth=cv2.CV_32F, dx=1, dy=0, ksize=-1,
+                      dst=buffers.get('gradient', gray.shape, np.float32))
+    np.absolute(gradX, out=gradX)
+    (minVal, maxVal) = (np.min(gradX), np.max(gradX))
+    gradX -= minVal
+    gradX /= (maxVal - minVal)
+    gradX *= 255
+    # Same truncating cast as astype("uint8"), into the no longer needed blackhat buffer
+    np.copyto(blackhat, gradX, casting='unsafe')
+    gradX = blackhat
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, tuple(close_kernel))
+    cv2.morphologyEx(gradX, cv2.MORPH_CLOSE, kernel, dst=gradX)
+    thresh = cv2.threshold(gradX, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU, dst=gray)[1]
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, tuple(final_close_kernel))
+    cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel, dst=thresh)
+    return thresh
+
+
+def _locate_largest(image):
+    # The largest text-gradient blob, if it is wide enough to be the MRZ band
+    mrz = profile('passport')['mrz']
+    thresh = _mrz_mask(image, mrz['blackhat_kernel'], mrz['close_kernel'], mrz['final_close_kernel'])
+    contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if len(contours) == 0:
+        return None
+    largest_contour = max(contours, key=cv2.contourArea)
+    x, y, w, h = cv2.boundingRect(largest_contour)
+    aspect_ratio = w / float(h)
+    if aspect_ratio < mrz['min_aspect_ratio']:
+        return None
+    return (x, y, w, h)
+
+
+def _locate_wide_band(image):
+    # The first blob spanning most of the page width, else the bottom band where the MRZ is printed
+    band = profile('passport')['mrz_wide_band']
+    thresh = _mrz_mask(image, band['blackhat_kernel'], band['close_kernel'], band['final_close_kernel'],
+                       blur_ksize=band['blur_ksize'])
+    contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    H, W = thresh.shape
+    for c in contours:
+        (x, y, w, h) = cv2.boundingRect(c)
+        if w / float(W) > band['min_width_ratio'] and h / float(H) > band['min_height_ratio']:
+            return (x, y, w, h)
+    h_crop = int(H * band['fallback_height_ratio'])
+    return (0, H - h_crop, W, h_crop)
+
+
+# Both share one gradient mask; they differ only in how the band is picked from it
+MRZ_LOCATORS = {
+    'largest': _locate_largest,
+    'wide_band': _locate_wide_band,
+}
+
+
+def find_mrz_region(image, locator='largest'):
+    """(x, y, w, h) of the MRZ band, or None when the 'largest' locator finds no wide enough blob."""
+    check_budget(image)
+    return MRZ_LOCATORS[locator](image)
+
+
+def _read_easyocr(mrz_region, reader, line_boxes=None):
+    mrz_region_rgb = cv2.cvtColor(mrz_region, cv2.COLOR_BGR2RGB)
+    # A tight MRZ band splits cleanly into its 2-3 lines, so skip the detector
+    if line_boxes is None:
+        line_boxes = projection_line_boxes(mrz_region)
+    if 2 <= len(line_boxes) <= 3:
+        results = recognize_boxes(reader, mrz_region_rgb, line_boxes, allowlist=MRZ_ALLOWLIST)
+    else:
+        # Use paragraph=False to keep lines separate
+        results = reader.readtext(mrz_region_rgb, detail=0, paragraph=False)
+    return "\n".join(results)
+
+
+def _read_tesseract(mrz_region, reader=None, line_boxes=None):
+    # Tesseract is only needed by the PassportReader pipelines
+    import pytesseract
+    return pytesseract.image_to_string(mrz_region, config='--psm 6')
+
+
+MRZ_ENGINES = {
+    'easyocr': _read_easyocr,
+    'tesseract': _read_tesseract,
+}
+
+
+def read_mrz_lines(mrz_region, reader=None, engine='easyocr', line_boxes=None):
+    """OCR an already cropped MRZ region into newline-separated text without spaces."""
+    return MRZ_ENGINES[engine](mrz_region, reader, line_boxes).replace(" ", "")
+
+
+def extract_mrz_text(image, mrz_box, reader=None, engine='easyocr', line_boxes=None):
+    """Crop mrz_box with a small margin and OCR it; returns (mrz_text, mrz_region) or None."""
+    if mrz_box is None:
+        return None
+    x, y, w, h = mrz_box
+    pX = int((x + w) * MRZ_PAD_RATIO)
+    pY = int((y + h) * MRZ_PAD_RATIO)
+    x, y = max(0, x - pX), max(0, y - pY)
+    w, h = w + (pX * 2), h + (pY * 2)
+    mrz_region = image[y:y + h, x:x + w]
+    return read_mrz_lines(mrz_region, reader, engine, line_boxes), mrz_region
+
+
+def clean_and_split_mrz(mrz_text):
+    mrz_text = mrz_text.replace(' ', '').replace('\r', '')
+    lines = [line.strip() for line in mrz_text.split('\n') if line.strip()]
+    # If only one line, try to split into two
+    if len(lines) == 1 and len(lines[0]) >= 2 * MRZ_LENGTH:
+        lines = [lines[0][:MRZ_LENGTH], lines[0][MRZ_LENGTH:2 * MRZ_LENGTH]]
+    # If more than two lines, take the two longest, in order of appearance
+    elif len(lines) > 2:
+        lines = sorted(lines, key=len, reverse=True)[:2]
+        lines = sorted(lines, key=lambda x: mrz_text.find(x))
+    # Ensure both lines are 44 chars
+    lines = [(line + '<' * MRZ_LENGTH)[:MRZ_LENGTH] for line in lines]
+    return lines if len(lines) == 2 else None
+
+
+def mrz_date_to_formats(mrz_date, kind="birth"):
+    """Convert MRZ date (YYMMDD) to both yyyy-mm-dd and dd-mm-yyyy formats."""
+    return get_converter().convert(mrz_date, kind)
+
+
+def parse_mrz_data(mrz_text):
+    if not mrz_text:
+        return None
+    lines = clean_and_split_mrz(mrz_text)
+    if not lines:
+        return None
+    line1, line2 = (re.sub(r'[^A-Z0-9<]', '<', line.upper()) for line in lines)
+    print("MRZ line 1:", line1)
+    print("MRZ line 2:", line2)
+    parsed_data = {}
+    try:
+        parsed_data['document_type'] = line1[0]
+        parsed_data['issuing_country'] = line1[2:5]
+        name_field = line1[5:44]
+        if '<<' in name_field:
+            surname, given_names = name_field.split('<<', 1)
+            parsed_data['surname'] = surname.replace('<', ' ').strip()
+            parsed_data['given_names'] = given_names.replace('<', ' ').strip() or "Not found"
+        else:
+            parsed_data['surname'] = name_field.replace('<', ' ').strip()
+            parsed_data['given_names'] = "Not found"
+        parsed_data['passport_number'] = line2[0:9].replace('<', '')
+        parsed_data['nationality'] = line2[10:13]
+        parsed_data['date_of_birth'] = line2[13:19]
+        ymd, dmy = mrz_date_to_formats(parsed_data['date_of_birth'])
+        parsed_data['date_of_birth_yyyy_mm_dd'] = ymd
+        parsed_data['date_of_birth_dd_mm_yyyy'] = dmy
+        parsed_data['sex'] = SEX_LABELS.get(line2[20], 'Unspecified')
+        parsed_data['expiry_date'] = line2[21:27]
+        ymd, dmy = mrz_date_to_formats(parsed_data['expiry_date'], kind="expiry")
+        parsed_data['expiry_date_yyyy_mm_dd'] = ymd
+        parsed_data['expiry_date_dd_mm_yyyy'] = dmy
+    except Exception as e:
+        print(f"Error parsing MRZ: {e}")
+        return None
+    return parsed_data
+
+
+def extract_passport(image, reader=None, engine='easyocr', locator='largest', normalize=True,
+                     parse=parse_mrz_data):
+    """Run every passport stage on a decoded image.
+
+    Returns {'raw_mrz_text', 'parsed_data'}, or None when no MRZ is found.
+    A page the quality gate rejects, or one over the memory budget, gets
+    both set to None plus an "Error" entry. reader is only needed for the
+    'easyocr' engine; parse turns the MRZ text into parsed_data.
+    """
+    try:
+        # Checked on the decoded page, before rectifying and orienting a copy of it
+        check_budget(image)
+        page, report = check_and_normalize(image, normalize)
+        if page is None:
+            return {'raw_mrz_text': None, 'parsed_data': None, **rejection(report)}
+        image = page
+        mrz_box = find_mrz_region(image, locator)
+    except MemoryBudgetExceeded as e:
+        print(f"Error: {e}")
+        return {'raw_mrz_text': None, 'parsed_data': None, "Error": str(e)}
+    if mrz_box is None:
+        print("MRZ region not found in the image")
+        return None
+    mrz_text, mrz_region = extract_mrz_text(image, mrz_box, reader, engine)
+    return {
+        'raw_mrz_text': mrz_text,
+        'parsed_data': parse(mrz_text)
+    }
+
+
+def save_results(result, output_folder="output", base_filename="passport_data"):
+    os.makedirs(output_folder, exist_ok=True)
+    json_path = os.path.join(output_folder, f"{base_filename}.json")
+    with open(json_path, "w", encoding="utf-8") as json_file:
+        json.dump(result, json_file, indent=4)
+    txt_path = os.path.join(output_folder, f"{base_filename}.txt")
+    with open(txt_path, "w", encoding="utf-8") as txt_file:
+        txt_file.write("Raw MRZ Text:\n")
+        txt_file.write(repr(result['raw_mrz_text']) + "\n\n")
+        txt_file.write("Parsed Data:\n")
+        if result['parsed_data']:
+            for key, value in result['parsed_data'].items():
+                txt_file.write(f"{key.replace('_', ' ').title()}: {value}\n")
+        else:
+            txt_file.write("Could not parse MRZ data\n")
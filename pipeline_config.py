@@ -0,0 +1,224 @@
+import copy
+import json
+import os
+import threading
+
+# Path of a YAML or JSON pipeline config; unset means the built-in defaults
+CONFIG_ENV = "OCR_PIPELINE_CONFIG"
+
+# Per-document profiles with the values the pipelines were tuned with. A config
+# file only needs the keys it changes; everything else falls back to these.
+DEFAULT_CONFIG = {
+    'license': {
+        # char_height/max_upscale: resolution_policy.rescale_for_text; target_width is
+        # used when no text height can be estimated
+        'resize': {'target_width': 800, 'char_height': 24, 'max_upscale': 3.0},
+        'denoise': {'h': 25, 'template_window': 7, 'search_window': 21},
+        'blur': {'ksize': 3},
+        'threshold': {'block_size': 31, 'C': 10},
+        # Threshold the card with the preprocess planner's best-ranked variant instead of the fixed chain
+        'preprocess': {'planner': False},
+        # early_exit: stop recognizing once the key fields are read confidently (incremental_extraction);
+        # field_retry: re-read weak fields from crops of the unthresholded card where the caller has it
+        'recognition': {'early_exit': False, 'field_retry': False},
+    },
+    'ssn': {
+        'denoise': {'h': 30, 'template_window': 7, 'search_window': 21},
+        'threshold': {'block_size': 31, 'C': 10},
+        # easyocr_ssn.extract_fields_easyocr, and field_retry's cut for name lines worth re-reading
+        'fields': {'name_min_conf': 0.7},
+        # easyocr_test_ssn.extract_fields_easyocr
+        'flexible_fields': {
+            'ssn_min_conf': 0.3,
+            'keyword_min_conf': 0.1,
+            'name_min_conf': 0.5,
+            'name_fallback_min_conf': 0.8,
+            'signature_min_conf': 0.3,
+        },
+        'preprocess': {'planner': False},
+        'recognition': {'early_exit': False, 'field_retry': False},
+    },
+    'passport': {
+        'resize': {'scale_percent': 200},
+        'clahe': {'clip_limit': 2.0, 'tile_grid': [8, 8]},
+        'threshold': {'block_size': 31, 'C': 10},
+        'mrz': {
+            'blackhat_kernel': [13, 5],
+            'close_kernel': [25, 7],
+            'final_close_kernel': [7, 7],
+            'min_aspect_ratio': 2.0,
+        },
+        # passport_mrz 'wide_band' locator: a band spanning most of the width, else the page bottom
+        'mrz_wide_band': {
+            'blur_ksize': 3,
+            'blackhat_kernel': [13, 5],
+            'close_kernel': [13, 5],
+            'final_close_kernel': [21, 21],
+            'min_width_ratio': 0.7,
+            'min_height_ratio': 0.03,
+            'fallback_height_ratio': 0.22,
+        },
+    },
+}
+
+# Keys that OpenCV requires to be odd (window and block sizes)
+ODD_KEYS = {'template_window', 'search_window', 'ksize', 'blur_ksize', 'block_size'}
+# Keys holding a share or a confidence
+UNIT_KEYS = {'ssn_min_conf', 'keyword_min_conf', 'name_min_conf', 'name_fallback_min_conf',
+             'signature_min_conf', 'min_width_ratio', 'min_height_ratio', 'fallback_height_ratio'}
+# Keys that may be zero or negative
+SIGNED_KEYS = {'C'}
+
+
+class PipelineConfigError(ValueError):
+    pass
+
+
+def _check_value(where, key, value, default):
+    if isinstance(default, list):
+        if (not isinstance(value, list) or len(value) != len(default)
+                or not all(isinstance(v, int) and not isinstance(v, bool) and v > 0 for v in value)):
+            raise PipelineConfigError(f"{where}: expected {len(default)} positive integers, got {value!r}")
+        return list(value)
+    if isinstance(default, bool):
+        if not isinstance(value, bool):
+            raise PipelineConfigError(f"{where}: expected true or false, got {value!r}")
+        return value
+    if isinstance(default, float):
+        valid = isinstance(value, (int, float)) and not isinstance(value, bool)
+    else:
+        valid = isinstance(value, int) and not isinstance(value, bool)
+    if not valid:
+        raise PipelineConfigError(f"{where}: expected {type(default).__name__}, got {value!r}")
+    if key in UNIT_KEYS and not 0.0 <= value <= 1.0:
+        raise PipelineConfigError(f"{where}: must be between 0 and 1, got {value!r}")
+    if key not in UNIT_KEYS and key not in SIGNED_KEYS and value <= 0:
+        raise PipelineConfigError(f"{where}: must be positive, got {value!r}")
+    if key in ODD_KEYS and value % 2 == 0:
+        raise PipelineConfigError(f"{where}: must be odd, got {value!r}")
+    if key == 'block_size' and value < 3:
+        raise PipelineConfigError(f"{where}: must be at least 3, got {value!r}")
+    return float(value) if isinstance(default, float) else value
+
+
+def _merge(overrides, defaults, where):
+    if not isinstance(overrides, dict):
+        raise PipelineConfigError(f"{where or 'config'}: expected a mapping, got {overrides!r}")
+    merged = copy.deepcopy(defaults)
+    for key, value in overrides.items():
+        path = f"{where}.{key}" if where else str(key)
+        if key not in defaults:
+            raise PipelineConfigError(f"{path}: unknown key (expected one of {', '.join(sorted(defaults))})")
+        if isinstance(defaults[key], dict):
+            merged[key] = _merge(value, defaults[key], path)
+        else:
+            merged[key] = _check_value(path, key, value, defaults[key])
+    return merged
+
+
+def validate(overrides, defaults=DEFAULT_CONFIG):
+    """Merge overrides over defaults, rejecting unknown keys and out-of-range values.
+
+    Raises PipelineConfigError naming the offending key path, e.g.
+    "license.threshold.block_size: must be odd, got 30". None means no
+    overrides; anything else must be a mapping.
+    """
+    return _merge({} if overrides is None else overrides, defaults, "")
+
+
+def load_config_file(path):
+    """Parse a .yaml/.yml or .json config file into a dict (unvalidated)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    if path.endswith(('.yaml', '.yml')):
+        # PyYAML is only needed when a YAML config is used
+        import yaml
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+    # An empty file means no overrides; any other non-mapping is left for validate to reject
+    return {} if data is None else data
+
+
+def save_config_file(config, path):
+    """Write config as YAML or JSON by extension, atomically."""
+    if path.endswith(('.yaml', '.yml')):
+        import yaml
+        data = yaml.safe_dump(config, sort_keys=False)
+    else:
+        data = json.dumps(config, indent=4)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class PipelineConfig:
+    """Validated per-document profiles, loaded once and optionally reloaded when the file changes.
+
+    A reload swaps in a whole new set of profiles, so a caller that takes
+    profile(doc_type) once per image sees consistent values for that image.
+    A file that fails validation on reload is reported and the previous
+    profiles stay in effect.
+    """
+
+    def __init__(self, path=None, overrides=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime_ns = None
+        file_overrides = {}
+        if path:
+            self._mtime_ns = os.stat(path).st_mtime_ns
+            file_overrides = load_config_file(path)
+        profiles = validate(file_overrides)
+        self._profiles = validate(overrides, profiles) if overrides is not None else profiles
+
+    @classmethod
+    def from_env(cls):
+        return cls(os.environ.get(CONFIG_ENV) or None)
+
+    def profile(self, doc_type):
+        return self._profiles[doc_type]
+
+    def as_dict(self):
+        return copy.deepcopy(self._profiles)
+
+    def reload_if_changed(self):
+        """Reload the file if its mtime changed; returns True when new profiles took effect."""
+        if not self.path:
+            return False
+        with self._lock:
+            try:
+                mtime_ns = os.stat(self.path).st_mtime_ns
+                if mtime_ns == self._mtime_ns:
+                    return False
+                self._mtime_ns = mtime_ns
+                profiles = validate(load_config_file(self.path))
+            except Exception as e:
+                # A half-written or invalid file must not stop a long-running worker
+                print(f"Keeping previous pipeline config: {e}")
+                return False
+            self._profiles = profiles
+        print(f"Reloaded pipeline config from {self.path}")
+        return True
+
+
+_config = None
+
+
+def get_config():
+    global _config
+    if _config is None:
+        _config = PipelineConfig.from_env()
+    return _config
+
+
+def set_config(config):
+    """Replace the process-wide config, e.g. with a --config file or an auto-tuner trial."""
+    global _config
+    _config = config
+
+
+def profile(doc_type):
+    """The current settings for doc_type ('license', 'ssn' or 'passport')."""
+    return get_config().profile(doc_type)
@@ -0,0 +1,215 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import time
+
+import cv2
+
+from pipeline_config import PipelineConfig, get_config, set_config, load_config_file, save_config_file
+
+DEFAULT_LABELS_FILE = "labels.json"
+DEFAULT_MAX_TRIALS = 50
+
+# "section.key" -> values tried per document type; the current config is always trial 0
+DEFAULT_SWEEPS = {
+    'license': {
+        'denoise.h': [15, 25, 35],
+        'threshold.block_size': [21, 31, 41],
+        'threshold.C': [5, 10, 15],
+        'resize.char_height': [18, 24, 30],
+        'resize.max_upscale': [2.0, 3.0],
+    },
+    'ssn': {
+        'denoise.h': [20, 30, 40],
+        'threshold.block_size': [21, 31, 41],
+        'fields.name_min_conf': [0.5, 0.6, 0.7, 0.8],
+    },
+    'passport': {
+        'mrz.blackhat_kernel': [[13, 5], [17, 7]],
+        'mrz.close_kernel': [[21, 5], [25, 7], [31, 9]],
+        'mrz.min_aspect_ratio': [1.5, 2.0, 3.0],
+    },
+}
+
+
+# The license and SSN extractors take the same gate, preprocessing and recognition
+# path as the pipelines, so a trial measures what a config change would ship.
+def _license_fields(reader, img):
+    from driving_test import check_and_prepare, recognize_license, parse_driver_license_results
+    card, processed_img, report = check_and_prepare(img, reader)
+    if processed_img is None:
+        return {}
+    details, kv_pairs, confidences = parse_driver_license_results(recognize_license(reader, processed_img, card))
+    return details
+
+
+def _ssn_fields(reader, img):
+    from easyocr_ssn import check_and_prepare, recognize_ssn, extract_fields_easyocr
+    card, processed_img, report = check_and_prepare(img, reader)
+    if processed_img is None:
+        return {}
+    ssn, name, signature = extract_fields_easyocr(recognize_ssn(reader, processed_img, card))
+    return {"SSN_Number": ssn, "Printed_Name": name, "Signature": signature}
+
+
+def _passport_fields(reader, img):
+    from passport_mrz import extract_passport
+    result = extract_passport(img, reader)
+    return (result and result['parsed_data']) or {}
+
+
+# Each returns a flat {field: value} dict comparable with the benchmark labels
+EXTRACTORS = {
+    'license': _license_fields,
+    'ssn': _ssn_fields,
+    'passport': _passport_fields,
+}
+
+
+def load_benchmark(directory, labels_path=None):
+    """(name, image, expected fields) for every labelled image in directory.
+
+    labels_path (default directory/labels.json) maps image file names to the
+    fields the extractor should return, e.g. {"pa_01.jpg": {"DL No": "12345678"}}.
+    """
+    labels_path = labels_path or os.path.join(directory, DEFAULT_LABELS_FILE)
+    with open(labels_path, 'r', encoding='utf-8') as f:
+        labels = json.load(f)
+    samples = []
+    for name, expected in sorted(labels.items()):
+        img = cv2.imread(os.path.join(directory, name))
+        if img is None:
+            print(f"Skipping {name}: could not read image")
+            continue
+        samples.append((name, img, expected))
+    return samples
+
+
+def _normalize(value):
+    return " ".join(str(value).upper().split())
+
+
+def field_accuracy(extracted, expected):
+    """Share of the expected fields extracted with exactly the labelled value."""
+    if not expected:
+        return 1.0
+    hits = sum(_normalize(extracted.get(field, "")) == _normalize(value) for field, value in expected.items())
+    return hits / float(len(expected))
+
+
+def sweep_trials(sweep, max_trials=DEFAULT_MAX_TRIALS, seed=0):
+    """Parameter combinations of a {"section.key": [values]} grid, sampled down to max_trials."""
+    keys = list(sweep)
+    trials = [dict(zip(keys, values)) for values in itertools.product(*(sweep[k] for k in keys))]
+    if max_trials and len(trials) > max_trials:
+        trials = random.Random(seed).sample(trials, max_trials)
+    return trials
+
+
+def _overrides(doc_type, params):
+    profile = {}
+    for dotted, value in params.items():
+        section, key = dotted.split('.', 1)
+        profile.setdefault(section, {})[key] = value
+    return {doc_type: profile}
+
+
+def run_trial(reader, samples, doc_type, config):
+    """Seconds per image and mean field accuracy of doc_type's pipeline under config."""
+    extract = EXTRACTORS[doc_type]
+    previous = get_config()
+    set_config(config)
+    try:
+        accuracy = 0.0
+        start = time.perf_counter()
+        for name, img, expected in samples:
+            accuracy += field_accuracy(extract(reader, img), expected)
+        seconds = time.perf_counter() - start
+    finally:
+        set_config(previous)
+    count = max(len(samples), 1)
+    return seconds / count, accuracy / count
+
+
+def pareto_front(results):
+    """Trials no other trial beats on both speed and accuracy, fastest first."""
+    front = []
+    for result in sorted(results, key=lambda r: (r['seconds_per_image'], -r['accuracy'])):
+        if not front or result['accuracy'] > front[-1]['accuracy']:
+            front.append(result)
+    return front
+
+
+def choose(results, min_accuracy=None):
+    """Fastest trial reaching min_accuracy, or the most accurate (then fastest) trial."""
+    if min_accuracy is not None:
+        passing = [r for r in results if r['accuracy'] >= min_accuracy]
+        if passing:
+            return min(passing, key=lambda r: r['seconds_per_image'])
+        print(f"No trial reached accuracy {min_accuracy}; choosing the most accurate")
+    return max(results, key=lambda r: (r['accuracy'], -r['seconds_per_image']))
+
+
+def _summary(result):
+    return {k: v for k, v in result.items() if k != 'config'}
+
+
+def tune(reader, samples, doc_type, sweep=None, base_path=None, max_trials=DEFAULT_MAX_TRIALS,
+         min_accuracy=None):
+    """Sweep doc_type's parameters over the benchmark samples.
+
+    Each trial is the base config (base_path, else defaults) with one
+    combination of sweep values applied. Returns {"trials", "pareto",
+    "chosen"}; "chosen" carries the full config to save.
+    """
+    sweep = sweep or DEFAULT_SWEEPS[doc_type]
+    results = []
+    for i, params in enumerate([{}] + sweep_trials(sweep, max_trials)):
+        try:
+            config = PipelineConfig(base_path, _overrides(doc_type, params))
+        except ValueError as e:
+            print(f"Skipping {params}: {e}")
+            continue
+        seconds, accuracy = run_trial(reader, samples, doc_type, config)
+        print(f"Trial {i}: {params or 'current config'} -> {accuracy:.1%} at {seconds:.3f} s/image")
+        results.append({"params": params, "seconds_per_image": round(seconds, 4),
+                        "accuracy": round(accuracy, 4), "config": config.as_dict()})
+    return {"trials": [_summary(r) for r in results],
+            "pareto": [_summary(r) for r in pareto_front(results)],
+            "chosen": choose(results, min_accuracy)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep pipeline parameters against a labelled benchmark set.")
+    parser.add_argument("document", choices=sorted(EXTRACTORS))
+    parser.add_argument("benchmark", help="directory of benchmark images")
+    parser.add_argument("--labels", help=f"expected fields per image (default: <benchmark>/{DEFAULT_LABELS_FILE})")
+    parser.add_argument("--sweep", help="YAML or JSON {\"section.key\": [values]} grid for the document")
+    parser.add_argument("--config", help="base pipeline config the sweep starts from")
+    parser.add_argument("--max-trials", type=int, default=DEFAULT_MAX_TRIALS)
+    parser.add_argument("--min-accuracy", type=float,
+                        help="choose the fastest trial at or above this accuracy instead of the most accurate")
+    parser.add_argument("--report", default="tuning_report.json")
+    parser.add_argument("--write", help="save the chosen config to this YAML or JSON file")
+    args = parser.parse_args()
+
+    from inference_backend import create_reader
+    reader = create_reader(['en'])
+    samples = load_benchmark(args.benchmark, args.labels)
+    sweep = load_config_file(args.sweep) if args.sweep else None
+    report = tune(reader, samples, args.document, sweep, args.config, args.max_trials, args.min_accuracy)
+
+    chosen = report["chosen"]
+    print(f"Chosen: {chosen['params'] or 'current config'} -> {chosen['accuracy']:.1%} "
+          f"at {chosen['seconds_per_image']:.3f} s/image")
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=4)
+    if args.write:
+        save_config_file(chosen["config"], args.write)
+        print(f"Saved config to {args.write}")
+
+
+if __name__ == "__main__":
+    main()
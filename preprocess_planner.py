@@ -0,0 +1,256 @@
+import json
+import os
+import threading
+import time
+
+import cv2
+
+from quality_gate import gate, rejection
+from resolution_policy import rescale_for_text
+from incremental_extraction import SSN_PATTERN, DL_NO_PATTERN
+
+DEFAULT_STATS_PATH = "preprocess_stats.json"
+# Untried variants are assumed to succeed this often until they have a record
+PRIOR_WIN_RATE = 0.5
+MRZ_MIN_LINE_LENGTH = 30
+
+
+# Each hand-tuned chain is imported only when its variant runs, so a planner
+# for one document type does not pull in the others' dependencies. Variants
+# take the prepared card (see CARDS), as the pipelines' check_and_prepare does.
+def _license_nlm_adaptive(card):
+    from driving_test import preprocess_resized_image
+    return preprocess_resized_image(card)
+
+
+def _ssn_nlm_sharpen_adaptive(img):
+    from easyocr_ssn import preprocess_image
+    return preprocess_image(img)
+
+
+def _ssn_sharpen_otsu_deskew(img):
+    from ssn import preprocess_loaded_image
+    return preprocess_loaded_image(img)
+
+
+def _passport_clahe_adaptive(img):
+    from passport_mrz import preprocess_image
+    return preprocess_image(img)
+
+
+def _gray(img):
+    img, scale = rescale_for_text(img)
+    return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+
+def _clahe(img):
+    return cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8)).apply(_gray(img))
+
+
+# Declaration order is the ranking used before any outcome has been recorded
+VARIANTS = {
+    'license': {
+        'nlm_adaptive': _license_nlm_adaptive,
+        'clahe': _clahe,
+        'gray': _gray,
+    },
+    'ssn': {
+        'nlm_sharpen_adaptive': _ssn_nlm_sharpen_adaptive,
+        'sharpen_otsu_deskew': _ssn_sharpen_otsu_deskew,
+        'clahe': _clahe,
+        'gray': _gray,
+    },
+    'passport': {
+        'clahe_adaptive': _passport_clahe_adaptive,
+        'clahe': _clahe,
+        'gray': _gray,
+    },
+}
+
+
+def license_valid(ocr_results):
+    """A known state and a plausible DL number were read."""
+    from driving_test import parse_driver_license_results
+    details, kv_pairs, confidences = parse_driver_license_results(ocr_results)
+    dl_no = details['DL No']
+    return (details['State'] != "Not Found" and bool(DL_NO_PATTERN.fullmatch(dl_no))
+            and not dl_no.isalpha())
+
+
+def ssn_valid(ocr_results):
+    """A 9-digit SSN was read."""
+    from easyocr_ssn import extract_fields_easyocr
+    ssn, name, signature = extract_fields_easyocr(ocr_results)
+    return bool(SSN_PATTERN.fullmatch(ssn))
+
+
+def passport_valid(ocr_results):
+    """The last two MRZ-like lines pass the number, birth and expiry check digits."""
+    from mrz_batch import parse_mrz_batch
+    lines = [text.replace(' ', '') for (bbox, text, conf) in ocr_results]
+    mrz_lines = [line for line in lines if '<' in line and len(line) >= MRZ_MIN_LINE_LENGTH]
+    if len(mrz_lines) < 2:
+        return False
+    parsed = parse_mrz_batch([mrz_lines[-2]], [mrz_lines[-1]])
+    return bool(parsed['passport_number_check_ok'][0] and parsed['date_of_birth_check_ok'][0]
+                and parsed['expiry_date_check_ok'][0])
+
+
+VALIDATORS = {
+    'license': license_valid,
+    'ssn': ssn_valid,
+    'passport': passport_valid,
+}
+
+
+def _license_card(img, reader):
+    from driving_test import resize_for_ocr
+    return gate(img, 'license', lambda image: resize_for_ocr(image, reader))
+
+
+def _ssn_card(img, reader):
+    from card_rectify import detect_and_rectify
+    from orientation import auto_orient
+
+    def prepare(image):
+        card, card_quad = detect_and_rectify(image)
+        card, orientation = auto_orient(card, reader=reader)
+        return card
+    return gate(img, 'ssn', prepare)
+
+
+def _passport_page(img, reader):
+    from passport_mrz import check_and_normalize
+    return check_and_normalize(img)
+
+
+# Quality-gate a raw image and bring it to the card the variants start from; (card or None, report)
+CARDS = {
+    'license': _license_card,
+    'ssn': _ssn_card,
+    'passport': _passport_page,
+}
+
+
+def _readtext(reader, processed):
+    return reader.readtext(processed, detail=1)
+
+
+class PreprocessPlanner:
+    """Try preprocessing variants per document type, cheapest expected success first.
+
+    Every attempt is recorded as (tries, wins, seconds) per document type and
+    variant. Variants are ranked by average seconds per attempt divided by
+    their win rate, so a fast chain that usually passes validation runs
+    before a slow or unreliable one. Stats are kept in a JSON file when
+    stats_path is given.
+    """
+
+    def __init__(self, stats_path=DEFAULT_STATS_PATH, variants=None, validators=None):
+        self.stats_path = stats_path
+        self.variants = variants or VARIANTS
+        self.validators = validators or VALIDATORS
+        self._lock = threading.Lock()
+        self.stats = {}
+        if stats_path and os.path.exists(stats_path):
+            with open(stats_path, 'r', encoding='utf-8') as f:
+                self.stats = json.load(f)
+
+    def _expected_cost(self, record, default_seconds):
+        if not record or not record['tries']:
+            return default_seconds / PRIOR_WIN_RATE
+        # Laplace smoothing keeps one early failure from burying a variant
+        win_rate = (record['wins'] + 1) / (record['tries'] + 2)
+        return (record['seconds'] / record['tries']) / win_rate
+
+    def ranked(self, doc_type):
+        """Variant names for doc_type in the order they should be tried."""
+        names = list(self.variants[doc_type])
+        with self._lock:
+            records = dict(self.stats.get(doc_type, {}))
+        tried = [r for r in records.values() if r['tries']]
+        if not tried:
+            return names
+        default_seconds = sum(r['seconds'] / r['tries'] for r in tried) / len(tried)
+        order = {name: i for i, name in enumerate(names)}
+        return sorted(names, key=lambda n: (self._expected_cost(records.get(n), default_seconds), order[n]))
+
+    def record(self, doc_type, variant, passed, seconds):
+        with self._lock:
+            record = self.stats.setdefault(doc_type, {}).setdefault(
+                variant, {'tries': 0, 'wins': 0, 'seconds': 0.0})
+            record['tries'] += 1
+            record['wins'] += int(passed)
+            record['seconds'] += seconds
+
+    def save(self):
+        if not self.stats_path:
+            return
+        with self._lock:
+            data = json.dumps(self.stats, indent=4)
+        tmp_path = self.stats_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, self.stats_path)
+
+    def preprocess(self, card, doc_type):
+        """Preprocess card with the top-ranked variant for doc_type, without OCR or recording."""
+        return self.variants[doc_type][self.ranked(doc_type)[0]](card)
+
+    def run(self, reader, img, doc_type, recognize=_readtext, max_variants=None):
+        """Preprocess and OCR the prepared card img with ranked variants until one passes doc_type's validator.
+
+        Returns a dict with the OCR results, the variant that produced them,
+        whether they passed and the variants tried. When none passes, the
+        results of the top-ranked variant are returned. A variant returning
+        None instead of an image is recorded as a failure.
+        """
+        validate = self.validators[doc_type]
+        names = self.ranked(doc_type)[:max_variants]
+        tried = []
+        first = None
+        for name in names:
+            start = time.perf_counter()
+            processed = self.variants[doc_type][name](img)
+            # A chain that rejects the image (e.g. over the memory budget) counts as a failed try
+            results = recognize(reader, processed) if processed is not None else []
+            passed = bool(results) and validate(results)
+            self.record(doc_type, name, passed, time.perf_counter() - start)
+            tried.append(name)
+            if passed:
+                return {"results": results, "variant": name, "passed": True, "tried": tried}
+            if first is None:
+                first = (name, results)
+        name, results = first if first else (None, [])
+        return {"results": results, "variant": name, "passed": False, "tried": tried}
+
+
+_default_planner = None
+
+
+def default_planner():
+    """Planner the pipelines consult when preprocess.planner is set, reading DEFAULT_STATS_PATH once."""
+    global _default_planner
+    if _default_planner is None:
+        _default_planner = PreprocessPlanner()
+    return _default_planner
+
+
+def run_planned(reader, images, doc_type, stats_path=DEFAULT_STATS_PATH, max_variants=None):
+    """Plan each (name, image) pair in turn and persist the updated stats once at the end.
+
+    Each image is quality-gated and prepared into a card first; a rejected
+    image gets the gate's rejection instead of an outcome and is not recorded.
+    """
+    planner = PreprocessPlanner(stats_path)
+    outcomes = {}
+    try:
+        for image_name, img in images:
+            card, report = CARDS[doc_type](img, reader)
+            if card is None:
+                outcomes[image_name] = rejection(report)
+                continue
+            outcomes[image_name] = planner.run(reader, card, doc_type, max_variants=max_variants)
+    finally:
+        planner.save()
+    return outcomes
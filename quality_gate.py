@@ -0,0 +1,155 @@
+import cv2
+import numpy as np
+
+# Quality is judged on a copy no larger than this, which keeps the gate in the millisecond range
+ASSESS_MAX_SIDE = 640
+
+MIN_SHARPNESS = 50.0        # variance of the Laplacian
+# Exposure is judged inside the text region only, so white paper or a dark desk around
+# the document does not count: ink this light is washed out, paper this dark is too dim
+MAX_INK_LEVEL = 160         # 2nd percentile of the region
+MIN_PAPER_LEVEL = 60        # 98th percentile of the region
+TEXT_REGION_MARGIN = 0.05   # share of the image side added around the text bounding box
+MIN_TEXT_COVERAGE = 0.02    # share of the image covered by text-like strokes
+MAX_EDGE_TEXT_RATIO = 0.2  # share of text blobs touching the image border
+MIN_MRZ_WIDTH_RATIO = 0.5   # MRZ box width relative to the image width
+
+
+def _downscale_gray(image, max_side=ASSESS_MAX_SIDE):
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    h, w = gray.shape[:2]
+    scale = max_side / float(max(h, w))
+    if scale < 1.0:
+        gray = cv2.resize(gray, (max(1, int(w * scale)), max(1, int(h * scale))),
+                          interpolation=cv2.INTER_AREA)
+    return gray
+
+
+def text_mask(gray):
+    # Dark strokes on a lighter card: blackhat picks them out, a wide close joins letters into words
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (9, 3))
+    blackhat = cv2.morphologyEx(gray, cv2.MORPH_BLACKHAT, kernel)
+    _, mask = cv2.threshold(blackhat, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    if blackhat.max() < 16:
+        # Otsu on a flat image splits noise; there is no text to find
+        mask[:] = 0
+    return cv2.morphologyEx(mask, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (15, 3)))
+
+
+def _edge_text_ratio(mask):
+    # A photo cropped through the document cuts words at the border; a whole card leaves a margin
+    count, labels, stats, centroids = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    if count <= 1:
+        return 0.0
+    h, w = mask.shape
+    x, y, bw, bh = (stats[1:, i] for i in range(4))
+    touching = (x == 0) | (y == 0) | (x + bw >= w) | (y + bh >= h)
+    return float(touching.mean())
+
+
+def text_region(mask, margin=TEXT_REGION_MARGIN):
+    """(y0, y1, x0, x1) around every text blob with a margin, or the whole image when there is no text."""
+    h, w = mask.shape
+    ys, xs = np.nonzero(mask)
+    if ys.size == 0:
+        return 0, h, 0, w
+    pad_y, pad_x = int(h * margin), int(w * margin)
+    return (max(0, ys.min() - pad_y), min(h, ys.max() + 1 + pad_y),
+            max(0, xs.min() - pad_x), min(w, xs.max() + 1 + pad_x))
+
+
+def _mrz_width_ratio(image_small):
+    # passport_mrz depends on card_rectify, which depends on this module
+    from passport_mrz import find_mrz_region
+    box = find_mrz_region(image_small)
+    if box is None:
+        return 0.0
+    return box[2] / float(image_small.shape[1])
+
+
+def assess_quality(image, doc_type=None):
+    """Measure sharpness, exposure, text coverage (and MRZ presence for passports) on a small copy.
+
+    Exposure and mean_level cover only the text region, not the background around the document.
+
+    Returns {"passed": bool, "reasons": [...], "warnings": [...], "metrics": {...}}.
+    Reasons are hard failures that make OCR pointless; warnings only flag
+    the result, e.g. text running into the image border of a cropped photo.
+    """
+    gray = _downscale_gray(image)
+    reasons, warnings = [], []
+
+    sharpness = float(cv2.Laplacian(gray, cv2.CV_64F).var())
+    mask = text_mask(gray)
+    coverage = cv2.countNonZero(mask) / float(mask.size)
+    edge_ratio = _edge_text_ratio(mask)
+    y0, y1, x0, x1 = text_region(mask)
+    region = gray[y0:y1, x0:x1]
+    ink_level, paper_level = (float(v) for v in np.percentile(region, (2, 98)))
+    mean_level = float(region.mean())
+
+    if sharpness < MIN_SHARPNESS:
+        reasons.append(f"blurry (Laplacian variance {sharpness:.1f} < {MIN_SHARPNESS})")
+    if ink_level > MAX_INK_LEVEL:
+        reasons.append(f"overexposed (darkest text level {ink_level:.0f} > {MAX_INK_LEVEL})")
+    if paper_level < MIN_PAPER_LEVEL:
+        reasons.append(f"underexposed (brightest background level {paper_level:.0f} < {MIN_PAPER_LEVEL})")
+    if coverage < MIN_TEXT_COVERAGE:
+        reasons.append(f"little or no text found ({coverage:.1%} coverage)")
+    if edge_ratio > MAX_EDGE_TEXT_RATIO:
+        warnings.append(f"text runs into the image border ({edge_ratio:.0%}); the document may be cropped")
+
+    metrics = {
+        "sharpness": round(sharpness, 2),
+        "mean_level": round(mean_level, 1),
+        "ink_level": round(ink_level, 1),
+        "paper_level": round(paper_level, 1),
+        "text_region": [int(y0), int(y1), int(x0), int(x1)],
+        "text_coverage": round(coverage, 4),
+        "edge_text_ratio": round(edge_ratio, 4),
+    }
+    if doc_type == 'passport':
+        small = image if image.ndim == 3 else cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        small = cv2.resize(small, (gray.shape[1], gray.shape[0]), interpolation=cv2.INTER_AREA)
+        mrz_ratio = _mrz_width_ratio(small)
+        metrics["mrz_width_ratio"] = round(mrz_ratio, 4)
+        if mrz_ratio < MIN_MRZ_WIDTH_RATIO:
+            reasons.append("no machine-readable zone found" if mrz_ratio == 0.0
+                           else f"MRZ too narrow ({mrz_ratio:.0%} of the width); it may be cut off")
+
+    return {"passed": not reasons, "reasons": reasons, "warnings": warnings, "metrics": metrics}
+
+
+def check_quality(image, doc_type):
+    """assess_quality with its warnings and any rejection printed; returns the report."""
+    report = assess_quality(image, doc_type)
+    for warning in report["warnings"]:
+        print(f"Warning: {warning}")
+    if not report["passed"]:
+        print("Rejected before OCR: " + "; ".join(report["reasons"]))
+    return report
+
+
+def gate(image, doc_type, preprocess):
+    """Run preprocess(image) only if the image passes; returns (processed or None, report).
+
+    Every pipeline's check_and_preprocess goes through here, so all entry
+    points reject the same images before the expensive stages.
+    """
+    report = check_quality(image, doc_type)
+    if not report["passed"]:
+        return None, report
+    return preprocess(image), report
+
+
+def rejected_or_error(report, error="Image not processed."):
+    """Output entry for an image that produced nothing: the gate's rejection, else a plain error."""
+    if report is not None and not report["passed"]:
+        return rejection(report)
+    return {"Error": error}
+
+
+def rejection(report):
+    """Output entry for an image the gate turned away."""
+    return {"Error": "Image rejected by quality check: " + "; ".join(report["reasons"]),
+            "quality": report}
@@ -0,0 +1,97 @@
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+
+def _get_num_threads():
+    # Imported on first checkout rather than with the module; without torch
+    # there is no intra-op thread pool to cap
+    try:
+        import torch
+    except ImportError:
+        return None
+    return torch.get_num_threads()
+
+
+def _set_num_threads(threads):
+    if threads is not None:
+        import torch
+        torch.set_num_threads(threads)
+
+
+def available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def partition_cpus(size, threads_per_reader):
+    """Split the CPUs this process may use into size disjoint sets of threads_per_reader cores."""
+    cpus = available_cpus()
+    return [cpus[i * threads_per_reader:(i + 1) * threads_per_reader] or cpus for i in range(size)]
+
+
+class _PooledReader:
+    def __init__(self, reader, threads, cpus):
+        self.reader = reader
+        self.threads = threads
+        self.cpus = cpus
+
+
+class ReaderPool:
+    """Owns K readers and lends them to worker threads one at a time.
+
+    Every checkout limits the calling thread to the reader's intra-op thread
+    count (torch's OpenMP setting is per thread) and, when CPU sets are given,
+    pins the thread to that reader's cores. Both are restored on checkin, so
+    K workers x threads_per_reader never exceeds the cores the pool was sized for.
+    reader_factory defaults to inference_backend.create_reader.
+    """
+
+    def __init__(self, size=2, threads_per_reader=None, pin_cpus=False, cpu_sets=None,
+                 reader_factory=None):
+        if reader_factory is None:
+            from inference_backend import create_reader as reader_factory
+        if threads_per_reader is None:
+            threads_per_reader = max(1, len(available_cpus()) // size)
+        if cpu_sets is None and pin_cpus:
+            cpu_sets = partition_cpus(size, threads_per_reader)
+        self._idle = queue.Queue()
+        self._owners = {}
+        self._lock = threading.Lock()
+        for i in range(size):
+            cpus = cpu_sets[i % len(cpu_sets)] if cpu_sets else None
+            self._idle.put(_PooledReader(reader_factory(), threads_per_reader, cpus))
+
+    def checkout(self, timeout=None):
+        try:
+            pooled = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("No reader became available")
+        saved = (_get_num_threads(), None)
+        if saved[0] is not None:
+            _set_num_threads(pooled.threads)
+        if pooled.cpus and hasattr(os, "sched_setaffinity"):
+            # pid 0 applies to the calling thread only
+            saved = (saved[0], os.sched_getaffinity(0))
+            os.sched_setaffinity(0, pooled.cpus)
+        with self._lock:
+            self._owners[id(pooled.reader)] = (pooled, saved)
+        return pooled.reader
+
+    def checkin(self, reader):
+        with self._lock:
+            pooled, (threads, affinity) = self._owners.pop(id(reader))
+        _set_num_threads(threads)
+        if affinity is not None:
+            os.sched_setaffinity(0, affinity)
+        self._idle.put(pooled)
+
+    @contextmanager
+    def reader(self, timeout=None):
+        reader = self.checkout(timeout=timeout)
+        try:
+            yield reader
+        finally:
+            self.checkin(reader)
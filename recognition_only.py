@@ -0,0 +1,51 @@
+import cv2
+import numpy as np
+
+# A row counts as text when it holds at least this share of the busiest row's ink
+ROW_INK_RATIO = 0.15
+LINE_PAD = 2
+
+
+def _runs(mask):
+    """Start/end (exclusive) index pairs of consecutive True values."""
+    padded = np.concatenate(([False], mask, [False])).astype(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    return list(zip(edges[::2], edges[1::2]))
+
+
+def projection_line_boxes(image, min_gap=2, min_height_ratio=0.4):
+    """Split a text strip into line boxes [x_min, x_max, y_min, y_max] from its horizontal projection profile."""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    _, ink = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    rows = ink.sum(axis=1)
+    if rows.max() == 0:
+        return []
+    runs = _runs(rows >= rows.max() * ROW_INK_RATIO)
+    # Merge runs split by thin gaps (e.g. between a glyph body and its serifs)
+    merged = []
+    for start, end in runs:
+        if merged and start - merged[-1][1] <= min_gap:
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    if not merged:
+        return []
+    tallest = max(end - start for start, end in merged)
+    h, w = gray.shape[:2]
+    boxes = []
+    for start, end in merged:
+        if end - start < tallest * min_height_ratio:
+            continue
+        cols = np.flatnonzero(ink[start:end].any(axis=0))
+        x_min, x_max = (cols[0], cols[-1] + 1) if cols.size else (0, w)
+        boxes.append([max(0, int(x_min) - LINE_PAD), min(w, int(x_max) + LINE_PAD),
+                      max(0, int(start) - LINE_PAD), min(h, int(end) + LINE_PAD)])
+    return boxes
+
+
+def recognize_boxes(reader, image, boxes, allowlist=None, detail=0):
+    """Run only the recognizer on precomputed [x_min, x_max, y_min, y_max] boxes, in one batch."""
+    if not boxes:
+        return []
+    return reader.recognize(image, horizontal_list=boxes, free_list=[], detail=detail,
+                            batch_size=len(boxes), allowlist=allowlist)
@@ -0,0 +1,83 @@
+import cv2
+import numpy as np
+
+# Character heights (px) the recognizers read reliably; going larger only adds pixels
+EASYOCR_CHAR_HEIGHT = 24
+TESSERACT_CHAR_HEIGHT = 30
+
+# The connected-component pass runs on a copy no larger than this
+ESTIMATE_MAX_SIDE = 1000
+MIN_COMPONENTS = 8
+# Upscaling never produces an image larger than this, whatever the text height asks for
+MAX_OUTPUT_SIDE = 4096
+MAX_OUTPUT_PIXELS = 16_000_000
+
+
+def estimate_char_height(image):
+    """Median height (in input pixels) of character-like connected components, or None."""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    h, w = gray.shape[:2]
+    shrink = min(1.0, ESTIMATE_MAX_SIDE / float(max(h, w)))
+    if shrink < 1.0:
+        gray = cv2.resize(gray, (max(1, int(w * shrink)), max(1, int(h * shrink))),
+                          interpolation=cv2.INTER_AREA)
+    # Text is dark on a light card, so invert to make glyphs the foreground
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    count, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    if count <= 1:
+        return None
+    stats = stats[1:]
+    comp_w = stats[:, cv2.CC_STAT_WIDTH]
+    comp_h = stats[:, cv2.CC_STAT_HEIGHT]
+    area = stats[:, cv2.CC_STAT_AREA]
+    max_h = binary.shape[0] / 4.0
+    fill = area / np.maximum(comp_w * comp_h, 1)
+    # Keep glyph-shaped blobs: not specks, not lines/borders, not solid photo regions
+    mask = ((comp_h >= 4) & (comp_h <= max_h) &
+            (comp_w <= comp_h * 2) & (comp_w * 8 >= comp_h) &
+            (fill > 0.1) & (fill < 0.95))
+    if np.count_nonzero(mask) < MIN_COMPONENTS:
+        return None
+    return float(np.median(comp_h[mask])) / shrink
+
+
+def _output_cap(image, max_side, max_pixels):
+    h, w = image.shape[:2]
+    return min(max_side / float(max(h, w)), (max_pixels / float(h * w)) ** 0.5)
+
+
+def choose_scale(image, target_char_height=EASYOCR_CHAR_HEIGHT, max_upscale=3.0,
+                 min_scale=0.1, fallback_scale=1.0, tolerance=0.1,
+                 max_side=MAX_OUTPUT_SIDE, max_pixels=MAX_OUTPUT_PIXELS):
+    """Resize factor bringing text near target_char_height, within max_side and max_pixels.
+
+    fallback_scale applies when no text height can be estimated; the output
+    caps apply to it as well, and win over min_scale.
+    """
+    char_height = estimate_char_height(image)
+    if char_height is None:
+        scale = fallback_scale
+    else:
+        scale = target_char_height / char_height
+        scale = min(max(scale, min_scale), max_upscale)
+        # Skip resampling entirely when the image is already close enough
+        if abs(scale - 1.0) <= tolerance:
+            scale = 1.0
+    return min(scale, _output_cap(image, max_side, max_pixels))
+
+
+def rescale(image, scale):
+    if scale == 1.0:
+        return image
+    h, w = image.shape[:2]
+    dim = (max(1, int(round(w * scale))), max(1, int(round(h * scale))))
+    interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC
+    return cv2.resize(image, dim, interpolation=interpolation)
+
+
+def rescale_for_text(image, target_char_height=EASYOCR_CHAR_HEIGHT, max_upscale=3.0,
+                     min_scale=0.1, fallback_scale=1.0, max_side=MAX_OUTPUT_SIDE, max_pixels=MAX_OUTPUT_PIXELS):
+    """Resize so text lands near target_char_height; returns (image, scale)."""
+    scale = choose_scale(image, target_char_height, max_upscale=max_upscale, min_scale=min_scale,
+                         fallback_scale=fallback_scale, max_side=max_side, max_pixels=max_pixels)
+    return rescale(image, scale), scale
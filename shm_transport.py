@@ -0,0 +1,249 @@
+import multiprocessing as mp
+import os
+import queue
+import time
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from reader_pool import ReaderPool, available_cpus
+
+DEFAULT_SLOTS = 8
+# Enough for an 800 px wide thresholded license or a colour MRZ crop
+DEFAULT_SLOT_BYTES = 4 * 1024 * 1024
+# How often a waiting parent checks that its workers are still alive
+POLL_SECONDS = 1.0
+JOIN_SECONDS = 10.0
+# A worker killed mid-write can leave a shared queue locked, stalling the survivors;
+# after one has died, this long without progress ends the batch
+STALL_SECONDS = 5.0
+
+
+class SharedImageRing:
+    """Fixed ring of shared-memory slots for handing NumPy images to other processes.
+
+    The producer copies an array into a free slot once; consumers map the
+    same bytes as an ndarray without copying, and hand the slot back with
+    release() so it can be reused. Only (slot, shape, dtype, meta) travels
+    through the queues, except for arrays larger than a slot, which are
+    pickled through the queue instead (slot None).
+    """
+
+    def __init__(self, slots=DEFAULT_SLOTS, slot_bytes=DEFAULT_SLOT_BYTES, ctx=None):
+        ctx = ctx or mp.get_context()
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self._shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        # Forked children inherit this object as-is, so ownership is tied to the creating pid
+        self._owner_pid = os.getpid()
+        self._free = ctx.Queue()
+        self._ready = ctx.Queue()
+        for slot in range(slots):
+            self._free.put(slot)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_shm'] = self._shm.name
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._shm = shared_memory.SharedMemory(name=state['_shm'])
+
+    def _view(self, slot, shape, dtype):
+        return np.ndarray(shape, dtype=dtype, buffer=self._shm.buf, offset=slot * self.slot_bytes)
+
+    def put(self, array, meta=None, timeout=None):
+        """Copy array into a free slot, blocking while every slot is in use.
+
+        Raises queue.Empty if no slot frees up within timeout.
+        """
+        array = np.ascontiguousarray(array)
+        if array.nbytes > self.slot_bytes:
+            # Rare oversized images pay for pickling rather than failing the batch
+            self._ready.put((None, array, None, meta))
+            return
+        slot = self._free.get(timeout=timeout)
+        self._view(slot, array.shape, array.dtype)[...] = array
+        self._ready.put((slot, array.shape, array.dtype.str, meta))
+
+    def close_input(self, consumers=1):
+        for _ in range(consumers):
+            self._ready.put(None)
+
+    def get(self, timeout=None):
+        """Return (slot, array, meta) mapped onto shared memory, or None once input is closed."""
+        item = self._ready.get(timeout=timeout)
+        if item is None:
+            return None
+        slot, shape, dtype, meta = item
+        if slot is None:
+            return None, shape, meta
+        return slot, self._view(slot, shape, np.dtype(dtype)), meta
+
+    def release(self, slot):
+        if slot is not None:
+            self._free.put(slot)
+
+    @contextmanager
+    def borrowed(self, timeout=None):
+        """Yield (array, meta) or None; the slot is recycled when the block exits."""
+        item = self.get(timeout=timeout)
+        if item is None:
+            yield None
+            return
+        slot, array, meta = item
+        try:
+            yield array, meta
+        finally:
+            del array
+            self.release(slot)
+
+    def close(self):
+        self._shm.close()
+        if os.getpid() == self._owner_pid:
+            self._shm.unlink()
+
+
+def _ocr_worker(ring, results, reader_factory, recognize, threads_per_reader):
+    # A one-reader pool caps this process's inference threads, so the workers split the cores
+    with ReaderPool(1, threads_per_reader, reader_factory=reader_factory).reader() as reader:
+        _serve(ring, results, reader, recognize)
+    ring.close()
+
+
+def _serve(ring, results, reader, recognize):
+    while True:
+        with ring.borrowed() as item:
+            if item is None:
+                break
+            img, meta = item
+            # One bad image must not take the worker, and every image after it, down
+            try:
+                results.put((meta, recognize(reader, img), None))
+            except Exception as e:
+                results.put((meta, None, f"{type(e).__name__}: {e}"))
+            del img, item
+
+
+def _license_reader():
+    from inference_backend import create_reader
+    return create_reader(['en'])
+
+
+def _license_recognize(reader, img):
+    from driving_test import recognize_license
+    return recognize_license(reader, img)
+
+
+def run_ocr_processes(named_images, reader_factory, recognize, workers=2,
+                      slots=DEFAULT_SLOTS, slot_bytes=DEFAULT_SLOT_BYTES, threads_per_reader=None):
+    """OCR (name, image) pairs in worker processes, moving pixels through shared memory.
+
+    Each worker runs its reader with threads_per_reader inference threads,
+    by default the available cores split evenly between the workers.
+
+    Returns ({name: recognize(reader, image)}, {name: error message}); names
+    whose image is None are skipped. An image that raises in recognize, or
+    that was in flight when its worker died, is reported in the errors
+    instead of failing the batch.
+    """
+    if threads_per_reader is None:
+        threads_per_reader = max(1, len(available_cpus()) // workers)
+    ctx = mp.get_context()
+    ring = SharedImageRing(slots=slots, slot_bytes=slot_bytes, ctx=ctx)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_ocr_worker, args=(ring, results, reader_factory, recognize, threads_per_reader))
+             for _ in range(workers)]
+    for p in procs:
+        p.start()
+    outputs, errors = {}, {}
+    pending = set()
+    input_closed = False
+    last_progress = time.monotonic()
+
+    def collect(timeout):
+        nonlocal last_progress
+        try:
+            meta, result, error = results.get(timeout=timeout)
+        except queue.Empty:
+            return False
+        last_progress = time.monotonic()
+        pending.discard(meta)
+        if error is None:
+            outputs[meta] = result
+        else:
+            errors[meta] = error
+        return True
+
+    def all_exited():
+        return all(p.exitcode is not None for p in procs)
+
+    def stalled():
+        died = any(p.exitcode not in (None, 0) for p in procs)
+        return died and time.monotonic() - last_progress > STALL_SECONDS
+
+    try:
+        for name, img in named_images:
+            if img is None:
+                continue
+            # A worker that died (e.g. killed for memory) never frees its slot, so never wait blindly
+            while not all_exited() and not stalled():
+                try:
+                    ring.put(img, meta=name, timeout=POLL_SECONDS)
+                    last_progress = time.monotonic()
+                    break
+                except queue.Empty:
+                    collect(0)
+            pending.add(name)
+            # Drain as we go so the results pipe never fills up and blocks workers
+            while collect(0):
+                pass
+        ring.close_input(consumers=workers)
+        input_closed = True
+        while pending:
+            if not collect(POLL_SECONDS) and (all_exited() or stalled()):
+                # Everyone has exited; give results still in the pipe one last chance
+                while collect(POLL_SECONDS):
+                    pass
+                break
+    finally:
+        if not input_closed:
+            ring.close_input(consumers=workers)
+        # Stalled workers may never get to exit on their own
+        join_seconds = 0 if stalled() else JOIN_SECONDS
+        for p in procs:
+            p.join(join_seconds)
+            if p.is_alive():
+                p.terminate()
+                p.join()
+        ring.close()
+    for name in pending:
+        errors[name] = "OCR worker exited before returning a result"
+    return outputs, errors
+
+
+def process_license_images(image_paths, workers=2):
+    import cv2
+    from driving_test import check_and_preprocess, parse_driver_license_results
+    from quality_gate import rejected_or_error
+    all_extracted_details = {}
+
+    def named_images():
+        for image_path in image_paths:
+            name = os.path.basename(image_path)
+            img = cv2.imread(image_path)
+            processed_img, quality = check_and_preprocess(img) if img is not None else (None, None)
+            if processed_img is None:
+                all_extracted_details[name] = rejected_or_error(quality)
+            yield name, processed_img
+
+    ocr_results, errors = run_ocr_processes(named_images(), _license_reader, _license_recognize,
+                                            workers=workers)
+    for name, results in ocr_results.items():
+        details, kv_pairs, confidences = parse_driver_license_results(results)
+        all_extracted_details[name] = {"extracted_details": details, "field_confidence": confidences}
+    for name, error in errors.items():
+        all_extracted_details[name] = {"Error": f"OCR failed: {error}"}
+    return all_extracted_details
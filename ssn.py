@@ -1,20 +1,26 @@
 import cv2
 import numpy as np
-from PIL import Image
-import pytesseract
 import re
 import string
-from tkinter import Tk, filedialog
+from resolution_policy import rescale_for_text, TESSERACT_CHAR_HEIGHT
+from card_rectify import detect_and_rectify
+from orientation import auto_orient
+from quality_gate import gate
 
 def preprocess_image(image_path):
     img = cv2.imread(image_path)
     if img is None:
         raise ValueError("Could not open image!")
-    # Upscale if too small
+    return preprocess_loaded_image(img)
+
+def preprocess_loaded_image(img):
+    # Perspective is corrected here; the deskew below only handles small residual angles
+    img, card_quad = detect_and_rectify(img)
+    img, orientation = auto_orient(img)
+    # Rescale to the text height Tesseract reads best; old min-side 800 rule is the fallback
     h, w = img.shape[:2]
-    if min(h, w) < 800:
-        scale = 800 / min(h, w)
-        img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+    fallback = 800 / min(h, w) if min(h, w) < 800 else 1.0
+    img, scale = rescale_for_text(img, target_char_height=TESSERACT_CHAR_HEIGHT, fallback_scale=fallback)
     gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
     # Sharpen
     kernel = np.array([[0,-1,0], [-1,5,-1], [0,-1,0]])
@@ -52,35 +58,47 @@ def clean_lines(text):
             filtered.append(line)
     return '\n'.join(filtered)
 
-root = Tk()
-root.withdraw()
-file_path = filedialog.askopenfilename(
-    title="Select SSN Image",
-    filetypes=[("Image Files", "*.png;*.jpg;*.jpeg;*.webp;*.tiff")]
-)
+def main():
+    # Tesseract is only needed here; the preprocessing chain is also used by preprocess_planner
+    import pytesseract
+    from PIL import Image
+    from cli import select_image_file
+
+    file_path = select_image_file(
+        title="Select SSN Image",
+        filetypes=[("Image Files", "*.png;*.jpg;*.jpeg;*.webp;*.tiff")]
+    )
 
-if file_path:
-    processed_img = preprocess_image(file_path)
-    pil_img = Image.fromarray(processed_img)
-    # Restrict OCR to uppercase, hyphen, and digits
-    config = r'--oem 3 --psm 6 -l eng -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789- '
+    if file_path:
+        img = cv2.imread(file_path)
+        if img is None:
+            raise ValueError("Could not open image!")
+        processed_img, quality = gate(img, 'ssn', preprocess_loaded_image)
+        if processed_img is None:
+            return
+        pil_img = Image.fromarray(processed_img)
+        # Restrict OCR to uppercase, hyphen, and digits
+        config = r'--oem 3 --psm 6 -l eng -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789- '
+
+        text = pytesseract.image_to_string(pil_img, config=config)
+        cleaned = clean_lines(text)
+        print("----- Cleaned Extracted Text -----")
+        print(cleaned)
+        print("----------------------------------")
+        # Extract SSN and name as before
+        ssn_pattern = r'(?!666|000|9\d{2})\d{3}-\d{2}-\d{4}'
+        ssn_matches = re.findall(ssn_pattern, cleaned)
+        ssn_number = ssn_matches[0] if ssn_matches else "Not found"
+        name = "Not found"
+        for line in cleaned.split('\n'):
+            words = line.strip().split()
+            if len(words) >= 2 and all(word.isalpha() and word.isupper() for word in words):
+                name = ' '.join(words)
+                break
+        print(f"SSN Number: {ssn_number}")
+        print(f"Name: {name}")
+    else:
+        print("No file selected.")
 
-    text = pytesseract.image_to_string(pil_img, config=config)
-    cleaned = clean_lines(text)
-    print("----- Cleaned Extracted Text -----")
-    print(cleaned)
-    print("----------------------------------")
-    # Extract SSN and name as before
-    ssn_pattern = r'(?!666|000|9\d{2})\d{3}-\d{2}-\d{4}'
-    ssn_matches = re.findall(ssn_pattern, cleaned)
-    ssn_number = ssn_matches[0] if ssn_matches else "Not found"
-    name = "Not found"
-    for line in cleaned.split('\n'):
-        words = line.strip().split()
-        if len(words) >= 2 and all(word.isalpha() and word.isupper() for word in words):
-            name = ' '.join(words)
-            break
-    print(f"SSN Number: {ssn_number}")
-    print(f"Name: {name}")
-else:
-    print("No file selected.")
+if __name__ == "__main__":
+    main()
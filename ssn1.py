@@ -1,14 +1,15 @@
 import cv2
 import numpy as np
-from PIL import Image
-import pytesseract
 import re
-from tkinter import Tk, filedialog
+from quality_gate import gate
 
 def preprocess_image(image_path):
     img = cv2.imread(image_path)
     if img is None:
         raise ValueError("Could not open image!")
+    return preprocess_loaded_image(img)
+
+def preprocess_loaded_image(img):
     # Upscale if small for better OCR
     h, w = img.shape[:2]
     if min(h, w) < 800:
@@ -45,28 +46,38 @@ def extract_ssn_and_name(text):
                 break
     return ssn_number, name
 
-# Manual file selection dialog
-root = Tk()
-root.withdraw()
-image_path = filedialog.askopenfilename(
-    title="Select SSN Image",
-    filetypes=[("Image Files", "*.png;*.jpg;*.jpeg;*.webp;*.tiff")]
-)
+def main():
+    import pytesseract
+    from PIL import Image
+    from cli import select_image_file
+
+    # Manual file selection dialog
+    image_path = select_image_file(
+        title="Select SSN Image",
+        filetypes=[("Image Files", "*.png;*.jpg;*.jpeg;*.webp;*.tiff")]
+    )
 
-if not image_path:
-    print("No file selected.")
-    exit()
+    if not image_path:
+        print("No file selected.")
+        return
 
-processed_img = preprocess_image(image_path)
-pil_img = Image.fromarray(processed_img)
-config = r'--oem 3 --psm 6 -l eng'
-text = pytesseract.image_to_string(pil_img, config=config)
+    img = cv2.imread(image_path)
+    if img is None:
+        raise ValueError("Could not open image!")
+    processed_img, quality = gate(img, 'ssn', preprocess_loaded_image)
+    if processed_img is None:
+        return
+    pil_img = Image.fromarray(processed_img)
+    config = r'--oem 3 --psm 6 -l eng'
+    text = pytesseract.image_to_string(pil_img, config=config)
 
-print("----- Extracted Text -----")
-print(text)
-print("--------------------------")
+    print("----- Extracted Text -----")
+    print(text)
+    print("--------------------------")
 
-ssn_number, name = extract_ssn_and_name(text)
-print(f"SSN Number: {ssn_number}")
-print(f"Name: {name}")
+    ssn_number, name = extract_ssn_and_name(text)
+    print(f"SSN Number: {ssn_number}")
+    print(f"Name: {name}")
 
+if __name__ == "__main__":
+    main()
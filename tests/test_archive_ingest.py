@@ -0,0 +1,82 @@
+import zipfile
+
+import cv2
+import numpy as np
+import pytest
+
+import archive_ingest
+from archive_ingest import iter_archive_images
+
+
+def pages(*values):
+    return [np.full((24, 32, 3), value, np.uint8) for value in values]
+
+
+def tiff_bytes(images):
+    ok, buf = cv2.imencodemulti('.tiff', images)
+    assert ok
+    return buf.tobytes()
+
+
+def png_bytes(image):
+    ok, buf = cv2.imencode('.png', image)
+    assert ok
+    return buf.tobytes()
+
+
+def levels(named_images):
+    return [(name, int(image[0, 0, 0])) for name, image in named_images]
+
+
+def test_multi_page_tiff_pages_are_named_and_decoded_one_at_a_time(tmp_path, monkeypatch):
+    path = tmp_path / "scan.tiff"
+    path.write_bytes(tiff_bytes(pages(10, 20, 30)))
+    reads = []
+    imreadmulti = cv2.imreadmulti
+
+    def counting_imreadmulti(filename, start, count, flags):
+        reads.append((start, count))
+        return imreadmulti(filename, start, count, flags=flags)
+
+    monkeypatch.setattr(archive_ingest.cv2, "imreadmulti", counting_imreadmulti)
+    images = iter_archive_images(str(path))
+    assert levels([next(images)]) == [("scan_page1.tiff", 10)]
+    # Only the first two pages (one of look-ahead) are decoded so far
+    assert reads == [(0, 1), (1, 1)]
+    assert levels(images) == [("scan_page2.tiff", 20), ("scan_page3.tiff", 30)]
+
+
+def test_single_page_tiff_keeps_its_name(tmp_path):
+    path = tmp_path / "single.tif"
+    path.write_bytes(tiff_bytes(pages(40)))
+    assert levels(iter_archive_images(str(path))) == [("single.tif", 40)]
+
+
+@pytest.mark.parametrize("compression", [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED])
+def test_zip_members_are_decoded_in_order(tmp_path, compression):
+    path = tmp_path / "batch.zip"
+    with zipfile.ZipFile(path, 'w', compression) as zf:
+        zf.writestr("a/card.png", png_bytes(pages(50)[0]))
+        zf.writestr("notes.txt", b"not an image")
+        zf.writestr("b/pages.tiff", tiff_bytes(pages(60, 70)))
+        zf.writestr("broken.png", b"not a png")
+    named = list(iter_archive_images(str(path)))
+    assert levels(named[:3]) == [("a_card.png", 50), ("b_pages_page1.tiff", 60), ("b_pages_page2.tiff", 70)]
+    assert named[3] == ("broken.png", None)
+
+
+def test_zip_tiff_member_is_decoded_one_page_at_a_time(tmp_path, monkeypatch):
+    path = tmp_path / "batch.zip"
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED) as zf:
+        zf.writestr("pages.tiff", tiff_bytes(pages(1, 2, 3, 4)))
+    ranges = []
+    imdecodemulti = cv2.imdecodemulti
+
+    def counting_imdecodemulti(buf, flags, mats, page_range):
+        ranges.append(page_range)
+        return imdecodemulti(buf, flags, mats, page_range)
+
+    monkeypatch.setattr(archive_ingest.cv2, "imdecodemulti", counting_imdecodemulti)
+    assert [name for name, image in iter_archive_images(str(path))] == [
+        "pages_page1.tiff", "pages_page2.tiff", "pages_page3.tiff", "pages_page4.tiff"]
+    assert ranges == [(0, 1), (1, 2), (2, 3), (3, 4), (4, 5)]
@@ -0,0 +1,44 @@
+import asyncio
+import json
+
+import cv2
+import numpy as np
+
+from async_pipeline import process_images
+
+
+def _preprocess(img):
+    if img[0, 0, 0] == 1:
+        raise ValueError("bad scan")
+    if img[0, 0, 0] == 2:
+        return None, {"passed": False, "reasons": ["too blurry"], "warnings": []}
+    return img[:, :, 0], {"passed": True, "reasons": [], "warnings": []}
+
+
+def _recognize(reader, img):
+    if img[0, 0] == 3:
+        raise RuntimeError("recognizer crashed")
+    return int(img[0, 0])
+
+
+def _parse(value):
+    return {"value": value}
+
+
+def test_one_failing_image_does_not_abort_the_batch(tmp_path):
+    paths = []
+    for value in range(5):
+        path = tmp_path / f"img{value}.png"
+        cv2.imwrite(str(path), np.full((8, 8, 3), value, np.uint8))
+        paths.append(str(path))
+    paths.append(str(tmp_path / "missing.png"))
+    output = tmp_path / "out"
+    results = asyncio.run(process_images(paths, _preprocess, _recognize, _parse, lambda: None,
+                                         output_folder=str(output), io_workers=2, preprocess_workers=2))
+    assert results["img0.png"]["value"] == 0 and results["img0.png"]["quality"]["passed"]
+    assert results["img4.png"]["value"] == 4
+    assert "ValueError: bad scan" in results["img1.png"]["Error"]
+    assert "too blurry" in results["img2.png"]["Error"]
+    assert json.loads((output / "img2.json").read_text())["quality"]["reasons"] == ["too blurry"]
+    assert results["img3.png"]["Error"].startswith("OCR failed")
+    assert results["missing.png"] == {"Error": "Image not processed."}
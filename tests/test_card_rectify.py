@@ -0,0 +1,62 @@
+import cv2
+import numpy as np
+
+from card_rectify import CARD_SIZES, detect_and_rectify, find_card_quad
+
+CORNERS = [[300, 250], [1300, 300], [1280, 920], [280, 880]]
+
+
+def card(header=0, header_level=40, width=1012, height=638):
+    img = np.full((height, width, 3), 225, np.uint8)
+    img[:header] = header_level
+    for i in range(5):
+        cv2.putText(img, "DLN 1234%d SAMPLE JOHN" % i, (width * 3 // 10, header + 90 + i * 90),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.2 * width / 1012, (30, 30, 30), 3)
+    cv2.rectangle(img, (40, header + 60), (250, header + 330), (120, 110, 100), -1)
+    return img
+
+
+def photographed(cards_at, size=(1200, 1600), background=35):
+    """Paste each (card, corners) into a dark frame with a perspective warp."""
+    out = np.full((size[0], size[1], 3), background, np.uint8)
+    for img, corners in cards_at:
+        h, w = img.shape[:2]
+        src = np.float32([[0, 0], [w - 1, 0], [w - 1, h - 1], [0, h - 1]])
+        homography = cv2.getPerspectiveTransform(src, np.float32(corners))
+        warped = cv2.warpPerspective(img, homography, (size[1], size[0]))
+        mask = cv2.warpPerspective(np.full((h, w), 255, np.uint8), homography, (size[1], size[0]))
+        out[mask > 0] = warped[mask > 0]
+    return out
+
+
+def test_warped_card_is_found_and_flattened_to_the_canonical_size():
+    image = photographed([(card(), CORNERS)])
+    quad = find_card_quad(image, 'license')
+    assert quad is not None
+    assert np.abs(quad - np.float32(CORNERS)).max() <= 4
+    rectified, quad = detect_and_rectify(image, 'license')
+    assert rectified.shape[:2] == CARD_SIZES['license'][::-1]
+
+
+def test_dark_header_on_a_dark_background_is_not_cut_off_the_card():
+    # Only the card body below the header has visible edges; that partial quad is too long for a license
+    image = photographed([(card(header=90), CORNERS)])
+    assert find_card_quad(image, 'license') is None
+    rectified, quad = detect_and_rectify(image, 'license')
+    assert quad is None and rectified is image
+
+
+def test_largest_text_bearing_card_wins():
+    # Both cards cover more than MIN_CARD_AREA_RATIO of the frame
+    large = [[60, 60], [860, 60], [860, 564], [60, 564]]
+    small = [[900, 700], [1500, 700], [1500, 1078], [900, 1078]]
+    image = photographed([(card(), small), (card(), large)])
+    quad = find_card_quad(image, 'license')
+    assert np.abs(quad - np.float32(large)).max() <= 4
+
+
+def test_blank_card_shape_without_text_is_not_a_card():
+    blank = np.full((638, 1012, 3), 225, np.uint8)
+    image = photographed([(blank, CORNERS)])
+    cv2.putText(image, "SAMPLE TEXT OUTSIDE THE CARD", (40, 1100), cv2.FONT_HERSHEY_SIMPLEX, 2.0, (230, 230, 230), 4)
+    assert find_card_quad(image, 'license') is None
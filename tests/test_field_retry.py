@@ -0,0 +1,146 @@
+import numpy as np
+
+from pipeline_config import PipelineConfig, get_config, set_config
+
+
+def box(x_min, x_max, y_min, y_max):
+    return [[x_min, y_min], [x_max, y_min], [x_max, y_max], [x_min, y_max]]
+
+
+class StubReader:
+    """readtext returns fixed results; recognize reads every crop as the given (text, conf)."""
+
+    def __init__(self, results, retried):
+        self.results = results
+        self.retried = retried
+        self.crops = []
+
+    def readtext(self, image, detail=1):
+        return list(self.results)
+
+    def recognize(self, image, horizontal_list=None, free_list=None, detail=0, batch_size=1, allowlist=None):
+        self.crops.append(image.shape[:2])
+        h, w = image.shape[:2]
+        text, conf = self.retried
+        return [(box(0, w, 0, h), text, conf)]
+
+
+SSN_RESULTS = [
+    (box(20, 300, 40, 70), "123-45-6789", 0.3),
+    (box(20, 120, 100, 130), "JOHN", 0.9),
+    (box(140, 260, 100, 130), "SMITH", 0.9),
+]
+
+
+def recognize_with(overrides, card):
+    from easyocr_ssn import recognize_ssn
+    previous = get_config()
+    try:
+        set_config(PipelineConfig(overrides={'ssn': {'recognition': overrides}}))
+        reader = StubReader(SSN_RESULTS, ("123-45-6789", 0.95))
+        return recognize_ssn(reader, np.zeros((200, 400), np.uint8), card), reader
+    finally:
+        set_config(previous)
+
+
+def ssn_conf(results):
+    return max(conf for (bbox, text, conf) in results if text == "123-45-6789")
+
+
+def test_field_retry_flag_rereads_weak_fields_from_the_card():
+    card = np.full((200, 400, 3), 200, np.uint8)
+    results, reader = recognize_with({'field_retry': True}, card)
+    assert ssn_conf(results) == 0.95 and len(reader.crops) == 1
+
+
+def test_field_retry_is_off_by_default_and_needs_the_card():
+    card = np.full((200, 400, 3), 200, np.uint8)
+    for overrides, image in (({}, card), ({'field_retry': True}, None)):
+        results, reader = recognize_with(overrides, image)
+        assert ssn_conf(results) == 0.3 and reader.crops == []
+
+
+class CropReader:
+    """Reads every crop, through the recognizer or the detector, as the next (text, conf) in turn."""
+
+    def __init__(self, *readings):
+        self.readings = list(readings)
+        self.crops = []
+
+    def _read(self, image):
+        self.crops.append(image.shape[:2])
+        h, w = image.shape[:2]
+        text, conf = self.readings[min(len(self.crops), len(self.readings)) - 1]
+        return [(box(0, w, 0, h), text, conf)]
+
+    def readtext(self, image, detail=1):
+        return self._read(image)
+
+    def recognize(self, image, horizontal_list=None, free_list=None, detail=0, batch_size=1, allowlist=None):
+        return self._read(image)
+
+
+def test_region_is_cropped_with_padding_and_boxes_map_back_to_the_card():
+    from field_retry import CROP_PAD, reocr_region
+    card = np.full((300, 400, 3), 200, np.uint8)
+    padded = box(100 - CROP_PAD, 200 + CROP_PAD, 50 - CROP_PAD, 80 + CROP_PAD)
+    for variant, scale in (("gray", 1), ("clahe", 1), ("upscale", 2)):
+        reader = CropReader(("TEXT", 0.9))
+        [(bbox, text, conf)] = reocr_region(reader, card, [100, 200, 50, 80], variant)
+        assert reader.crops == [((30 + 2 * CROP_PAD) * scale, (100 + 2 * CROP_PAD) * scale)]
+        assert np.allclose(bbox, padded)
+
+
+def test_crop_padding_stops_at_the_card_edge():
+    from field_retry import CROP_PAD, reocr_region
+    reader = CropReader(("TEXT", 0.9))
+    [(bbox, text, conf)] = reocr_region(reader, np.zeros((300, 400), np.uint8), [-10, 50, 290, 310], "gray")
+    assert reader.crops == [(10 + CROP_PAD, 50 + CROP_PAD)]
+    assert np.allclose(bbox, box(0, 50 + CROP_PAD, 290 - CROP_PAD, 300))
+
+
+def test_retry_replaces_only_the_lines_centred_in_its_region():
+    from field_retry import _retry_regions, _ssn_scores
+    card = np.full((200, 400, 3), 200, np.uint8)
+    reader = CropReader(("123-45-6789", 0.95))
+    results, retries = _retry_regions(reader, card, SSN_RESULTS, [('SSN', [20, 300, 40, 70], True)],
+                                      _ssn_scores, 0.5, 6, ("gray",))
+    # The weak SSN line is swapped for the retried one; the name lines outside the region stay
+    assert [text for (bbox, text, conf) in results] == ["JOHN", "SMITH", "123-45-6789"]
+    assert retries == [{"field": "SSN", "variant": "gray", "region": [20.0, 300.0, 40.0, 70.0],
+                        "confidence_before": 0.3, "confidence_after": 0.95}]
+
+
+def test_retry_that_loses_another_field_is_rejected():
+    from field_retry import _retry_regions, _ssn_scores
+    card = np.full((200, 400, 3), 200, np.uint8)
+    reader = CropReader(("123-45-6789", 0.95))
+    # The region also covers the name lines, which the single retried line would drop
+    results, retries = _retry_regions(reader, card, SSN_RESULTS, [('SSN', [20, 300, 40, 130], False)],
+                                      _ssn_scores, 0.5, 6, ("gray", "clahe"))
+    assert results == SSN_RESULTS and retries == []
+    assert len(reader.crops) == 2
+
+
+def test_ssn_retry_that_reads_no_better_is_dropped_within_the_attempt_budget():
+    from field_retry import retry_ssn_fields
+    card = np.full((200, 400, 3), 200, np.uint8)
+    reader = CropReader(("123-45-6789", 0.2))
+    ssn, name, signature, results, retries = retry_ssn_fields(reader, card, SSN_RESULTS, max_attempts=2)
+    assert (ssn, name) == ("123-45-6789", "JOHN SMITH")
+    assert results == SSN_RESULTS and retries == []
+    assert len(reader.crops) == 2
+
+
+def test_license_retry_keeps_the_more_confident_reading():
+    from field_retry import retry_license_fields
+    results = [(box(20, 300, 10, 40), "WASHINGTON", 0.9),
+               (box(20, 300, 60, 90), "WDLABCD1234E", 0.4),
+               (box(20, 300, 110, 140), "EXP: 01/02/2030", 0.9),
+               (box(20, 300, 160, 190), "JOHN SAMPLE", 0.9)]
+    card = np.full((300, 400, 3), 200, np.uint8)
+    reader = CropReader(("WDLABCD1234E", 0.3), ("WDLABCD1234E", 0.95))
+    details, kv_pairs, confidences, retried, retries = retry_license_fields(reader, card, results)
+    assert details["DL No"] == "WDLABCD1234E" and confidences["DL No"] == 0.95
+    assert [r["variant"] for r in retries] == ["clahe"] and retries[0]["confidence_before"] == 0.4
+    assert len(reader.crops) == 2
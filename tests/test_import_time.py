@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Cumulative -X importtime of one entry module, cold, in a fresh interpreter
+IMPORT_BUDGET_SECONDS = 1.0
+# OCR engines, GUI and plotting are imported only inside the functions that use them
+HEAVY = ("easyocr", "torch", "onnxruntime", "pytesseract", "matplotlib", "tkinter", "PIL")
+# Preprocessing modules need OpenCV (and its numpy) at import; these modules must not
+NO_CV2 = ["cli", "mrz_dates", "mrz_batch", "pipeline_config", "memory_budget", "shm_transport", "watch_ingest"]
+ENTRY_MODULES = NO_CV2 + [
+    "driving_test", "driving_easyocr", "easyocr_ssn", "easyocr_test_ssn", "ssn", "ssn1",
+    "passport_mrz", "passport+easyocr", "passport_easyocr_test", "passport_reader", "store_passport",
+    "field_retry", "preprocess_planner", "incremental_extraction", "near_duplicates", "page_stream",
+    "archive_ingest", "async_pipeline", "pipeline_tuner", "tiled_preprocess",
+]
+
+
+def _import(module):
+    # __import__ rather than importlib.import_module, which -X importtime does not report
+    code = ("import sys; __import__(%r); "
+            "print(' '.join(sorted(m.split('.')[0] for m in sys.modules)))" % module)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=REPO,
+                          capture_output=True, text=True, check=True)
+    loaded = set(proc.stdout.split())
+    seconds = None
+    for line in proc.stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            seconds = int(fields[1]) / 1e6
+    return loaded, seconds
+
+
+@pytest.mark.parametrize("module", ENTRY_MODULES)
+def test_entry_module_imports_lightly(module):
+    loaded, seconds = _import(module)
+    assert not loaded & set(HEAVY)
+    if module in NO_CV2:
+        assert "cv2" not in loaded
+    assert seconds is not None and seconds < IMPORT_BUDGET_SECONDS
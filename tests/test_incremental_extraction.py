@@ -0,0 +1,76 @@
+from incremental_extraction import detect_in_reading_order
+
+
+class DetectOnlyReader:
+    def __init__(self, horizontal, free):
+        self.horizontal, self.free = horizontal, free
+
+    def detect(self, img):
+        return [self.horizontal], [self.free]
+
+
+def test_a_row_straddling_a_pixel_band_stays_one_row():
+    # Top edges at 47-52 px: fixed 10 px bands would split this row and move the middle box first
+    left, right, below = [10, 100, 50, 70], [300, 400, 52, 72], [10, 120, 100, 120]
+    middle = [[150, 48], [250, 47], [250, 69], [150, 70]]
+    order = detect_in_reading_order(DetectOnlyReader([right, left, below], [middle]), None)
+    assert order == [(True, left), (False, middle), (True, right), (True, below)]
+
+
+class CountingReader:
+    """Detects one line per label and recognizes each as the given (text, conf)."""
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.recognized = 0
+        self.readtext_calls = 0
+
+    def _boxes(self):
+        return [[10, 400, 20 + 40 * i, 50 + 40 * i] for i in range(len(self.lines))]
+
+    def detect(self, img):
+        return [self._boxes()], [[]]
+
+    def recognize(self, img, horizontal_list=None, free_list=None):
+        results = []
+        for box in horizontal_list:
+            i = self._boxes().index(box)
+            x_min, x_max, y_min, y_max = box
+            results.append(([[x_min, y_min], [x_max, y_min], [x_max, y_max], [x_min, y_max]],) + self.lines[i])
+            self.recognized += 1
+        return results
+
+    def readtext(self, img, detail=1):
+        self.readtext_calls += 1
+        return self.recognize(img, self._boxes())
+
+
+SSN_LINES = [("SOCIAL SECURITY", 0.9), ("123-45-6789", 0.95), ("JOHN", 0.9), ("SMITH", 0.9),
+             ("John Smith", 0.9)] + [("FILLER %d" % i, 0.9) for i in range(8)]
+
+
+def test_early_exit_flag_stops_recognition_once_fields_are_read():
+    from easyocr_ssn import recognize_ssn
+    from pipeline_config import PipelineConfig, get_config, set_config
+    previous = get_config()
+    try:
+        set_config(PipelineConfig(overrides={'ssn': {'recognition': {'early_exit': True}}}))
+        reader = CountingReader(SSN_LINES)
+        results = recognize_ssn(reader, None)
+        assert reader.readtext_calls == 0
+        assert reader.recognized == len(results) < len(SSN_LINES)
+
+        set_config(PipelineConfig())
+        reader = CountingReader(SSN_LINES)
+        assert len(recognize_ssn(reader, None)) == len(SSN_LINES)
+        assert reader.readtext_calls == 1
+    finally:
+        set_config(previous)
+
+
+def test_recognition_flags_must_be_booleans():
+    import pytest
+    from pipeline_config import PipelineConfigError, validate
+    assert validate({'license': {'recognition': {'early_exit': True}}})['license']['recognition']['early_exit']
+    with pytest.raises(PipelineConfigError, match="license.recognition.early_exit: expected true or false"):
+        validate({'license': {'recognition': {'early_exit': 1}}})
@@ -0,0 +1,28 @@
+import driving_easyocr
+import driving_test
+from passport_mrz import parse_mrz_data
+from passport_reader import PassportReader
+
+MRZ = ("P<UTOERIKSSON<<ANNA<MARIA<<<<<<<<<<<<<<<<<<<\n"
+       "L898902C36UTO7408122F1204159ZE184226B<<<<<10\n")
+
+
+def test_passport_reader_keeps_its_original_fields():
+    parsed = PassportReader().parse_mrz_data(MRZ)
+    assert parsed == {
+        'document_type': 'P', 'issuing_country': 'UTO', 'surname': 'ERIKSSON',
+        'given_names': 'ANNA MARIA', 'passport_number': 'L898902C3', 'nationality': 'UTO',
+        'date_of_birth': '740812', 'sex': 'F', 'expiry_date': '120415',
+    }
+    # The shared parser's richer schema is still what passport_mrz returns
+    assert parse_mrz_data(MRZ)['sex'] == 'Female'
+
+
+def test_driving_easyocr_parser_is_selectable_and_differs():
+    lines = ["PENNSYLVANIA", "DLN: 12 345 678", "Jo Li", "ANNA SMITH", "EXP: 01-02-2030"]
+    legacy, kv_pairs = driving_easyocr.PARSERS['driving_easyocr'](lines)
+    shared, kv_pairs = driving_easyocr.PARSERS['driving_test'](lines)
+    # Words of 2 letters or fewer never make a name, and only slash dates are expiries
+    assert legacy['Name'] == "Anna Smith" and shared['Name'] == "Jo Li"
+    assert legacy['Exp Date'] == "Not Found" and shared['Exp Date'] == "01-02-2030"
+    assert driving_easyocr.PARSERS['driving_test'] is driving_test.parse_driver_license_details
@@ -0,0 +1,60 @@
+import pytest
+
+from driving_test import parse_driver_license_details, parse_driver_license_results
+
+# Outputs of the per-field extract_* rules the single pass replaced; any change here is a behaviour change
+PINNED = [
+    (["PENNSYLVANIA", "DRIVER'S LICENSE", "DLN: 12 345 678", "EXP: 01/02/2030", "JOHN Q SAMPLE", "SEX: M",
+      "123 MAIN ST"],
+     {"DL No": "12345678", "Exp Date": "01/02/2030", "Sex": "M", "Name": "John Sample", "State": "Pennsylvania"}),
+    (["WASHINGTON", "DRIVER LICENSE", "WDLABCD1234EF", "4d LIC 9", "EXP", "08-15-2027", "SEX", "F", "DOE",
+      "JANE ANN"],
+     {"DL No": "WDLABCD1234EF", "Exp Date": "08-15-2027", "Sex": "F", "Name": "Jane Ann", "State": "Washington"}),
+    (["CA", "DL: B1234567", "EXP 05/2031", "SMITH", "M"],
+     {"DL No": "B1234567", "Exp Date": "05/2031", "Sex": "M", "Name": "Ca", "State": "California"}),
+    (["SAMPLE", "ENHANCED"],
+     {"DL No": "Not Found", "Exp Date": "Not Found", "Sex": "Not Found", "Name": "Not Found", "State": "Not Found"}),
+]
+
+
+@pytest.mark.parametrize("lines, expected", PINNED)
+def test_single_pass_parser_output_is_pinned(lines, expected):
+    details, kv_pairs = parse_driver_license_details(lines)
+    assert details == expected
+
+
+def test_key_value_pairs_keep_the_last_value_per_key():
+    details, kv_pairs = parse_driver_license_details(["DLN: 12 345 678", "EXP: 01/02/2030", "EXP: 02/03/2031"])
+    assert kv_pairs == {"DLN": "12 345 678", "EXP": "02/03/2031"}
+
+
+def row(y, text, conf):
+    return ([[10, y], [300, y], [300, y + 20], [10, y + 20]], text, conf)
+
+
+def test_the_most_confident_of_competing_candidates_wins():
+    results = [row(0, "WASHINGTON", 0.9),
+               row(40, "EXP: 01/02/2029", 0.4), row(80, "EXP: 01/02/2030", 0.95),
+               row(120, "SEX: F", 0.5), row(160, "SEX: M", 0.9),
+               row(200, "JANE DOE", 0.35), row(240, "JOHN SMITH", 0.8)]
+    details, kv_pairs, confidences = parse_driver_license_results(results)
+    assert details["Exp Date"] == "01/02/2030" and kv_pairs["EXP"] == "01/02/2030"
+    assert details["Sex"] == "M" and details["Name"] == "John Smith"
+    assert confidences["Exp Date"] == 0.95 and confidences["Name"] == 0.8
+    # The same lines in the other confidence order resolve the other way
+    results = [row(0, "WASHINGTON", 0.9),
+               row(40, "EXP: 01/02/2029", 0.95), row(80, "EXP: 01/02/2030", 0.4)]
+    details, kv_pairs, confidences = parse_driver_license_results(results)
+    assert details["Exp Date"] == "01/02/2029" and kv_pairs["EXP"] == "01/02/2029"
+
+
+def test_a_more_confident_fallback_does_not_beat_a_labelled_value():
+    results = [row(0, "PENNSYLVANIA", 0.9), row(40, "DLN: 12 345 678", 0.5), row(80, "87654321", 0.99)]
+    details, kv_pairs, confidences = parse_driver_license_results(results)
+    assert details["DL No"] == "12345678" and confidences["DL No"] == 0.5
+
+
+def test_the_state_comes_from_the_most_confident_state_line():
+    results = [row(0, "OHIO", 0.4), row(40, "PENNSYLVANIA", 0.9), row(80, "DLN 12345678", 0.9)]
+    details, kv_pairs, confidences = parse_driver_license_results(results)
+    assert details["State"] == "Pennsylvania" and details["DL No"] == "12345678"
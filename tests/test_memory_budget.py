@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+import memory_budget
+import passport_mrz
+from memory_budget import MemoryBudget, MemoryBudgetExceeded, MRZ_SEARCH_BYTES_PER_PIXEL
+
+
+@pytest.fixture
+def small_budget(monkeypatch):
+    # Room for a 100x100 MRZ search, not a 1000x1000 one
+    monkeypatch.setattr(memory_budget, "_default_budget",
+                        MemoryBudget(100 * 100 * MRZ_SEARCH_BYTES_PER_PIXEL))
+
+
+def test_check_raises_only_over_the_cap():
+    budget = MemoryBudget(10 * 10 * 8)
+    budget.check((10, 10), 8)
+    with pytest.raises(MemoryBudgetExceeded, match="20x10"):
+        budget.check((10, 20), 8)
+    MemoryBudget().check((100000, 100000), 8)
+
+
+def test_over_budget_passport_is_refused_before_normalizing(small_budget, monkeypatch):
+    def fail(*args):
+        raise AssertionError("the full-size page was normalized")
+    monkeypatch.setattr(passport_mrz, "normalize_page", fail)
+    result = passport_mrz.extract_passport(np.zeros((1000, 1000, 3), np.uint8), engine='tesseract')
+    assert result["raw_mrz_text"] is None and result["parsed_data"] is None
+    assert "worker budget" in result["Error"]
+
+
+def test_over_budget_passport_pages_are_recorded(small_budget, tmp_path):
+    import cv2
+    from page_stream import extract_passport_pages
+    from passport_reader import PassportReader
+    path = str(tmp_path / "page.png")
+    cv2.imwrite(path, np.full((1000, 1000, 3), 235, np.uint8))
+    [page] = extract_passport_pages(path, PassportReader(), max_workers=1)
+    assert "worker budget" in page["result"]["Error"]
+
+
+def test_over_budget_passport_is_not_retried_by_the_watcher(small_budget, tmp_path):
+    import cv2
+    from watch_ingest import CheckpointIndex, ingest_directory, passport_handler
+    images = tmp_path / "in"
+    images.mkdir()
+    cv2.imwrite(str(images / "page.png"), np.full((1000, 1000, 3), 235, np.uint8))
+    with CheckpointIndex(str(tmp_path / "index.sqlite")) as index:
+        first = ingest_directory(str(images), passport_handler(), index, str(tmp_path / "out"))
+        assert "worker budget" in next(iter(first.values()))["Error"]
+        assert ingest_directory(str(images), passport_handler(), index, str(tmp_path / "out")) == {}
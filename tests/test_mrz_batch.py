@@ -0,0 +1,20 @@
+from datetime import date
+
+from mrz_batch import parse_mrz_batch
+
+LINE1 = "P<UTOERIKSSON<<ANNA<MARIA<<<<<<<<<<<<<<<<<<<"
+LINE2 = "L898902C36UTO7408122F1204159ZE184226B<<<<<10"
+
+
+def test_empty_batch_has_every_column_with_no_rows():
+    full = parse_mrz_batch([LINE1], [LINE2], date(2026, 10, 19))
+    empty = parse_mrz_batch([], [], date(2026, 10, 19))
+    assert set(empty) == set(full)
+    for key, column in empty.items():
+        assert len(column) == 0 and column.dtype.kind == full[key].dtype.kind
+
+
+def test_check_digits_of_the_specimen_pass():
+    parsed = parse_mrz_batch([LINE1], [LINE2], date(2026, 10, 19))
+    assert parsed['passport_number'][0] == "L898902C3"
+    assert parsed['date_of_birth_check_ok'][0] and parsed['composite_check_ok'][0]
@@ -0,0 +1,25 @@
+from datetime import date
+
+from mrz_dates import MrzDateConverter
+
+REFERENCE = date(2026, 10, 19)
+
+
+def test_birth_dates_never_land_in_the_future():
+    converter = MrzDateConverter(REFERENCE)
+    assert converter.convert("261019") == ("2026-10-19", "19-10-2026")
+    assert converter.convert("261020") == ("1926-10-20", "20-10-1926")
+
+
+def test_expiry_dates_may_lie_ahead():
+    converter = MrzDateConverter(REFERENCE)
+    assert converter.convert("310101", "expiry") == ("2031-01-01", "01-01-2031")
+    assert converter.convert("990101", "expiry") == ("1999-01-01", "01-01-1999")
+
+
+def test_invalid_dates_are_empty_and_only_digit_strings_are_memoized():
+    converter = MrzDateConverter(REFERENCE)
+    for mrz_date in ("", "000229X", "O1O1O1", "010230", "011301"):
+        assert converter.convert(mrz_date) == ("", "")
+    assert set(converter._cache["birth"]) == {"010230", "011301"}
+    assert converter.convert("000229") == ("2000-02-29", "29-02-2000")
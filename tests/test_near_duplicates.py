@@ -0,0 +1,101 @@
+import cv2
+import numpy as np
+
+from near_duplicates import phash, hamming, extract_deduplicated, key_field_confirmer, _key_field_evidence
+
+PEOPLE = [("JOHN SAMPLE", "12345678"), ("MARIA LOPEZ", "87654321"), ("WEI CHEN", "55501234"),
+          ("ANNA SMITH", "90817263"), ("OMAR HASSAN", "31415926"), ("LIU YANG", "27182818")]
+# Template positions of the name and number lines: (x_min, x_max, y_min, y_max)
+NAME_BOX = [300, 900, 200, 250]
+NUMBER_BOX = [300, 700, 300, 350]
+
+
+def license_card(name, number):
+    card = np.full((638, 1012), 235, np.uint8)
+    cv2.rectangle(card, (0, 0), (1011, 120), 90, -1)
+    cv2.putText(card, "PENNSYLVANIA DRIVER LICENSE", (40, 80), cv2.FONT_HERSHEY_SIMPLEX, 1.4, 255, 3)
+    cv2.rectangle(card, (40, 170), (260, 560), 120, -1)
+    cv2.putText(card, name, (NAME_BOX[0], NAME_BOX[3] - 10), cv2.FONT_HERSHEY_SIMPLEX, 1.2, 20, 2)
+    cv2.putText(card, "DLN " + number, (NUMBER_BOX[0], NUMBER_BOX[3] - 10), cv2.FONT_HERSHEY_SIMPLEX, 1.2, 20, 2)
+    cv2.putText(card, "EXP 01/02/2030", (300, 450), cv2.FONT_HERSHEY_SIMPLEX, 1.2, 20, 2)
+    return card
+
+
+def _quad(box):
+    x_min, x_max, y_min, y_max = box
+    return [[x_min, y_min], [x_max, y_min], [x_max, y_max], [x_min, y_max]]
+
+
+class TemplateReader:
+    """Reads whichever person's card is current, at the template's fixed line positions."""
+
+    def __init__(self):
+        self.current = None
+        self.full_reads = 0
+
+    def readtext(self, image, detail=1):
+        self.full_reads += 1
+        name, number = self.current
+        return [(_quad(NAME_BOX), name, 0.9), (_quad(NUMBER_BOX), "DLN " + number, 0.9)]
+
+    def recognize(self, image, horizontal_list=None, free_list=None, detail=0, **kwargs):
+        name, number = self.current
+        texts = []
+        for x_min, x_max, y_min, y_max in horizontal_list:
+            cy = (y_min + y_max) / 2.0
+            texts.append(name if NAME_BOX[2] <= cy <= NAME_BOX[3] else
+                         "DLN " + number if NUMBER_BOX[2] <= cy <= NUMBER_BOX[3] else "")
+        return texts
+
+
+def _run(reader, people):
+    def extract(processed_img):
+        ocr_results = reader.readtext(processed_img)
+        number = ocr_results[1][1].split()[-1]
+        return {"DL No": number}, _key_field_evidence(number, ocr_results)
+
+    def images():
+        for i, person in enumerate(people):
+            reader.current = person
+            yield f"card_{i}.png", license_card(*person)
+
+    return extract_deduplicated(images(), lambda img: (img, None), extract, confirm=key_field_confirmer(reader))
+
+
+def test_same_template_cards_hash_close():
+    hashes = [phash(license_card(*person)) for person in PEOPLE]
+    distances = [hamming(a, b) for i, a in enumerate(hashes) for b in hashes[i + 1:]]
+    # The hazard the confirmation step guards against
+    assert min(distances) <= 8
+
+
+def test_different_people_on_same_template_are_not_merged():
+    reader = TemplateReader()
+    results = _run(reader, PEOPLE)
+    assert [r["DL No"] for r in results.values()] == [number for name, number in PEOPLE]
+    assert not any("duplicate_of" in r for r in results.values())
+    assert reader.full_reads == len(PEOPLE)
+
+
+def test_same_person_again_is_reused_after_confirmation():
+    reader = TemplateReader()
+    results = _run(reader, [PEOPLE[0], PEOPLE[1], PEOPLE[0]])
+    assert results["card_2.png"]["duplicate_of"] == "card_0.png"
+    assert results["card_2.png"]["DL No"] == PEOPLE[0][1]
+    assert reader.full_reads == 2
+
+
+def test_without_confirmer_candidates_are_only_flagged():
+    reader = TemplateReader()
+
+    def extract(processed_img):
+        return {"DL No": reader.readtext(processed_img)[1][1].split()[-1]}, None
+
+    def images():
+        for i, person in enumerate(PEOPLE[:2]):
+            reader.current = person
+            yield f"card_{i}.png", license_card(*person)
+
+    results = extract_deduplicated(images(), lambda img: (img, None), extract)
+    assert results["card_1.png"]["DL No"] == PEOPLE[1][1]
+    assert "duplicate_of" not in results["card_1.png"]
@@ -0,0 +1,75 @@
+import random
+import string
+
+import cv2
+import numpy as np
+import pytest
+
+from orientation import detect_orientation, rotate
+
+FONTS = [cv2.FONT_HERSHEY_SIMPLEX, cv2.FONT_HERSHEY_DUPLEX, cv2.FONT_HERSHEY_COMPLEX, cv2.FONT_HERSHEY_TRIPLEX]
+WORDS = ["Name", "Address", "Driver", "License", "Expires", "Height", "Eyes", "brown", "Maple", "Street",
+         "John", "Sample", "Pennsylvania", "class", "Organ", "donor", "Birth", "Date"]
+
+
+def text_card(seed, caps, centred=False):
+    """A blank card with 4-7 left-aligned (or centred) lines of all-caps codes or mixed-case words in a random Hershey font."""
+    rng = random.Random(seed)
+    card = np.full((638, 1012, 3), 235, np.uint8)
+    font = rng.choice(FONTS)
+    lines = rng.randint(4, 7)
+    for i in range(lines):
+        if caps:
+            words = ["".join(rng.choice(string.ascii_uppercase + string.digits + "/-") for _ in range(rng.randint(2, 9)))
+                     for _ in range(rng.randint(2, 4))]
+        else:
+            words = [rng.choice(WORDS) for _ in range(rng.randint(2, 4))]
+        text, scale = " ".join(words), rng.uniform(0.9, 1.4)
+        x = (1012 - cv2.getTextSize(text, font, scale, 2)[0][0]) // 2 if centred else 40
+        cv2.putText(card, text, (x, 70 + i * (560 // lines)), font, scale, (20, 20, 20), 2)
+    return card
+
+
+def test_upright_all_caps_cards_are_not_flipped():
+    rotations = [detect_orientation(text_card(seed, caps=True))["rotation"] for seed in range(40)]
+    assert rotations == [0] * 40
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_upright_mixed_case_cards_stay_upright(seed):
+    assert detect_orientation(text_card(seed, caps=False))["rotation"] == 0
+
+
+def test_upside_down_mixed_case_cards_are_flipped():
+    flipped = [detect_orientation(rotate(text_card(seed, caps=False), 180))["rotation"] for seed in range(20)]
+    assert flipped.count(180) >= 16
+    assert set(flipped) <= {0, 180}
+
+
+@pytest.mark.parametrize("turned", [90, 180, 270])
+def test_turned_all_caps_cards_are_turned_back(turned):
+    rotations = [detect_orientation(rotate(text_card(seed, caps=True), turned))["rotation"] for seed in range(20)]
+    assert rotations == [(360 - turned) % 360] * 20
+
+
+class CountingReader:
+    """Reads every line with the same confidence, recording how often it is asked."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def recognize(self, image, horizontal_list=None, free_list=None, detail=0, batch_size=1, allowlist=None):
+        self.calls += 1
+        return [([[0, 0], [1, 0], [1, 1], [0, 1]], "TEXT", 0.5) for _ in horizontal_list]
+
+
+def test_reader_is_only_asked_when_the_image_checks_are_undecided():
+    reader = CountingReader()
+    for caps in (True, False):
+        info = detect_orientation(rotate(text_card(0, caps=caps), 180), reader=reader)
+        assert info["rotation"] == 180 and info["method"] != "recognizer"
+    assert reader.calls == 0
+    # Centred all-caps lines give neither ascenders nor a ragged edge to go by
+    info = detect_orientation(text_card(0, caps=True, centred=True), reader=reader)
+    assert info["method"] == "recognizer" and reader.calls == 2
+    assert info["rotation"] == 0
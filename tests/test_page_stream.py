@@ -0,0 +1,65 @@
+import time
+
+import cv2
+import numpy as np
+
+from page_stream import process_pages, extract_license_pages
+
+
+def card():
+    img = np.full((638, 1012, 3), 235, np.uint8)
+    for i in range(7):
+        cv2.putText(img, "DLN 1234%d SAMPLE JOHN EXP 01/02/2030" % i, (40, 70 + i * 80),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.0, (30, 30, 30), 2)
+    return img
+
+
+def write_tiff(path, pages):
+    assert cv2.imwritemulti(str(path), pages)
+    return str(path)
+
+
+def test_a_failing_page_is_recorded_and_the_rest_finish(tmp_path):
+    pages = [np.full((32, 32, 3), value, np.uint8) for value in (10, 20, 30, 40)]
+    path = write_tiff(tmp_path / "pages.tiff", pages)
+
+    def handler(image):
+        if image[0, 0, 0] == 20:
+            raise ValueError("bad page")
+        return int(image[0, 0, 0])
+
+    results = process_pages(path, handler, max_workers=2)
+    assert results == [{"page": 1, "result": 10}, {"page": 2, "Error": "bad page"},
+                       {"page": 3, "result": 30}, {"page": 4, "result": 40}]
+
+
+class BusyCheckingReader:
+    def __init__(self):
+        self.busy = False
+        self.shared = False
+        self.calls = 0
+
+    def readtext(self, image, detail=1):
+        self.shared |= self.busy
+        self.busy = True
+        self.calls += 1
+        # Long enough that the other worker picks up pages meanwhile
+        time.sleep(0.05)
+        self.busy = False
+        return []
+
+
+def test_page_workers_never_share_a_reader(tmp_path):
+    path = write_tiff(tmp_path / "cards.tiff", [card()] * 4)
+    readers = []
+
+    def factory():
+        readers.append(BusyCheckingReader())
+        return readers[-1]
+
+    results = extract_license_pages(path, factory, max_workers=2)
+    assert [r["page"] for r in results] == [1, 2, 3, 4]
+    assert all("extracted_details" in r["result"] for r in results)
+    assert len(readers) == 2
+    assert sum(reader.calls for reader in readers) == 4
+    assert not any(reader.shared for reader in readers)
@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+import field_retry
+from pipeline_config import PipelineConfig, PipelineConfigError, DEFAULT_CONFIG, validate, get_config, set_config
+
+
+@pytest.mark.parametrize("overrides", [[], [{"license": {}}], "license", 0])
+def test_top_level_must_be_a_mapping(overrides):
+    with pytest.raises(PipelineConfigError, match="expected a mapping"):
+        validate(overrides)
+
+
+def test_no_overrides_means_defaults():
+    assert validate(None) == DEFAULT_CONFIG
+    assert validate({}) == DEFAULT_CONFIG
+
+
+def test_config_file_holding_a_list_is_rejected(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps([]))
+    with pytest.raises(PipelineConfigError):
+        PipelineConfig(str(path))
+
+
+def test_ssn_name_retry_follows_the_profile():
+    box = [[0, 0], [100, 0], [100, 20], [0, 20]]
+    ocr_results = [(box, "JOHN", 0.75)]
+    scores = {'SSN': 1.0, 'Name': 0.0}
+    previous = get_config()
+    try:
+        set_config(PipelineConfig(overrides={'ssn': {'fields': {'name_min_conf': 0.7}}}))
+        assert field_retry._ssn_regions(ocr_results, "123456789", scores, 0.5) == []
+        set_config(PipelineConfig(overrides={'ssn': {'fields': {'name_min_conf': 0.8}}}))
+        assert len(field_retry._ssn_regions(ocr_results, "123456789", scores, 0.5)) == 1
+    finally:
+        set_config(previous)
@@ -0,0 +1,50 @@
+import pytest
+
+from pipeline_config import PipelineConfig, PipelineConfigError
+from pipeline_tuner import DEFAULT_SWEEPS, _overrides, choose, pareto_front, sweep_trials
+
+
+def trial(seconds, accuracy):
+    return {"params": {}, "seconds_per_image": seconds, "accuracy": accuracy}
+
+
+def test_sweep_trials_covers_the_grid_and_samples_it_down_reproducibly():
+    sweep = {'denoise.h': [15, 25], 'threshold.C': [5, 10, 15]}
+    trials = sweep_trials(sweep)
+    assert len(trials) == 6
+    assert {'denoise.h': 25, 'threshold.C': 10} in trials
+    sampled = sweep_trials(sweep, max_trials=4, seed=1)
+    assert len(sampled) == 4 and all(t in trials for t in sampled)
+    assert sampled == sweep_trials(sweep, max_trials=4, seed=1)
+
+
+def test_overrides_nest_dotted_keys_under_the_document():
+    params = {'denoise.h': 15, 'threshold.C': 5, 'threshold.block_size': 21}
+    assert _overrides('license', params) == {
+        'license': {'denoise': {'h': 15}, 'threshold': {'C': 5, 'block_size': 21}}}
+    assert _overrides('license', {}) == {'license': {}}
+
+
+def test_every_default_sweep_value_is_a_valid_config():
+    for doc_type, sweep in DEFAULT_SWEEPS.items():
+        for params in sweep_trials(sweep, max_trials=None):
+            PipelineConfig(overrides=_overrides(doc_type, params))
+
+
+def test_invalid_sweep_value_is_rejected_by_the_config():
+    with pytest.raises(PipelineConfigError, match="must be odd"):
+        PipelineConfig(overrides=_overrides('license', {'threshold.block_size': 30}))
+
+
+def test_pareto_front_keeps_only_undominated_trials_fastest_first():
+    fast, balanced, accurate = trial(0.1, 0.6), trial(0.2, 0.8), trial(0.4, 0.9)
+    dominated, tied_slower = trial(0.3, 0.7), trial(0.5, 0.9)
+    assert pareto_front([accurate, dominated, fast, tied_slower, balanced]) == [fast, balanced, accurate]
+
+
+def test_choose_prefers_the_fastest_trial_reaching_the_accuracy_target():
+    results = [trial(0.4, 0.9), trial(0.2, 0.8), trial(0.1, 0.6), trial(0.3, 0.9)]
+    assert choose(results, min_accuracy=0.75) == trial(0.2, 0.8)
+    # Without a target, or when none reaches it, the most accurate (then fastest) wins
+    assert choose(results) == trial(0.3, 0.9)
+    assert choose(results, min_accuracy=0.95) == trial(0.3, 0.9)
@@ -0,0 +1,87 @@
+import cv2
+import numpy as np
+
+import preprocess_planner
+from pipeline_config import PipelineConfig, get_config, set_config
+from preprocess_planner import PreprocessPlanner
+
+
+def _recognize(reader, processed):
+    return [([[0, 0], [1, 0], [1, 1], [0, 1]], "OK", 0.9)]
+
+
+def _echo(reader, processed):
+    return [([[0, 0], [1, 0], [1, 1], [0, 1]], processed, 0.9)]
+
+
+def planner_with(*names, passing=()):
+    variants = {'license': {name: (lambda img, name=name: name) for name in names}}
+    validators = {'license': lambda results: results[0][1] in passing}
+    return PreprocessPlanner(stats_path=None, variants=variants, validators=validators)
+
+
+def card():
+    img = np.full((638, 1012, 3), 235, np.uint8)
+    for i in range(7):
+        cv2.putText(img, "DLN 1234%d SAMPLE JOHN EXP 01/02/2030" % i, (40, 70 + i * 80),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.0, (30, 30, 30), 2)
+    return img
+
+
+def test_variant_rejecting_the_image_counts_as_a_failed_try():
+    variants = {'license': {'over_budget': lambda img: None, 'plain': lambda img: img}}
+    validators = {'license': lambda results: results[0][1] == "OK"}
+    planner = PreprocessPlanner(stats_path=None, variants=variants, validators=validators)
+    outcome = planner.run(None, np.zeros((4, 4, 3), np.uint8), 'license', recognize=_recognize)
+    assert outcome["variant"] == "plain" and outcome["passed"]
+    assert outcome["tried"] == ["over_budget", "plain"]
+    assert planner.stats['license']['over_budget']['wins'] == 0
+
+
+def test_when_nothing_passes_every_variant_is_tried_and_the_top_ranked_results_returned():
+    planner = planner_with("first", "second", "third")
+    outcome = planner.run(None, None, 'license', recognize=_echo)
+    assert outcome["tried"] == ["first", "second", "third"]
+    assert outcome["variant"] == "first" and not outcome["passed"]
+    assert outcome["results"][0][1] == "first"
+    fresh = planner_with("first", "second", "third")
+    assert fresh.run(None, None, 'license', recognize=_echo, max_variants=2)["tried"] == ["first", "second"]
+
+
+def test_recorded_wins_move_a_variant_up_the_ranking():
+    planner = planner_with("slow", "fast", passing=("fast",))
+    assert planner.ranked('license') == ["slow", "fast"]
+    for _ in range(3):
+        planner.record('license', "slow", False, 1.0)
+        planner.record('license', "fast", True, 1.0)
+    assert planner.stats['license']['fast'] == {'tries': 3, 'wins': 3, 'seconds': 3.0}
+    assert planner.ranked('license') == ["fast", "slow"]
+    outcome = planner.run(None, None, 'license', recognize=_echo)
+    assert outcome["tried"] == ["fast"] and outcome["passed"]
+    assert planner.stats['license']['fast']['wins'] == 4
+
+
+def test_stats_survive_a_save_and_reload(tmp_path):
+    path = str(tmp_path / "stats.json")
+    planner = PreprocessPlanner(stats_path=path)
+    planner.record('license', "gray", True, 0.5)
+    planner.save()
+    assert PreprocessPlanner(stats_path=path).stats == {'license': {'gray': {'tries': 1, 'wins': 1, 'seconds': 0.5}}}
+
+
+def test_planner_flag_thresholds_the_card_with_the_top_ranked_variant(monkeypatch):
+    from driving_test import check_and_prepare, preprocess_resized_image
+    planner = PreprocessPlanner(stats_path=None)
+    planner.record('license', "gray", True, 0.01)
+    planner.record('license', "nlm_adaptive", False, 1.0)
+    monkeypatch.setattr(preprocess_planner, "_default_planner", planner)
+    previous = get_config()
+    try:
+        set_config(PipelineConfig(overrides={'license': {'preprocess': {'planner': True}}}))
+        prepared, processed, report = check_and_prepare(card())
+    finally:
+        set_config(previous)
+    assert np.array_equal(processed, cv2.cvtColor(prepared, cv2.COLOR_BGR2GRAY))
+    # The flag is off by default and the fixed chain runs
+    prepared, processed, report = check_and_prepare(card())
+    assert np.array_equal(processed, preprocess_resized_image(prepared))
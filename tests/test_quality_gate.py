@@ -0,0 +1,114 @@
+import cv2
+import numpy as np
+import pytest
+
+from quality_gate import assess_quality, gate, rejected_or_error
+
+
+def card(background=235, ink=30, size=(638, 1012)):
+    img = np.full(size + (3,), background, np.uint8)
+    for i in range(7):
+        cv2.putText(img, "DLN 1234%d SAMPLE JOHN EXP 01/02/2030" % i, (40, 70 + i * 80),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.0 + 0.03 * i, (ink,) * 3, 2)
+    return img
+
+
+def on_paper(img, paper=255):
+    h, w = img.shape[:2]
+    page = np.full((h * 2, w * 2, 3), paper, np.uint8)
+    page[h // 2:h // 2 + h, w // 2:w // 2 + w] = img
+    return page
+
+
+@pytest.mark.parametrize("image", [
+    card(255, 20),             # white-background scan, almost every pixel clipped
+    on_paper(card()),          # card lying on white paper
+    on_paper(card(), 15),      # card on a dark desk
+    card(227, 40),             # light cards
+    card(231, 60),
+], ids=["white_scan", "card_on_paper", "card_on_desk", "light_227", "light_231"])
+def test_clean_light_documents_pass(image):
+    report = assess_quality(image, 'license')
+    assert report["passed"], report["reasons"]
+
+
+def test_blown_out_image_fails():
+    blown = np.clip(card().astype(np.int16) + 200, 0, 255).astype(np.uint8)
+    report = assess_quality(blown, 'license')
+    assert any(r.startswith("overexposed") for r in report["reasons"])
+
+
+def test_dark_image_fails():
+    dark = (card().astype(np.float32) * 0.18).astype(np.uint8)
+    report = assess_quality(dark, 'license')
+    assert any(r.startswith("underexposed") for r in report["reasons"])
+
+
+def blown_out(img):
+    return np.clip(img.astype(np.int16) + 200, 0, 255).astype(np.uint8)
+
+
+class StubReader:
+    def __init__(self):
+        self.calls = 0
+
+    def readtext(self, image, detail=1):
+        self.calls += 1
+        return []
+
+
+def test_gate_skips_preprocess_for_rejected_images():
+    calls = []
+    processed, report = gate(blown_out(card()), 'license', lambda img: calls.append(img) or img)
+    assert processed is None and not report["passed"] and not calls
+    entry = rejected_or_error(report)
+    assert entry["Error"].startswith("Image rejected by quality check") and entry["quality"] is report
+
+
+def test_gate_preprocesses_accepted_images():
+    processed, report = gate(card(), 'license', lambda img: "processed")
+    assert report["passed"] and processed == "processed"
+    assert rejected_or_error(None) == {"Error": "Image not processed."}
+
+
+def test_license_entry_points_share_the_gate():
+    from driving_test import check_and_preprocess
+    processed, report = check_and_preprocess(blown_out(card()))
+    assert processed is None and not report["passed"]
+    processed, report = check_and_preprocess(card(), resize='fixed_width')
+    assert report["passed"] and processed.ndim == 2
+
+
+def test_page_stream_records_rejections(tmp_path):
+    from page_stream import extract_license_pages
+    path = str(tmp_path / "blown.png")
+    cv2.imwrite(path, blown_out(card()))
+    reader = StubReader()
+    [page] = extract_license_pages(path, lambda: reader, max_workers=1)
+    assert page["result"]["Error"].startswith("Image rejected") and reader.calls == 0
+
+
+def test_watch_ingest_license_handler_gates_before_ocr(tmp_path):
+    from watch_ingest import license_handler
+    blown, clean = str(tmp_path / "blown.png"), str(tmp_path / "clean.png")
+    cv2.imwrite(blown, blown_out(card()))
+    cv2.imwrite(clean, card())
+    reader = StubReader()
+    handle = license_handler(reader)
+    assert handle(blown)["Error"].startswith("Image rejected") and reader.calls == 0
+    assert "extracted_details" in handle(clean) and reader.calls == 1
+
+
+def test_ssn_gate_rejects_dark_cards():
+    from easyocr_ssn import check_and_preprocess
+    dark = (card().astype(np.float32) * 0.18).astype(np.uint8)
+    processed, report = check_and_preprocess(dark)
+    assert processed is None and any(r.startswith("underexposed") for r in report["reasons"])
+
+
+def test_passport_rejection_is_reported_without_reading_the_mrz():
+    from passport_mrz import extract_passport
+    # No reader and no Tesseract are needed: the page is turned away first
+    result = extract_passport(blown_out(card()), engine='tesseract', normalize=False)
+    assert result['raw_mrz_text'] is None and result['parsed_data'] is None
+    assert result["Error"].startswith("Image rejected by quality check")
@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+import reader_pool
+from reader_pool import ReaderPool, partition_cpus
+
+
+@pytest.fixture
+def torch_threads(monkeypatch):
+    # Stands in for torch's per-thread intra-op setting
+    local = threading.local()
+    monkeypatch.setattr(reader_pool, "_get_num_threads", lambda: getattr(local, "threads", 8))
+    monkeypatch.setattr(reader_pool, "_set_num_threads", lambda n: setattr(local, "threads", n))
+    return lambda: getattr(local, "threads", 8)
+
+
+def counting_factory():
+    made = []
+
+    def factory():
+        made.append(object())
+        return made[-1]
+    return factory, made
+
+
+def test_readers_are_built_once_and_lent_one_at_a_time(torch_threads):
+    factory, made = counting_factory()
+    pool = ReaderPool(2, 1, reader_factory=factory)
+    assert len(made) == 2
+    first = pool.checkout()
+    second = pool.checkout()
+    assert {id(first), id(second)} == {id(r) for r in made}
+    with pytest.raises(TimeoutError):
+        pool.checkout(timeout=0.01)
+    pool.checkin(first)
+    assert pool.checkout(timeout=0.01) is first
+
+
+def test_checkout_caps_the_calling_thread_and_checkin_restores_it(torch_threads):
+    factory, made = counting_factory()
+    pool = ReaderPool(2, 3, reader_factory=factory)
+    with pool.reader():
+        assert torch_threads() == 3
+    assert torch_threads() == 8
+
+
+def test_default_thread_cap_splits_the_cores(torch_threads, monkeypatch):
+    monkeypatch.setattr(reader_pool, "available_cpus", lambda: list(range(8)))
+    factory, made = counting_factory()
+    pool = ReaderPool(4, reader_factory=factory)
+    seen = []
+
+    def work():
+        with pool.reader():
+            seen.append(torch_threads())
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert seen == [2, 2, 2, 2]
+
+
+def test_concurrent_workers_never_share_a_reader(torch_threads):
+    factory, made = counting_factory()
+    pool = ReaderPool(2, 1, reader_factory=factory)
+    in_use, overlaps, lock = set(), [], threading.Lock()
+
+    def work():
+        for _ in range(50):
+            with pool.reader() as reader:
+                with lock:
+                    overlaps.append(id(reader) in in_use)
+                    in_use.add(id(reader))
+                with lock:
+                    in_use.discard(id(reader))
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(overlaps) == 200 and not any(overlaps)
+
+
+def test_partition_cpus_gives_disjoint_sets(monkeypatch):
+    monkeypatch.setattr(reader_pool, "available_cpus", lambda: list(range(6)))
+    assert partition_cpus(3, 2) == [[0, 1], [2, 3], [4, 5]]
+    # More readers than cores fall back to sharing every core
+    assert partition_cpus(4, 2)[3] == list(range(6))
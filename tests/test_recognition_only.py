@@ -0,0 +1,78 @@
+import cv2
+import numpy as np
+
+from recognition_only import LINE_PAD, projection_line_boxes, recognize_boxes
+
+
+def strip(lines, size=(200, 900)):
+    """White strip with black text lines, each given as (text, baseline y)."""
+    img = np.full(size + (3,), 255, np.uint8)
+    for text, y in lines:
+        cv2.putText(img, text, (50, y), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+    return img
+
+
+def ink_bounds(img, top, bottom):
+    ys, xs = np.nonzero(img[top:bottom, :, 0] < 128)
+    return [int(xs.min()), int(xs.max()) + 1, top + int(ys.min()), top + int(ys.max()) + 1]
+
+
+def test_each_text_line_gets_a_box_padded_around_its_ink():
+    img = strip([("P<UTOERIKSSON<<ANNA<MARIA", 60), ("L898902C36UTO7408122F120", 140)])
+    boxes = projection_line_boxes(img)
+    assert len(boxes) == 2
+    for (x0, x1, top, bottom), (ink_x0, ink_x1, ink_top, ink_bottom) in zip(
+            boxes, [ink_bounds(img, 0, 100), ink_bounds(img, 100, 200)]):
+        assert (x0, x1) == (ink_x0 - LINE_PAD, ink_x1 + LINE_PAD)
+        # Rows with only a glyph tip fall under ROW_INK_RATIO, so the height may be a row short
+        assert abs(top - (ink_top - LINE_PAD)) <= 1 and abs(bottom - (ink_bottom + LINE_PAD)) <= 1
+
+
+def test_short_lines_are_not_boxes():
+    img = strip([("ABCDEFGH", 60), ("IJKLMNOP", 160)])
+    cv2.putText(img, "small note", (50, 110), cv2.FONT_HERSHEY_SIMPLEX, 0.3, (0, 0, 0), 1)
+    boxes = projection_line_boxes(img)
+    assert len(boxes) == 2
+    assert all(not (top <= 108 < bottom) for (x0, x1, top, bottom) in boxes)
+
+
+def test_a_line_split_by_a_thin_gap_stays_one_box():
+    img = np.full((60, 300), 255, np.uint8)
+    img[10:30, 20:280:6] = 0
+    # Serifs below a one-row gap still belong to the line
+    img[31:34, 20:280:6] = 0
+    assert projection_line_boxes(img) == [[20 - LINE_PAD, 279 + LINE_PAD, 10 - LINE_PAD, 34 + LINE_PAD]]
+
+
+def test_boxes_are_clamped_to_the_strip():
+    img = np.full((20, 300), 255, np.uint8)
+    img[:, list(range(0, 300, 4)) + [299]] = 0
+    assert projection_line_boxes(img) == [[0, 300, 0, 20]]
+
+
+def test_blank_strip_has_no_boxes():
+    assert projection_line_boxes(np.full((50, 300), 255, np.uint8)) == []
+
+
+class RecordingReader:
+    def __init__(self):
+        self.calls = []
+
+    def recognize(self, image, horizontal_list=None, free_list=None, detail=0, batch_size=1, allowlist=None):
+        self.calls.append({"horizontal_list": horizontal_list, "free_list": free_list, "detail": detail,
+                           "batch_size": batch_size, "allowlist": allowlist})
+        return ["TEXT"] * len(horizontal_list)
+
+
+def test_boxes_are_recognized_in_one_batch_without_the_detector():
+    reader = RecordingReader()
+    boxes = [[0, 100, 0, 20], [0, 100, 30, 50]]
+    assert recognize_boxes(reader, np.zeros((60, 100), np.uint8), boxes, allowlist="ABC<", detail=1) == ["TEXT"] * 2
+    assert reader.calls == [{"horizontal_list": boxes, "free_list": [], "detail": 1, "batch_size": 2,
+                             "allowlist": "ABC<"}]
+
+
+def test_no_boxes_means_no_recognizer_call():
+    reader = RecordingReader()
+    assert recognize_boxes(reader, np.zeros((60, 100), np.uint8), []) == []
+    assert reader.calls == []
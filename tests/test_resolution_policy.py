@@ -0,0 +1,52 @@
+import cv2
+import numpy as np
+import pytest
+
+from resolution_policy import choose_scale, rescale_for_text
+
+
+def text_image(font_scale, size=(600, 1600), lines=4):
+    """All-caps lines whose letters are about 21 px tall at font_scale 1.0."""
+    img = np.full((size[0], size[1], 3), 235, np.uint8)
+    step = int(60 * font_scale) + 20
+    for i in range(lines):
+        cv2.putText(img, "HEIGHT EXAMPLE 1234", (20, step * (i + 1)), cv2.FONT_HERSHEY_SIMPLEX, font_scale,
+                    (20, 20, 20), 2)
+    return img
+
+
+def test_small_text_is_scaled_up_to_the_target_height():
+    assert choose_scale(text_image(0.5)) == pytest.approx(24 / 11.2, rel=0.1)
+
+
+def test_text_near_the_target_is_left_alone():
+    img = text_image(1.1)
+    resized, scale = rescale_for_text(img)
+    assert scale == 1.0 and resized is img
+
+
+def test_large_text_is_scaled_down():
+    assert choose_scale(text_image(2.0, size=(800, 1600))) == pytest.approx(24 / 41.6, rel=0.1)
+
+
+def test_upscaling_stops_at_max_upscale():
+    assert choose_scale(text_image(0.5, size=(400, 1000)), target_char_height=60, max_upscale=3.0) == 3.0
+
+
+def test_blank_image_uses_the_fallback_scale():
+    assert choose_scale(np.full((300, 400, 3), 235, np.uint8), fallback_scale=0.5) == 0.5
+
+
+def test_output_side_is_capped():
+    img = text_image(0.5)
+    scale = choose_scale(img, max_side=2000)
+    assert scale == pytest.approx(2000 / 1600)
+    resized, scale = rescale_for_text(img, max_side=2000)
+    assert max(resized.shape[:2]) <= 2000
+
+
+def test_output_pixels_are_capped_and_the_cap_wins_over_the_fallback():
+    img = np.full((1000, 1000, 3), 235, np.uint8)
+    assert choose_scale(img, fallback_scale=2.0, max_pixels=2_250_000) == pytest.approx(1.5)
+    # A frame already over the caps is brought down even when no text is found
+    assert choose_scale(img, max_side=500) == pytest.approx(0.5)
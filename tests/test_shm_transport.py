@@ -0,0 +1,52 @@
+import os
+
+import numpy as np
+
+from shm_transport import run_ocr_processes
+
+
+def _reader():
+    return None
+
+
+def _mean(reader, img):
+    if img.shape == (1, 1):
+        raise ValueError("too small to read")
+    if img.shape == (2, 2):
+        # Stands in for a worker killed mid-image, e.g. by the OOM killer
+        os._exit(1)
+    return float(img.mean())
+
+
+def _images(*shapes):
+    return [(f"img{i}", np.full(shape, i, np.uint8)) for i, shape in enumerate(shapes)]
+
+
+def test_results_come_back_by_name():
+    outputs, errors = run_ocr_processes(_images((10, 10), (20, 5), (7, 7)), _reader, _mean)
+    assert outputs == {"img0": 0.0, "img1": 1.0, "img2": 2.0}
+    assert errors == {}
+
+
+def test_failing_image_is_reported_without_failing_the_batch():
+    outputs, errors = run_ocr_processes(_images((10, 10), (1, 1), (7, 7)), _reader, _mean)
+    assert outputs == {"img0": 0.0, "img2": 2.0}
+    assert errors["img1"].startswith("ValueError")
+
+
+def test_image_larger_than_a_slot_is_pickled_instead():
+    outputs, errors = run_ocr_processes(_images((10, 10), (100, 100)), _reader, _mean, slot_bytes=1024)
+    assert outputs == {"img0": 0.0, "img1": 1.0}
+    assert errors == {}
+
+
+def test_dead_worker_does_not_hang_the_batch():
+    outputs, errors = run_ocr_processes(_images((10, 10), (2, 2), (7, 7), (5, 5)), _reader, _mean)
+    assert "img1" in errors
+    assert set(outputs) | set(errors) == {"img0", "img1", "img2", "img3"}
+
+
+def test_images_left_when_every_worker_died_are_errors():
+    outputs, errors = run_ocr_processes(_images((2, 2), (10, 10), (7, 7)), _reader, _mean, workers=1, slots=1)
+    assert outputs == {}
+    assert set(errors) == {"img0", "img1", "img2"}
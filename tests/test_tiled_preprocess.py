@@ -0,0 +1,27 @@
+from functools import partial
+
+import cv2
+import numpy as np
+
+from driving_test import denoise_and_threshold
+from easyocr_ssn import denoise_sharpen_threshold
+from pipeline_config import profile
+from tiled_preprocess import run_tiled, license_halo, ssn_halo
+
+
+def _scan():
+    rng = np.random.default_rng(0)
+    gray = (rng.random((300, 420)) * 60 + 180).astype(np.uint8)
+    for i in range(5):
+        cv2.putText(gray, "SAMPLE %d" % i, (10, 40 + i * 55), cv2.FONT_HERSHEY_SIMPLEX, 1.2, 20, 2)
+    return gray
+
+
+def test_tiled_chains_are_bit_identical():
+    gray = _scan()
+    for chain, halo, doc_type in ((denoise_and_threshold, license_halo, 'license'),
+                                  (denoise_sharpen_threshold, ssn_halo, 'ssn')):
+        settings = profile(doc_type)
+        func = partial(chain, settings=settings)
+        tiled = run_tiled(func, gray, halo(settings), tile_size=128, max_workers=2, min_pixels=0)
+        assert np.array_equal(tiled, func(gray.copy()))
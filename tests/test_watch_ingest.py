@@ -0,0 +1,108 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+from watch_ingest import CheckpointIndex, ingest_directory
+
+
+class Interrupted(KeyboardInterrupt):
+    pass
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
+
+
+@pytest.fixture
+def tree(tmp_path):
+    images = tmp_path / "in"
+    write(images / "a" / "scan.jpg", b"first")
+    write(images / "b" / "scan.jpg", b"second")
+    write(images / "c.png", b"third")
+    return str(images), str(tmp_path / "index.sqlite"), str(tmp_path / "out")
+
+
+def recording_handler(seen, fail_on=()):
+    def handle(path):
+        seen.append(os.path.basename(os.path.dirname(path)) + "/" + os.path.basename(path))
+        if os.path.basename(path) in fail_on:
+            raise ValueError("unreadable")
+        with open(path, 'rb') as f:
+            return {"content": f.read().decode()}
+    return handle
+
+
+def test_interrupted_run_resumes_after_the_last_finished_file(tree):
+    images, db_path, out = tree
+    seen = []
+
+    def interrupt_on_second(path):
+        if len(seen) == 1:
+            raise Interrupted()
+        return recording_handler(seen)(path)
+
+    with CheckpointIndex(db_path) as index, pytest.raises(Interrupted):
+        ingest_directory(images, interrupt_on_second, index, out)
+    assert seen == ["in/c.png"]
+
+    with CheckpointIndex(db_path) as index:
+        processed = ingest_directory(images, recording_handler(seen), index, out)
+    assert seen == ["in/c.png", "a/scan.jpg", "b/scan.jpg"]
+    assert len(processed) == 2
+
+
+def test_touched_files_are_skipped_and_changed_files_reprocessed(tree):
+    images, db_path, out = tree
+    seen = []
+    with CheckpointIndex(db_path) as index:
+        ingest_directory(images, recording_handler(seen), index, out)
+        os.utime(os.path.join(images, "c.png"), ns=(1, 1))
+        write(os.path.join(images, "a", "scan.jpg"), b"rescanned")
+        del seen[:]
+        processed = ingest_directory(images, recording_handler(seen), index, out)
+    assert seen == ["a/scan.jpg"]
+    assert list(processed.values()) == [{"content": "rescanned"}]
+
+
+def test_same_file_names_in_different_folders_keep_separate_outputs(tree):
+    images, db_path, out = tree
+    with CheckpointIndex(db_path) as index:
+        ingest_directory(images, recording_handler([]), index, out)
+    with open(os.path.join(out, "a", "scan.json")) as f:
+        assert json.load(f) == {"content": "first"}
+    with open(os.path.join(out, "b", "scan.json")) as f:
+        assert json.load(f) == {"content": "second"}
+    assert os.path.exists(os.path.join(out, "c.json"))
+
+
+def test_failing_file_is_retried_up_to_the_cap_then_skipped_until_it_changes(tree):
+    images, db_path, out = tree
+    path = os.path.abspath(os.path.join(images, "c.png"))
+    seen = []
+    with CheckpointIndex(db_path, max_attempts=2) as index:
+        for _ in range(4):
+            ingest_directory(images, recording_handler(seen, fail_on=("c.png",)), index, out)
+        assert seen.count("in/c.png") == 2
+        assert index.attempts(path) == 2
+        write(path, b"fixed")
+        ingest_directory(images, recording_handler(seen), index, out)
+        assert seen.count("in/c.png") == 3
+        assert index.attempts(path) == 0
+        assert index.result(path) == {"content": "fixed"}
+
+
+def test_index_without_attempts_column_is_upgraded(tmp_path):
+    db_path = str(tmp_path / "old.sqlite")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE files (path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, "
+                 "sha256 TEXT NOT NULL, status TEXT NOT NULL, result TEXT, processed_at REAL NOT NULL)")
+    conn.execute("INSERT INTO files VALUES ('x.png', 1, 1, 'abc', 'error', NULL, 0)")
+    conn.commit()
+    conn.close()
+    with CheckpointIndex(db_path) as index:
+        assert index.attempts('x.png') == 0
@@ -0,0 +1,103 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import cv2
+import numpy as np
+
+from memory_budget import default_budget, MemoryBudgetExceeded, LICENSE_BYTES_PER_PIXEL
+from pipeline_config import profile
+
+DEFAULT_TILE_SIZE = 1024
+# Smaller images are processed whole; splitting them costs more than it saves
+MIN_TILED_PIXELS = 4_000_000
+
+
+def nlm_halo(template_window=7, search_window=21):
+    """Pixels of context fastNlMeansDenoising reads around each output pixel."""
+    return search_window // 2 + template_window // 2
+
+
+def kernel_halo(ksize):
+    """Context for a ksize x ksize window op (blur, filter2D, adaptiveThreshold block, morphology)."""
+    return ksize // 2
+
+
+# Chains compose, so their halos add up: NLM -> blur or 3x3 sharpen -> threshold block
+def license_halo(settings):
+    denoise = settings['denoise']
+    return (nlm_halo(denoise['template_window'], denoise['search_window'])
+            + kernel_halo(settings['blur']['ksize']) + kernel_halo(settings['threshold']['block_size']))
+
+
+def ssn_halo(settings):
+    denoise = settings['denoise']
+    return (nlm_halo(denoise['template_window'], denoise['search_window'])
+            + kernel_halo(3) + kernel_halo(settings['threshold']['block_size']))
+
+
+def tile_grid(height, width, tile_size=DEFAULT_TILE_SIZE):
+    """(y0, y1, x0, x1) core tiles covering the image without overlap."""
+    return [(y, min(y + tile_size, height), x, min(x + tile_size, width))
+            for y in range(0, height, tile_size)
+            for x in range(0, width, tile_size)]
+
+
+def run_tiled(func, image, halo, tile_size=DEFAULT_TILE_SIZE, max_workers=None,
+              min_pixels=MIN_TILED_PIXELS):
+    """Apply a window-local op chain to overlapping tiles in a thread pool and stitch the cores.
+
+    Each tile is cut with up to halo extra pixels on every side, so every
+    kept pixel sees the same neighbourhood as in the untiled run and the
+    result is bit-identical. func must not use whole-image statistics
+    (Otsu, CLAHE, histogram equalization) and must keep the input size.
+    OpenCV releases the GIL, so tiles run concurrently on threads. With a
+    single worker the halos would only add work, so the image is processed
+    whole.
+    """
+    h, w = image.shape[:2]
+    max_workers = max_workers or os.cpu_count() or 1
+    if h * w < min_pixels or max_workers < 2:
+        return func(image)
+
+    def work(tile):
+        y0, y1, x0, x1 = tile
+        py0, py1 = max(0, y0 - halo), min(h, y1 + halo)
+        px0, px1 = max(0, x0 - halo), min(w, x1 + halo)
+        result = func(image[py0:py1, px0:px1])
+        return tile, result[y0 - py0:y1 - py0, x0 - px0:x1 - px0]
+
+    out = None
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for (y0, y1, x0, x1), core in pool.map(work, tile_grid(h, w, tile_size)):
+            if out is None:
+                out = np.empty((h, w) + core.shape[2:], dtype=core.dtype)
+            out[y0:y1, x0:x1] = core
+    return out
+
+
+# driving_test.preprocess_resized_image and easyocr_ssn.preprocess_image tile
+# automatically above MIN_TILED_PIXELS; these take an explicit tile size and pool.
+def preprocess_license_tiled(img, tile_size=DEFAULT_TILE_SIZE, max_workers=None):
+    """Tiled equivalent of driving_test.preprocess_loaded_image, including None over the memory budget."""
+    from driving_test import resize_for_ocr, denoise_and_threshold
+    resized_img = resize_for_ocr(img)
+    try:
+        default_budget().check(resized_img.shape, LICENSE_BYTES_PER_PIXEL)
+    except MemoryBudgetExceeded as e:
+        print(f"Error: {e}")
+        return None
+    # Every tile uses the same settings even if the config is reloaded meanwhile
+    settings = profile('license')
+    gray = cv2.cvtColor(resized_img, cv2.COLOR_BGR2GRAY)
+    return run_tiled(partial(denoise_and_threshold, settings=settings), gray, license_halo(settings),
+                     tile_size, max_workers)
+
+
+def preprocess_ssn_tiled(img, tile_size=DEFAULT_TILE_SIZE, max_workers=None):
+    """Tiled equivalent of easyocr_ssn.preprocess_image."""
+    from easyocr_ssn import denoise_sharpen_threshold
+    settings = profile('ssn')
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    return run_tiled(partial(denoise_sharpen_threshold, settings=settings), gray, ssn_halo(settings),
+                     tile_size, max_workers)
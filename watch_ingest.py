@@ -0,0 +1,259 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from pipeline_config import PipelineConfig, get_config, set_config
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tif', '.tiff', '.webp')
+DEFAULT_DB_PATH = "ingest_checkpoint.sqlite"
+DEFAULT_POLL_SECONDS = 5.0
+HASH_CHUNK = 1 << 20
+# Failed passes on an unchanged file before it is skipped until it changes
+MAX_ERROR_ATTEMPTS = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    processed_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CheckpointIndex:
+    """SQLite record of processed files keyed by path, mtime, size and content hash.
+
+    Every file is committed as soon as it is processed, so an interrupted run
+    resumes after the last finished file. A file whose mtime changed but
+    whose content hash did not is not processed again. A file that failed
+    max_attempts times is skipped until its content changes.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, max_attempts=MAX_ERROR_ATTEMPTS):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(files)")]
+        if 'attempts' not in columns:
+            # Indexes written before failed files were counted
+            self._conn.execute("ALTER TABLE files ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def pending(self, path):
+        """Return (needs_processing, fingerprint) where fingerprint is (mtime_ns, size, sha256).
+
+        The fingerprint is taken before processing, so a file rewritten
+        while it is being processed is picked up again on the next pass.
+        """
+        st = os.stat(path)
+        row = self._conn.execute(
+            "SELECT mtime_ns, size, sha256, status, attempts FROM files WHERE path = ?", (path,)).fetchone()
+        # Done, or failed too often to try the same content again
+        settled = row is not None and (row[3] == 'done' or row[4] >= self.max_attempts)
+        if settled and row[0] == st.st_mtime_ns and row[1] == st.st_size:
+            return False, (row[0], row[1], row[2])
+        sha256 = file_sha256(path)
+        if settled and row[2] == sha256:
+            # Touched but unchanged: remember the new mtime so it is not hashed again
+            self._conn.execute("UPDATE files SET mtime_ns = ?, size = ? WHERE path = ?",
+                               (st.st_mtime_ns, st.st_size, path))
+            self._conn.commit()
+            return False, (st.st_mtime_ns, st.st_size, sha256)
+        return True, (st.st_mtime_ns, st.st_size, sha256)
+
+    def record(self, path, fingerprint, status, result):
+        mtime_ns, size, sha256 = fingerprint
+        attempts = 0
+        if status == 'error':
+            row = self._conn.execute(
+                "SELECT sha256, status, attempts FROM files WHERE path = ?", (path,)).fetchone()
+            # Failures only count against the same content
+            previous = row[2] if row is not None and row[0] == sha256 and row[1] == 'error' else 0
+            attempts = previous + 1
+        self._conn.execute(
+            "INSERT OR REPLACE INTO files (path, mtime_ns, size, sha256, status, result, processed_at, attempts) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, mtime_ns, size, sha256, status,
+             json.dumps(result, ensure_ascii=False), time.time(), attempts))
+        self._conn.commit()
+
+    def attempts(self, path):
+        row = self._conn.execute("SELECT attempts FROM files WHERE path = ?", (path,)).fetchone()
+        return row[0] if row else 0
+
+    def result(self, path):
+        row = self._conn.execute("SELECT result FROM files WHERE path = ?", (path,)).fetchone()
+        return json.loads(row[0]) if row and row[0] is not None else None
+
+
+def scan_directory(directory, extensions=IMAGE_EXTENSIONS):
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(directory):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.lower().endswith(extensions):
+                paths.append(os.path.abspath(os.path.join(dirpath, filename)))
+    return paths
+
+
+def _write_json(output_folder, directory, path, data):
+    # Mirror the input tree so a/scan.jpg and b/scan.jpg do not overwrite each other
+    relative = os.path.relpath(path, os.path.abspath(directory))
+    json_path = os.path.join(output_folder, os.path.splitext(relative)[0] + ".json")
+    os.makedirs(os.path.dirname(json_path), exist_ok=True)
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+
+
+def ingest_directory(directory, handler, index, output_folder="output", extensions=IMAGE_EXTENSIONS):
+    """Run handler(path) on every new or changed image under directory.
+
+    Results are checkpointed in index and written to output_folder as JSON,
+    mirroring the layout under directory. A handler error is recorded with
+    status 'error' and the file is retried on later passes, up to the
+    index's max_attempts. Returns {path: result} for the files processed.
+    """
+    processed = {}
+    for path in scan_directory(directory, extensions):
+        try:
+            needed, fingerprint = index.pending(path)
+        except OSError as e:
+            # Deleted or still being written; the next pass picks it up
+            print(f"Skipping {path}: {e}")
+            continue
+        if not needed:
+            continue
+        print(f"\nProcessing: {path}")
+        try:
+            result = handler(path)
+            status = 'done'
+        except Exception as e:
+            print(f"Error processing {path}: {e}")
+            result = {"Error": str(e)}
+            status = 'error'
+        if status == 'done':
+            _write_json(output_folder, directory, path, result)
+        index.record(path, fingerprint, status, result)
+        processed[path] = result
+    return processed
+
+
+def watch_directory(directory, handler, db_path=DEFAULT_DB_PATH, output_folder="output",
+                    poll_seconds=DEFAULT_POLL_SECONDS, extensions=IMAGE_EXTENSIONS, max_passes=None,
+                    max_attempts=MAX_ERROR_ATTEMPTS):
+    """Ingest directory, then keep polling it for new or changed files.
+
+    The pipeline config file, if any, is checked before every pass, so
+    edited thresholds take effect without restarting the watcher.
+    """
+    passes = 0
+    with CheckpointIndex(db_path, max_attempts) as index:
+        while max_passes is None or passes < max_passes:
+            get_config().reload_if_changed()
+            ingest_directory(directory, handler, index, output_folder, extensions)
+            passes += 1
+            if max_passes is None or passes < max_passes:
+                time.sleep(poll_seconds)
+
+
+def license_handler(reader):
+    import cv2
+    from driving_test import check_and_prepare, parse_driver_license_results, recognize_license
+    from quality_gate import rejected_or_error
+
+    def handle(path):
+        img = cv2.imread(path)
+        card, processed_img, quality = check_and_prepare(img) if img is not None else (None, None, None)
+        if processed_img is None:
+            return rejected_or_error(quality)
+        ocr_results = recognize_license(reader, processed_img, card)
+        details, kv_pairs, confidences = parse_driver_license_results(ocr_results)
+        return {"extracted_details": details, "field_confidence": confidences}
+
+    return handle
+
+
+def ssn_handler(reader):
+    import cv2
+    from easyocr_ssn import check_and_prepare, extract_fields_easyocr, recognize_ssn
+    from quality_gate import rejected_or_error
+
+    def handle(path):
+        img = cv2.imread(path)
+        card, processed_img, quality = check_and_prepare(img) if img is not None else (None, None, None)
+        if processed_img is None:
+            return rejected_or_error(quality)
+        ssn, name, signature = extract_fields_easyocr(recognize_ssn(reader, processed_img, card))
+        return {"SSN_Number": ssn, "Printed_Name": name, "Signature": signature}
+
+    return handle
+
+
+def passport_handler():
+    from passport_reader import PassportReader
+    passport_reader = PassportReader()
+
+    def handle(path):
+        result = passport_reader.extract_passport_details(path)
+        return result if result is not None else {"Error": "MRZ not extracted."}
+
+    return handle
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process new or changed images in a directory, resuming after interruptions.")
+    parser.add_argument("document", choices=("license", "ssn", "passport"))
+    parser.add_argument("directory")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    parser.add_argument("--output", default="output")
+    parser.add_argument("--watch", action="store_true", help="keep polling for new files")
+    parser.add_argument("--poll-seconds", type=float, default=DEFAULT_POLL_SECONDS)
+    parser.add_argument("--max-attempts", type=int, default=MAX_ERROR_ATTEMPTS,
+                        help="failed passes before an unchanged file is skipped")
+    parser.add_argument("--config", help="YAML or JSON pipeline config, reloaded when it changes")
+    args = parser.parse_args()
+
+    if args.config:
+        set_config(PipelineConfig(args.config))
+
+    if args.document == "passport":
+        handler = passport_handler()
+    else:
+        from inference_backend import create_reader
+        reader = create_reader(['en'])
+        handler = license_handler(reader) if args.document == "license" else ssn_handler(reader)
+
+    watch_directory(args.directory, handler, db_path=args.db, output_folder=args.output,
+                    poll_seconds=args.poll_seconds, max_passes=None if args.watch else 1,
+                    max_attempts=args.max_attempts)
+
+
+if __name__ == "__main__":
+    main()